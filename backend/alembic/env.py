@@ -68,7 +68,10 @@ def run_migrations_online() -> None:
     """
     # Get the database URL from our configuration
     configuration = config.get_section(config.config_ini_section, {})
-    configuration["sqlalchemy.url"] = SQLALCHEMY_DATABASE_URL
+    # Migrations run on a sync engine, so drop the async driver from the URL
+    configuration["sqlalchemy.url"] = (
+        SQLALCHEMY_DATABASE_URL.replace("+aiosqlite", "").replace("+asyncpg", "")
+    )
     
     connectable = engine_from_config(
         configuration,
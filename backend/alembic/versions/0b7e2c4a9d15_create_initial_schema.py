@@ -0,0 +1,107 @@
+"""Create the initial schema
+
+The tables as they were before the first migration: categories, prompts,
+tags and their association table, and likes.
+
+Revision ID: 0b7e2c4a9d15
+Revises:
+Create Date: 2026-10-19 08:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0b7e2c4a9d15'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Databases created by Base.metadata.create_all before Alembic managed the
+    # schema already have these tables; only missing ones are created
+    existing = set(sa.inspect(op.get_bind()).get_table_names())
+
+    if 'categories' not in existing:
+        op.create_table(
+            'categories',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('name', sa.String(), nullable=False),
+            sa.Column('description', sa.String(), nullable=True),
+            sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+            sa.PrimaryKeyConstraint('id'),
+        )
+    op.create_index('ix_categories_id', 'categories', ['id'], unique=False, if_not_exists=True)
+    op.create_index('ix_categories_name', 'categories', ['name'], unique=True, if_not_exists=True)
+
+    if 'tags' not in existing:
+        op.create_table(
+            'tags',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('name', sa.String(), nullable=False),
+            sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+            sa.PrimaryKeyConstraint('id'),
+        )
+    op.create_index('ix_tags_id', 'tags', ['id'], unique=False, if_not_exists=True)
+    op.create_index('ix_tags_name', 'tags', ['name'], unique=True, if_not_exists=True)
+
+    if 'prompts' not in existing:
+        op.create_table(
+            'prompts',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('title', sa.String(), nullable=False),
+            sa.Column('content', sa.String(), nullable=False),
+            sa.Column('category_id', sa.Integer(), nullable=True),
+            sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+            sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+            sa.Column('like_count', sa.Integer(), nullable=False),
+            sa.Column('user_id', sa.String(), nullable=True),
+            sa.ForeignKeyConstraint(['category_id'], ['categories.id']),
+            sa.PrimaryKeyConstraint('id'),
+        )
+    op.create_index('ix_prompts_id', 'prompts', ['id'], unique=False, if_not_exists=True)
+    op.create_index('ix_prompts_title', 'prompts', ['title'], unique=False, if_not_exists=True)
+    op.create_index('ix_prompts_like_count', 'prompts', ['like_count'], unique=False, if_not_exists=True)
+
+    if 'prompt_tags' not in existing:
+        op.create_table(
+            'prompt_tags',
+            sa.Column('prompt_id', sa.Integer(), nullable=False),
+            sa.Column('tag_id', sa.Integer(), nullable=False),
+            sa.ForeignKeyConstraint(['prompt_id'], ['prompts.id']),
+            sa.ForeignKeyConstraint(['tag_id'], ['tags.id']),
+            sa.PrimaryKeyConstraint('prompt_id', 'tag_id'),
+        )
+
+    if 'prompt_likes' not in existing:
+        op.create_table(
+            'prompt_likes',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('prompt_id', sa.Integer(), nullable=False),
+            sa.Column('user_id', sa.String(), nullable=False),
+            sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+            sa.ForeignKeyConstraint(['prompt_id'], ['prompts.id'], ondelete='CASCADE'),
+            sa.PrimaryKeyConstraint('id'),
+            sqlite_autoincrement=True,
+        )
+    op.create_index('ix_prompt_likes_id', 'prompt_likes', ['id'], unique=False, if_not_exists=True)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_prompt_likes_id', table_name='prompt_likes')
+    op.drop_table('prompt_likes')
+    op.drop_table('prompt_tags')
+    op.drop_index('ix_prompts_like_count', table_name='prompts')
+    op.drop_index('ix_prompts_title', table_name='prompts')
+    op.drop_index('ix_prompts_id', table_name='prompts')
+    op.drop_table('prompts')
+    op.drop_index('ix_tags_name', table_name='tags')
+    op.drop_index('ix_tags_id', table_name='tags')
+    op.drop_table('tags')
+    op.drop_index('ix_categories_name', table_name='categories')
+    op.drop_index('ix_categories_id', table_name='categories')
+    op.drop_table('categories')
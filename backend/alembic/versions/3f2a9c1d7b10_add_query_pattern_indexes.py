@@ -0,0 +1,58 @@
+"""Add indexes for the hot query patterns
+
+Covers the newest-first prompt listing (optionally filtered by category or
+owner), tag -> prompt joins, case-insensitive tag filtering and the like
+lookups in crud.py.
+
+Revision ID: 3f2a9c1d7b10
+Revises: 0b7e2c4a9d15
+Create Date: 2026-10-19 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f2a9c1d7b10'
+down_revision: Union[str, None] = '0b7e2c4a9d15'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_prompts_created_at', 'prompts', ['created_at'], if_not_exists=True)
+    op.create_index(
+        'ix_prompts_category_id_created_at', 'prompts', ['category_id', 'created_at'],
+        if_not_exists=True
+    )
+    op.create_index(
+        'ix_prompts_user_id_created_at', 'prompts', ['user_id', 'created_at'],
+        if_not_exists=True
+    )
+    op.create_index(
+        'ix_prompt_tags_tag_id_prompt_id', 'prompt_tags', ['tag_id', 'prompt_id'],
+        if_not_exists=True
+    )
+    op.create_index('ix_tags_name_lower', 'tags', [sa.text('lower(name)')], if_not_exists=True)
+    # May already exist on databases migrated with scripts/migrate_likes.py
+    op.create_index(
+        'ix_prompt_likes_prompt_user', 'prompt_likes', ['prompt_id', 'user_id'],
+        unique=True, if_not_exists=True
+    )
+    op.create_index(
+        'ix_prompt_likes_user_prompt', 'prompt_likes', ['user_id', 'prompt_id'],
+        if_not_exists=True
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_prompt_likes_user_prompt', table_name='prompt_likes')
+    op.drop_index('ix_prompt_likes_prompt_user', table_name='prompt_likes')
+    op.drop_index('ix_tags_name_lower', table_name='tags')
+    op.drop_index('ix_prompt_tags_tag_id_prompt_id', table_name='prompt_tags')
+    op.drop_index('ix_prompts_user_id_created_at', table_name='prompts')
+    op.drop_index('ix_prompts_category_id_created_at', table_name='prompts')
+    op.drop_index('ix_prompts_created_at', table_name='prompts')
@@ -0,0 +1,53 @@
+"""Add the trigram side table for typo-tolerant search
+
+Revision ID: 8b41e6f0c2d3
+Revises: 3f2a9c1d7b10
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+import re
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8b41e6f0c2d3'
+down_revision: Union[str, None] = '3f2a9c1d7b10'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+_WORD = re.compile(r"[^\W_]+")
+
+
+def trigrams(text: str) -> set:
+    """Frozen copy of app.core.search_index.trigrams as of this revision"""
+    result = set()
+    for word in _WORD.findall(text.lower()):
+        padded = f"  {word} "
+        result.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return result
+
+
+def upgrade() -> None:
+    prompt_trigrams = op.create_table(
+        'prompt_trigrams',
+        sa.Column('trigram', sa.String(length=3), nullable=False),
+        sa.Column('prompt_id', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['prompt_id'], ['prompts.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('trigram', 'prompt_id'),
+    )
+    op.create_index('ix_prompt_trigrams_prompt_id', 'prompt_trigrams', ['prompt_id'])
+
+    # Index existing prompts
+    conn = op.get_bind()
+    for prompt_id, title, content in conn.execute(sa.text("SELECT id, title, content FROM prompts")):
+        rows = [{'trigram': t, 'prompt_id': prompt_id} for t in trigrams(f"{title} {content}")]
+        if rows:
+            op.bulk_insert(prompt_trigrams, rows)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_prompt_trigrams_prompt_id', table_name='prompt_trigrams')
+    op.drop_table('prompt_trigrams')
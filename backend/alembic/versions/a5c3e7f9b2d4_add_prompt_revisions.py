@@ -0,0 +1,43 @@
+"""Add prompt revision history
+
+Revision ID: a5c3e7f9b2d4
+Revises: f2b8d4a6c1e7
+Create Date: 2026-10-19 22:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a5c3e7f9b2d4'
+down_revision: Union[str, None] = 'f2b8d4a6c1e7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Existing prompts get their first revision (a snapshot of the current
+    # version) when they are next edited
+    op.create_table(
+        'prompt_revisions',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('prompt_id', sa.Integer(), nullable=False),
+        sa.Column('number', sa.Integer(), nullable=False),
+        sa.Column('kind', sa.String(length=8), nullable=False),
+        sa.Column('title', sa.String(), nullable=False),
+        sa.Column('size', sa.Integer(), nullable=False),
+        sa.Column('data', sa.LargeBinary(), nullable=False),
+        sa.Column('user_id', sa.String(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(['prompt_id'], ['prompts.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_prompt_revisions_prompt_id_number', 'prompt_revisions', ['prompt_id', 'number'], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_prompt_revisions_prompt_id_number', table_name='prompt_revisions')
+    op.drop_table('prompt_revisions')
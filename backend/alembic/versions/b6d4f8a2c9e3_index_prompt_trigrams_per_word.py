@@ -0,0 +1,48 @@
+"""Index prompt trigrams per word
+
+Revision ID: b6d4f8a2c9e3
+Revises: a5c3e7f9b2d4
+Create Date: 2026-10-19 23:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b6d4f8a2c9e3'
+down_revision: Union[str, None] = 'a5c3e7f9b2d4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _recreate(per_word: bool) -> None:
+    # The table is rebuilt empty; backfill_search_index reindexes every prompt
+    # (with its full content, including cold-stored bodies) on the next startup
+    op.drop_index('ix_prompt_trigrams_prompt_id', table_name='prompt_trigrams')
+    op.drop_table('prompt_trigrams')
+    columns = [
+        sa.Column('trigram', sa.String(length=3), nullable=False),
+        sa.Column('prompt_id', sa.Integer(), nullable=False),
+    ]
+    key = ['trigram', 'prompt_id']
+    if per_word:
+        columns.append(sa.Column('word', sa.Integer(), nullable=False))
+        key.append('word')
+    op.create_table(
+        'prompt_trigrams',
+        *columns,
+        sa.ForeignKeyConstraint(['prompt_id'], ['prompts.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint(*key),
+    )
+    op.create_index('ix_prompt_trigrams_prompt_id', 'prompt_trigrams', ['prompt_id'])
+
+
+def upgrade() -> None:
+    _recreate(per_word=True)
+
+
+def downgrade() -> None:
+    _recreate(per_word=False)
@@ -0,0 +1,35 @@
+"""Add the FTS5 index used for search snippets and highlighting
+
+SQLite only; other databases serve search results without snippets.
+
+Revision ID: c7d9a2e4f815
+Revises: 8b41e6f0c2d3
+Create Date: 2026-10-19 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c7d9a2e4f815'
+down_revision: Union[str, None] = '8b41e6f0c2d3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    op.execute("CREATE VIRTUAL TABLE IF NOT EXISTS prompts_fts USING fts5(title, content)")
+    op.execute(
+        "INSERT INTO prompts_fts (rowid, title, content) "
+        "SELECT id, title, content FROM prompts WHERE id NOT IN (SELECT rowid FROM prompts_fts)"
+    )
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    op.execute("DROP TABLE IF EXISTS prompts_fts")
@@ -0,0 +1,53 @@
+"""Add the change log behind delta sync
+
+Revision ID: d4e1b7a9f302
+Revises: c7d9a2e4f815
+Create Date: 2026-10-19 16:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd4e1b7a9f302'
+down_revision: Union[str, None] = 'c7d9a2e4f815'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'change_log',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('entity', sa.String(length=16), nullable=False),
+        sa.Column('entity_id', sa.Integer(), nullable=False),
+        sa.Column('action', sa.String(length=8), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        sqlite_autoincrement=True,
+    )
+    op.create_index('ix_change_log_entity_entity_id', 'change_log', ['entity', 'entity_id'])
+    op.create_table(
+        'change_log_compactions',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('horizon', sa.Integer(), nullable=False),
+        sa.Column('removed', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+    )
+
+    # Existing rows enter the log as upserts so a first sync downloads them
+    for entity, table in (('category', 'categories'), ('tag', 'tags'), ('prompt', 'prompts')):
+        op.execute(
+            f"INSERT INTO change_log (entity, entity_id, action) "
+            f"SELECT '{entity}', id, 'upsert' FROM {table} ORDER BY id"
+        )
+
+
+def downgrade() -> None:
+    op.drop_table('change_log_compactions')
+    op.drop_index('ix_change_log_entity_entity_id', table_name='change_log')
+    op.drop_table('change_log')
@@ -0,0 +1,89 @@
+"""Add the prompt_view read model
+
+Revision ID: e9a3c5d1f7b4
+Revises: d4e1b7a9f302
+Create Date: 2026-10-19 18:00:00.000000
+
+"""
+import json
+from collections import defaultdict
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e9a3c5d1f7b4'
+down_revision: Union[str, None] = 'd4e1b7a9f302'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _timestamp(value):
+    # SQLite hands back timestamps as text
+    return value.isoformat() if hasattr(value, 'isoformat') else value
+
+
+def upgrade() -> None:
+    op.create_table(
+        'prompt_view',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('title', sa.String(), nullable=False),
+        sa.Column('content', sa.String(), nullable=False),
+        sa.Column('category_id', sa.Integer(), nullable=True),
+        sa.Column('user_id', sa.String(), nullable=True),
+        sa.Column('like_count', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('category', sa.JSON(), nullable=True),
+        sa.Column('tags', sa.JSON(), nullable=False),
+        sa.ForeignKeyConstraint(['id'], ['prompts.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_prompt_view_created_at', 'prompt_view', ['created_at'])
+    op.create_index('ix_prompt_view_category_id_created_at', 'prompt_view', ['category_id', 'created_at'])
+    op.create_index('ix_prompt_view_user_id_created_at', 'prompt_view', ['user_id', 'created_at'])
+
+    # Build rows for existing prompts
+    conn = op.get_bind()
+    categories = {
+        row.id: {
+            'id': row.id, 'name': row.name, 'description': row.description,
+            'created_at': _timestamp(row.created_at),
+        }
+        for row in conn.execute(sa.text("SELECT id, name, description, created_at FROM categories"))
+    }
+    tags = defaultdict(list)
+    for row in conn.execute(sa.text(
+        "SELECT prompt_tags.prompt_id, tags.id, tags.name, tags.created_at "
+        "FROM prompt_tags JOIN tags ON tags.id = prompt_tags.tag_id"
+    )):
+        tags[row.prompt_id].append({'id': row.id, 'name': row.name, 'created_at': _timestamp(row.created_at)})
+    rows = [
+        {
+            'id': row.id, 'title': row.title, 'content': row.content, 'category_id': row.category_id,
+            'user_id': row.user_id, 'like_count': row.like_count or 0,
+            'created_at': row.created_at, 'updated_at': row.updated_at,
+            'category': categories.get(row.category_id), 'tags': tags[row.id],
+        }
+        for row in conn.execute(sa.text(
+            "SELECT id, title, content, category_id, user_id, like_count, created_at, updated_at FROM prompts"
+        ))
+    ]
+    if rows:
+        conn.execute(
+            sa.text(
+                "INSERT INTO prompt_view (id, title, content, category_id, user_id, like_count, "
+                "created_at, updated_at, category, tags) VALUES (:id, :title, :content, :category_id, "
+                ":user_id, :like_count, :created_at, :updated_at, :category, :tags)"
+            ),
+            [{**row, 'category': json.dumps(row['category']), 'tags': json.dumps(row['tags'])} for row in rows],
+        )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_prompt_view_user_id_created_at', table_name='prompt_view')
+    op.drop_index('ix_prompt_view_category_id_created_at', table_name='prompt_view')
+    op.drop_index('ix_prompt_view_created_at', table_name='prompt_view')
+    op.drop_table('prompt_view')
@@ -0,0 +1,85 @@
+"""Move large prompt content to compressed cold storage
+
+Revision ID: f2b8d4a6c1e7
+Revises: e9a3c5d1f7b4
+Create Date: 2026-10-19 20:00:00.000000
+
+"""
+import os
+import zlib
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f2b8d4a6c1e7'
+down_revision: Union[str, None] = 'e9a3c5d1f7b4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Frozen copy of app.core.cold_storage as of this revision, so later changes
+# there don't change what this migration does
+PROMPT_COLD_STORAGE_BYTES = int(os.getenv("PROMPT_COLD_STORAGE_BYTES", "16384"))
+PROMPT_PREVIEW_CHARS = int(os.getenv("PROMPT_PREVIEW_CHARS", "500"))
+PROMPT_COMPRESSION_LEVEL = int(os.getenv("PROMPT_COMPRESSION_LEVEL", "6"))
+CODEC = 'zlib'
+_DECOMPRESSORS = {'zlib': zlib.decompress}
+
+
+def upgrade() -> None:
+    op.add_column('prompts', sa.Column('content_compressed', sa.Boolean(), server_default=sa.false(), nullable=False))
+    op.add_column('prompt_view', sa.Column('content_compressed', sa.Boolean(), server_default=sa.false(), nullable=False))
+    op.create_table(
+        'prompt_bodies',
+        sa.Column('prompt_id', sa.Integer(), nullable=False),
+        sa.Column('codec', sa.String(length=8), nullable=False),
+        sa.Column('size', sa.Integer(), nullable=False),
+        sa.Column('data', sa.LargeBinary(), nullable=False),
+        sa.ForeignKeyConstraint(['prompt_id'], ['prompts.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('prompt_id'),
+    )
+
+    # Compress existing large content, leaving a preview inline
+    if not PROMPT_COLD_STORAGE_BYTES:
+        return
+    conn = op.get_bind()
+    # A character is at most four UTF-8 bytes, so length() (characters on
+    # both SQLite and PostgreSQL) narrows the candidates; the byte size is
+    # checked here
+    candidates = conn.execute(
+        sa.text("SELECT id, content FROM prompts WHERE length(content) > :chars"),
+        {'chars': PROMPT_COLD_STORAGE_BYTES // 4},
+    ).all()
+    for row in candidates:
+        raw = row.content.encode('utf-8')
+        if len(raw) <= PROMPT_COLD_STORAGE_BYTES:
+            continue
+        conn.execute(
+            sa.text("INSERT INTO prompt_bodies (prompt_id, codec, size, data) VALUES (:id, :codec, :size, :data)"),
+            {'id': row.id, 'codec': CODEC, 'size': len(raw), 'data': zlib.compress(raw, PROMPT_COMPRESSION_LEVEL)},
+        )
+        preview = {'id': row.id, 'content': row.content[:PROMPT_PREVIEW_CHARS], 'compressed': True}
+        conn.execute(
+            sa.text("UPDATE prompts SET content = :content, content_compressed = :compressed WHERE id = :id"), preview
+        )
+        conn.execute(
+            sa.text("UPDATE prompt_view SET content = :content, content_compressed = :compressed WHERE id = :id"),
+            preview,
+        )
+
+
+def downgrade() -> None:
+    # Put the full content back inline
+    conn = op.get_bind()
+    for row in conn.execute(sa.text("SELECT prompt_id, codec, data FROM prompt_bodies")).all():
+        content = {'id': row.prompt_id, 'content': _DECOMPRESSORS[row.codec](row.data).decode('utf-8')}
+        conn.execute(sa.text("UPDATE prompts SET content = :content WHERE id = :id"), content)
+        conn.execute(sa.text("UPDATE prompt_view SET content = :content WHERE id = :id"), content)
+
+    op.drop_table('prompt_bodies')
+    with op.batch_alter_table('prompt_view') as batch_op:
+        batch_op.drop_column('content_compressed')
+    with op.batch_alter_table('prompts') as batch_op:
+        batch_op.drop_column('content_compressed')
@@ -1,13 +1,64 @@
-from fastapi import APIRouter, HTTPException, Depends
-from pydantic import BaseModel
-from typing import List, Optional
+from fastapi import APIRouter, HTTPException, Depends, Response
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Any, Dict, List, Optional
+import re
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+import asyncio
+import json
 import os
-import google.generativeai as genai
+import random
+import time
+import uuid
+
+from app import models
+from app.database import get_db
+
+from app.core.ai_providers import AIProviderError, get_provider
+from app.core.cold_storage import full_content, prompt_texts
+from app.core.metrics import (
+    AI_QUEUE_WAIT,
+    AI_REQUEST_DURATION,
+    AI_REQUESTS_IN_FLIGHT,
+    AI_REQUESTS_WAITING,
+)
+from app.core.rate_limit import TokenBucket
+from app.core.single_flight import SingleFlight
+from app.core.sse import SSE_HEADERS, SSE_MEDIA_TYPE, format_sse
+from app.core.suggestion_cache import AI_CACHE_ENABLED, CACHE_MISS, cache_key, suggestion_cache
+from app.core.tag_suggester import tag_suggester
 
 router = APIRouter()
 
-# Configure the Google AI API key
-genai.configure(api_key=os.getenv("GOOGLE_AI_API_KEY"))
+# Maximum number of concurrent upstream calls per worker
+AI_MAX_CONCURRENCY = int(os.getenv("AI_MAX_CONCURRENCY", "4"))
+# Seconds allowed for a single upstream call
+AI_REQUEST_TIMEOUT = float(os.getenv("AI_REQUEST_TIMEOUT", "30"))
+# Seconds a request may wait for a free upstream slot
+AI_QUEUE_TIMEOUT = float(os.getenv("AI_QUEUE_TIMEOUT", "10"))
+# Provider rate limit shared by all calls from this worker (0 disables it)
+AI_RATE_LIMIT_PER_SECOND = float(os.getenv("AI_RATE_LIMIT_PER_SECOND", "5"))
+AI_RATE_LIMIT_BURST = float(os.getenv("AI_RATE_LIMIT_BURST", "10"))
+# Batch suggestions: prompts processed concurrently, size cap and retry policy
+AI_BATCH_CONCURRENCY = int(os.getenv("AI_BATCH_CONCURRENCY", "4"))
+AI_BATCH_MAX_SIZE = int(os.getenv("AI_BATCH_MAX_SIZE", "100"))
+AI_MAX_RETRIES = int(os.getenv("AI_MAX_RETRIES", "3"))
+AI_RETRY_BASE_DELAY = float(os.getenv("AI_RETRY_BASE_DELAY", "0.5"))
+# Finished background jobs kept for polling
+AI_JOBS_RETAINED = int(os.getenv("AI_JOBS_RETAINED", "100"))
+
+_provider_slots = asyncio.Semaphore(AI_MAX_CONCURRENCY)
+_provider_rate_limit = (
+    TokenBucket(AI_RATE_LIMIT_PER_SECOND, AI_RATE_LIMIT_BURST)
+    if AI_RATE_LIMIT_PER_SECOND > 0 else None
+)
+# Identical concurrent suggestion requests share one upstream call
+_suggestion_flights = SingleFlight()
+
+# X-Cache value for requests that joined an identical in-flight request
+CACHE_COALESCED = "COALESCED"
 
 class PromptSuggestionRequest(BaseModel):
     prompt: str
@@ -17,17 +68,39 @@ class PromptSuggestionResponse(BaseModel):
     suggestions: List[str]
     tags: List[str]
 
-@router.post("/suggestions", response_model=PromptSuggestionResponse)
-async def get_prompt_suggestions(request: PromptSuggestionRequest):
-    try:
-        # Initialize the model
-        model = genai.GenerativeModel('gemini-2.0-flash')
-        
-        # Create the prompt for the AI
-        prompt_text = f"""You are an expert prompt engineer. Please improve the following prompt and provide suggestions:
-        
-        Original Prompt: "{request.prompt}"
-        
+class TagSuggestionRequest(BaseModel):
+    text: str
+    tags: List[str] = Field(default_factory=list)
+    limit: int = Field(default=5, ge=1, le=50)
+
+class TagSuggestion(BaseModel):
+    name: str
+    score: float
+
+class TagSuggestionResponse(BaseModel):
+    tags: List[TagSuggestion]
+
+class BatchSuggestionRequest(BaseModel):
+    prompts: List[str] = Field(..., min_length=1, max_length=AI_BATCH_MAX_SIZE)
+
+class SuggestionJobRequest(BaseModel):
+    category_id: Optional[int] = None
+    prompt_ids: Optional[List[int]] = Field(default=None, max_length=10000)
+
+class SuggestionJobResponse(BaseModel):
+    id: str
+    status: str
+    total: int
+    completed: int
+    failed: int
+    results: List[Dict[str, Any]] = Field(default_factory=list)
+
+def build_suggestion_prompt(prompt: str) -> str:
+    """Instructions sent to the model for a prompt improvement request"""
+    return f"""You are an expert prompt engineer. Please improve the following prompt and provide suggestions:
+
+        Original Prompt: "{prompt}"
+
         Please respond in the following JSON format:
         {{
           "improved_prompt": "The improved version of the prompt",
@@ -37,33 +110,385 @@ async def get_prompt_suggestions(request: PromptSuggestionRequest):
           ],
           "tags": ["tag1", "tag2", "tag3"]
         }}"""
-        
-        # Generate content
-        response = model.generate_content(prompt_text)
-        
-        # Parse the response
-        try:
-            import json
-            # Extract JSON from the response text
-            response_text = response.text.strip()
-            if response_text.startswith('```json'):
-                response_text = response_text[7:-3]  # Remove markdown code block
-            
-            result = json.loads(response_text)
-            
-            return {
-                "improved_prompt": result.get("improved_prompt", request.prompt),
-                "suggestions": result.get("suggestions", []),
-                "tags": result.get("tags", [])
-            }
-        except (json.JSONDecodeError, AttributeError) as e:
-            raise HTTPException(
-                status_code=500,
-                detail=f"Failed to parse AI response: {str(e)}. Response: {response_text}"
-            )
-            
+
+def parse_suggestions(response_text: str, original_prompt: str) -> dict:
+    """Parse the model's JSON answer (optionally fenced in a markdown code block)"""
+    try:
+        # Extract JSON from the response text
+        response_text = response_text.strip()
+        if response_text.startswith('```json'):
+            response_text = response_text[7:-3]  # Remove markdown code block
+
+        result = json.loads(response_text)
+
+        return {
+            "improved_prompt": result.get("improved_prompt", original_prompt),
+            "suggestions": result.get("suggestions", []),
+            "tags": result.get("tags", [])
+        }
+    except (json.JSONDecodeError, AttributeError) as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to parse AI response: {str(e)}. Response: {response_text}"
+        )
+
+async def generate_text(prompt_text: str) -> str:
+    """Call the configured provider (AI_PROVIDER) without blocking the event loop"""
+    return await get_provider().generate(prompt_text)
+
+async def generate_text_stream(prompt_text: str):
+    """Stream the provider's answer as text chunks as they are generated"""
+    async for chunk in get_provider().stream(prompt_text):
+        yield chunk
+
+@asynccontextmanager
+async def provider_slot():
+    """
+    Hold one upstream call slot, under the rate limit and concurrency cap.
+    Waiting for a slot and the call itself are timed separately, so a saturated
+    provider shows up as queueing rather than as slow calls.
+    """
+    AI_REQUESTS_WAITING.inc()
+    queued_at = time.perf_counter()
+    try:
+        if _provider_rate_limit is not None:
+            await asyncio.wait_for(_provider_rate_limit.acquire(), AI_QUEUE_TIMEOUT)
+        await asyncio.wait_for(_provider_slots.acquire(), AI_QUEUE_TIMEOUT)
+    except asyncio.TimeoutError:
+        raise HTTPException(
+            status_code=503,
+            detail="AI service is busy, please try again shortly"
+        )
+    finally:
+        AI_REQUESTS_WAITING.dec()
+        AI_QUEUE_WAIT.observe(time.perf_counter() - queued_at)
+
+    AI_REQUESTS_IN_FLIGHT.inc()
+    start = time.perf_counter()
+    outcome = "error"
+    try:
+        yield
+        outcome = "success"
+    except asyncio.TimeoutError:
+        outcome = "timeout"
+        raise HTTPException(
+            status_code=504,
+            detail="AI service timed out"
+        )
+    except AIProviderError as e:
+        raise HTTPException(
+            status_code=502,
+            detail=f"AI service failed: {str(e)}"
+        )
+    finally:
+        _provider_slots.release()
+        AI_REQUESTS_IN_FLIGHT.dec()
+        AI_REQUEST_DURATION.labels(model=get_provider().model, outcome=outcome).observe(
+            time.perf_counter() - start
+        )
+
+async def call_provider(prompt_text: str) -> str:
+    """Run an upstream call under the rate limit, concurrency cap and timeout"""
+    async with provider_slot():
+        return await asyncio.wait_for(generate_text(prompt_text), AI_REQUEST_TIMEOUT)
+
+async def stream_provider(prompt_text: str):
+    """Like call_provider, but yields text chunks as the provider produces them"""
+    async with provider_slot():
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + AI_REQUEST_TIMEOUT
+        chunks = generate_text_stream(prompt_text).__aiter__()
+        while True:
+            try:
+                chunk = await asyncio.wait_for(chunks.__anext__(), deadline - loop.time())
+            except StopAsyncIteration:
+                break
+            yield chunk
+
+async def fetch_suggestions(prompt: str, key: str) -> dict:
+    """Ask the provider for suggestions and store the parsed result in the cache"""
+    response_text = await call_provider(build_suggestion_prompt(prompt))
+    result = parse_suggestions(response_text, prompt)
+    if AI_CACHE_ENABLED:
+        await suggestion_cache.set(key, result)
+    return result
+
+async def get_suggestions(prompt: str) -> tuple:
+    """
+    Suggestions for a prompt from the cache, an identical in-flight request,
+    or a new upstream call. Returns (result, cache status).
+    """
+    key = cache_key(prompt, get_provider().model)
+    if AI_CACHE_ENABLED:
+        cached, cache_status = await suggestion_cache.get(key)
+        if cached is not None:
+            return cached, cache_status
+
+    result, shared = await _suggestion_flights.do(key, lambda: fetch_suggestions(prompt, key))
+    return result, CACHE_COALESCED if shared else CACHE_MISS
+
+@router.post("/suggestions", response_model=PromptSuggestionResponse)
+async def get_prompt_suggestions(request: PromptSuggestionRequest, response: Response):
+    """
+    Improve a prompt and suggest tags. Results are cached by normalized prompt
+    and model, and identical concurrent requests share one upstream call; the
+    X-Cache header reports HIT-MEMORY, HIT-DISK, COALESCED or MISS.
+    """
+    try:
+        result, cache_status = await get_suggestions(request.prompt)
+        response.headers["X-Cache"] = cache_status
+        return result
+
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=500,
             detail=f"Error getting AI suggestions: {str(e)}"
         )
+
+@router.post("/suggestions/tags", response_model=TagSuggestionResponse)
+async def suggest_tags(request: TagSuggestionRequest):
+    """
+    Suggest existing tags for a prompt's text without calling the AI provider.
+    Ranks tags by TF-IDF similarity to prompts already carrying them, boosted
+    by co-occurrence with the best matches and with `tags` already chosen.
+    """
+    suggestions = tag_suggester.suggest(request.text, request.tags, limit=request.limit)
+    return {"tags": [{"name": name, "score": score} for name, score in suggestions]}
+
+async def get_suggestions_with_retry(prompt: str) -> dict:
+    """get_suggestions with exponential backoff (and jitter) on transient failures"""
+    for attempt in range(AI_MAX_RETRIES + 1):
+        try:
+            result, _ = await get_suggestions(prompt)
+            return result
+        except HTTPException as e:
+            # Client errors and unparseable answers won't improve on retry
+            if e.status_code not in (502, 503, 504) or attempt == AI_MAX_RETRIES:
+                raise
+        except Exception:
+            if attempt == AI_MAX_RETRIES:
+                raise
+        await asyncio.sleep(AI_RETRY_BASE_DELAY * (2 ** attempt) * (0.5 + random.random()))
+
+async def iter_batch_suggestions(items: List[tuple]):
+    """
+    Fan out suggestions for (key, prompt) items with at most AI_BATCH_CONCURRENCY
+    in progress, yielding one result dict per item as soon as it completes.
+    """
+    slots = asyncio.Semaphore(AI_BATCH_CONCURRENCY)
+
+    async def run(key, prompt):
+        async with slots:
+            try:
+                return {"key": key, "status": "ok", "result": await get_suggestions_with_retry(prompt)}
+            except HTTPException as e:
+                return {"key": key, "status": "error", "error": str(e.detail)}
+            except Exception as e:
+                return {"key": key, "status": "error", "error": str(e)}
+
+    tasks = [asyncio.ensure_future(run(key, prompt)) for key, prompt in items]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        # Stop outstanding work if the consumer goes away (e.g. client disconnect)
+        for task in tasks:
+            task.cancel()
+
+@router.post("/suggestions/batch")
+async def get_batch_suggestions(request: BatchSuggestionRequest):
+    """
+    Suggestions for several prompts, streamed as newline-delimited JSON in
+    completion order. Each line has the prompt's `index` in the request and
+    either a `result` or an `error`.
+    """
+    async def stream():
+        async for item in iter_batch_suggestions(list(enumerate(request.prompts))):
+            item["index"] = item.pop("key")
+            yield json.dumps(item) + "\n"
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+class SuggestionJob:
+    """Background suggestion run over stored prompts"""
+
+    def __init__(self, prompts: List[tuple]):
+        self.id = uuid.uuid4().hex
+        self.prompts = prompts
+        self.status = "pending"
+        self.results: List[Dict[str, Any]] = []
+        self.task: Optional[asyncio.Task] = None
+
+    async def run(self) -> None:
+        self.status = "running"
+        try:
+            async for item in iter_batch_suggestions(self.prompts):
+                item["prompt_id"] = item.pop("key")
+                self.results.append(item)
+            self.status = "completed"
+        except asyncio.CancelledError:
+            self.status = "cancelled"
+            raise
+        except Exception:
+            self.status = "failed"
+
+    def to_dict(self, offset: int = 0) -> dict:
+        return {
+            "id": self.id,
+            "status": self.status,
+            "total": len(self.prompts),
+            "completed": sum(1 for r in self.results if r["status"] == "ok"),
+            "failed": sum(1 for r in self.results if r["status"] == "error"),
+            "results": self.results[offset:],
+        }
+
+_jobs: "OrderedDict[str, SuggestionJob]" = OrderedDict()
+
+@router.post("/suggestions/jobs", response_model=SuggestionJobResponse, status_code=202)
+async def create_suggestion_job(request: SuggestionJobRequest, db: AsyncSession = Depends(get_db)):
+    """
+    Start a background suggestion run over a category or a set of prompt IDs.
+    Poll GET /suggestions/jobs/{job_id} for progress and results.
+    """
+    if (request.category_id is None) == (request.prompt_ids is None):
+        raise HTTPException(status_code=400, detail="Provide either category_id or prompt_ids")
+
+    # Full content, including prompts whose content is in cold storage
+    stmt = prompt_texts().order_by(models.Prompt.id)
+    if request.category_id is not None:
+        stmt = stmt.where(models.Prompt.category_id == request.category_id)
+    else:
+        stmt = stmt.where(models.Prompt.id.in_(request.prompt_ids))
+    # Rows are read here; the job itself only gets plain (id, content) pairs
+    prompts = [(row.id, full_content(row)) for row in (await db.execute(stmt)).all()]
+    if not prompts:
+        raise HTTPException(status_code=404, detail="No prompts found")
+
+    job = SuggestionJob(prompts)
+    _jobs[job.id] = job
+    # Forget the oldest finished jobs
+    while len(_jobs) > AI_JOBS_RETAINED:
+        oldest_id, oldest = next(iter(_jobs.items()))
+        if oldest.status in ("pending", "running"):
+            break
+        del _jobs[oldest_id]
+    job.task = asyncio.create_task(job.run())
+    return job.to_dict()
+
+@router.get("/suggestions/jobs/{job_id}", response_model=SuggestionJobResponse)
+async def get_suggestion_job(job_id: str, offset: int = 0):
+    """Progress of a suggestion job; `offset` skips results already fetched"""
+    job = _jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_dict(offset=offset)
+
+@router.delete("/suggestions/jobs/{job_id}", response_model=SuggestionJobResponse)
+async def cancel_suggestion_job(job_id: str):
+    """Cancel a running suggestion job"""
+    job = _jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if job.task is not None and not job.task.done():
+        job.task.cancel()
+        try:
+            await job.task
+        except asyncio.CancelledError:
+            pass
+    return job.to_dict()
+
+class JsonStringFieldStreamer:
+    """
+    Incrementally decodes one string field (e.g. "improved_prompt") out of a
+    JSON document that arrives in chunks, so its text can be forwarded before
+    the document is complete.
+    """
+
+    _ESCAPES = {'"': '"', '\\': '\\', '/': '/', 'b': '\b', 'f': '\f', 'n': '\n', 'r': '\r', 't': '\t'}
+
+    def __init__(self, field: str):
+        self._start = re.compile(r'"' + re.escape(field) + r'"\s*:\s*"')
+        self._buffer = ""
+        self._pos: Optional[int] = None
+        self.done = False
+
+    def feed(self, chunk: str) -> str:
+        """Add a chunk; returns newly decoded characters of the field"""
+        self._buffer += chunk
+        if self.done:
+            return ""
+        if self._pos is None:
+            match = self._start.search(self._buffer)
+            if match is None:
+                return ""
+            self._pos = match.end()
+
+        out = []
+        buffer, pos = self._buffer, self._pos
+        while pos < len(buffer):
+            char = buffer[pos]
+            if char == '"':
+                self.done = True
+                pos += 1
+                break
+            if char != '\\':
+                out.append(char)
+                pos += 1
+                continue
+            # Escape sequence; wait for more input if it is cut off
+            if pos + 1 >= len(buffer):
+                break
+            code = buffer[pos + 1]
+            if code == 'u':
+                if pos + 6 > len(buffer):
+                    break
+                out.append(chr(int(buffer[pos + 2:pos + 6], 16)))
+                pos += 6
+            else:
+                out.append(self._ESCAPES.get(code, code))
+                pos += 2
+        self._pos = pos
+        return "".join(out)
+
+    @property
+    def text(self) -> str:
+        """Everything fed so far"""
+        return self._buffer
+
+@router.post("/suggestions/stream")
+async def stream_prompt_suggestions(request: PromptSuggestionRequest):
+    """
+    Stream suggestions as Server-Sent Events: `token` events carry the improved
+    prompt's text as the model generates it, then a single `suggestions` event
+    carries the parsed result (improved_prompt, suggestions, tags). Failures
+    are reported as an `error` event.
+    """
+    key = cache_key(request.prompt, get_provider().model)
+
+    async def events():
+        try:
+            if AI_CACHE_ENABLED:
+                cached, _ = await suggestion_cache.get(key)
+                if cached is not None:
+                    yield format_sse("token", {"text": cached["improved_prompt"]})
+                    yield format_sse("suggestions", cached)
+                    return
+
+            streamer = JsonStringFieldStreamer("improved_prompt")
+            async for chunk in stream_provider(build_suggestion_prompt(request.prompt)):
+                delta = streamer.feed(chunk)
+                if delta:
+                    yield format_sse("token", {"text": delta})
+
+            result = parse_suggestions(streamer.text, request.prompt)
+            if AI_CACHE_ENABLED:
+                await suggestion_cache.set(key, result)
+            yield format_sse("suggestions", result)
+        except HTTPException as e:
+            yield format_sse("error", {"status_code": e.status_code, "detail": e.detail})
+        except Exception as e:
+            yield format_sse("error", {"status_code": 500, "detail": f"Error getting AI suggestions: {str(e)}"})
+
+    return StreamingResponse(events(), media_type=SSE_MEDIA_TYPE, headers=SSE_HEADERS)
@@ -1,6 +1,6 @@
 from fastapi import APIRouter
 
-from app.api.endpoints import prompts, categories, tags
+from app.api.endpoints import prompts, categories, tags, events, sync
 from app.api.ai import router as ai_router
 
 api_router = APIRouter()
@@ -9,4 +9,6 @@ api_router = APIRouter()
 api_router.include_router(prompts.router, prefix="/prompts", tags=["prompts"])
 api_router.include_router(categories.router, prefix="/categories", tags=["categories"])
 api_router.include_router(tags.router, prefix="/tags", tags=["tags"])
+api_router.include_router(events.router, prefix="/events", tags=["events"])
+api_router.include_router(sync.router, prefix="/sync", tags=["sync"])
 api_router.include_router(ai_router, prefix="/ai", tags=["ai"])
@@ -0,0 +1,42 @@
+import asyncio
+from typing import Optional
+
+from fastapi import APIRouter, Request
+from fastapi.responses import StreamingResponse
+
+from app.core.events import EVENTS_HEARTBEAT_SECONDS, event_broadcaster
+from app.core.sse import SSE_HEADERS, SSE_MEDIA_TYPE, format_sse, format_sse_comment
+
+router = APIRouter()
+
+@router.get("/")
+async def stream_events(
+    request: Request,
+    entities: Optional[str] = None
+):
+    """
+    Change feed as Server-Sent Events, so clients can update listings
+    instead of polling. Events are named `<entity>.<action>`
+    (`prompt.created`, `prompt.updated`, `prompt.deleted`, `prompt.liked`,
+    `category.created`, `category.updated`, `tag.created`, `tag.deleted`)
+    and carry the entity's id. `entities` limits the feed, e.g.
+    `?entities=prompt,tag`. A client that falls behind receives a single
+    `resync` event in place of the events it missed and should refetch.
+    Heartbeat comments are sent while the feed is idle.
+    """
+    wanted = {e.strip() for e in entities.split(",") if e.strip()} if entities else None
+
+    async def events():
+        with event_broadcaster.subscribe(wanted) as subscription:
+            yield format_sse("ready", {"heartbeat_seconds": EVENTS_HEARTBEAT_SECONDS})
+            while True:
+                try:
+                    event = await asyncio.wait_for(subscription.queue.get(), EVENTS_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        break
+                    yield format_sse_comment("heartbeat")
+                    continue
+                yield format_sse(event["type"], event["data"])
+
+    return StreamingResponse(events(), media_type=SSE_MEDIA_TYPE, headers=SSE_HEADERS)
@@ -1,6 +1,6 @@
 from fastapi import APIRouter, Depends, HTTPException, Query, status, Request, Header
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List, Optional, Dict, Any, Set
+from typing import List, Optional, Dict, Any, Set, Union
 from sqlalchemy import update, select, func, and_
 from sqlalchemy.orm import selectinload
 
@@ -44,7 +44,7 @@ async def get_dashboard_stats(
         "prompts_by_category": prompts_by_category
     }
 
-@router.get("/", response_model=List[schemas.PromptResponse])
+@router.get("/", response_model=Union[List[schemas.PromptResponse], schemas.PromptListResponse])
 async def read_prompts(
     request: Request,
     skip: int = 0,
@@ -52,35 +52,45 @@ async def read_prompts(
     search: Optional[str] = None,
     category_id: Optional[int] = None,
     tag: Optional[str] = None,
+    facets: bool = False,
+    facet_tag_limit: int = Query(10, ge=1, le=100),
+    include_content: bool = True,
     db: AsyncSession = Depends(get_db)
 ):
     """
     Retrieve prompts with optional filtering and search.
     Includes like status for the current user if authenticated.
+    Search results carry `title_highlight` and a `snippet` of the content
+    around the matches; list views can pass `include_content=false` to leave
+    out the full content.
+    With `facets=true` the response is `{"items": [...], "facets": {...}}`,
+    adding the total match count and per-category and top tag counts.
     """
     try:
         # Get current user ID from the request (if authenticated)
         current_user_id = get_user_id_from_request(request)
         
-        # Get prompts with base filters and like status
+        # Get prompts with filters and like status
         prompts = await crud.get_prompts(
             db, 
             skip=skip, 
             limit=limit, 
             search=search,
-            user_id=current_user_id
+            user_id=current_user_id,
+            category_id=category_id,
+            tag=tag,
+            include_content=include_content
         )
         
-        # Apply additional filters
-        if category_id is not None:
-            prompts = [p for p in prompts if p.get('category_id') == category_id]
-        
-        if tag is not None:
-            tag_lower = tag.lower()
-            prompts = [p for p in prompts if any(
-                t.get('name', '').lower() == tag_lower 
-                for t in (p.get('tags') or [])
-            )]
+        if facets:
+            facet_counts = await crud.get_prompt_facets(
+                db,
+                search=search,
+                category_id=category_id,
+                tag=tag,
+                tag_limit=facet_tag_limit
+            )
+            return {"items": prompts, "facets": facet_counts}
         
         return prompts
         
@@ -136,6 +146,28 @@ async def create_prompt(
         await db.rollback()
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.get("/recommended", response_model=List[schemas.RecommendedPromptResponse])
+async def read_recommended_prompts(
+    request: Request,
+    limit: int = Query(10, ge=1, le=50),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    "For you" recommendations: prompts liked by the same people as the
+    prompts the current user liked (item-item collaborative filtering over
+    all likes, retrained in the background). Users without likes get the
+    most liked prompts.
+    """
+    current_user_id = get_user_id_from_request(request)
+    
+    if not current_user_id:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Authentication required"
+        )
+    
+    return await crud.get_recommended_prompts(db, user_id=current_user_id, limit=limit)
+
 @router.get("/{prompt_id}", response_model=schemas.PromptResponse)
 async def read_prompt(
     prompt_id: int, 
@@ -186,6 +218,51 @@ async def read_prompt(
             detail="An error occurred while retrieving the prompt"
         )
 
+@router.get("/{prompt_id}/related", response_model=List[schemas.RelatedPromptResponse])
+async def read_related_prompts(
+    prompt_id: int,
+    limit: int = Query(5, ge=1, le=50),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Get the prompts most similar to a prompt, by cosine similarity of locally
+    computed TF-IDF vectors (no external service).
+    """
+    related = await crud.get_related_prompts(db, prompt_id=prompt_id, limit=limit)
+    if related is None:
+        raise HTTPException(status_code=404, detail="Prompt not found")
+    return related
+
+@router.get("/{prompt_id}/revisions", response_model=List[schemas.PromptRevisionSummary])
+async def read_prompt_revisions(
+    prompt_id: int,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(50, ge=1, le=200),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Get a prompt's edit history, newest first. Each title or content change
+    is a revision; fetch one by number for its content.
+    """
+    revisions = await crud.get_prompt_revisions(db, prompt_id=prompt_id, skip=skip, limit=limit)
+    if revisions is None:
+        raise HTTPException(status_code=404, detail="Prompt not found")
+    return revisions
+
+@router.get("/{prompt_id}/revisions/{number}", response_model=schemas.PromptRevisionResponse)
+async def read_prompt_revision(
+    prompt_id: int,
+    number: int,
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Get a prompt's title and content as of a revision.
+    """
+    revision = await crud.get_prompt_revision(db, prompt_id=prompt_id, number=number)
+    if revision is None:
+        raise HTTPException(status_code=404, detail="Revision not found")
+    return revision
+
 @router.put("/{prompt_id}", response_model=schemas.PromptResponse)
 async def update_prompt(
     prompt_id: int,
@@ -0,0 +1,26 @@
+from fastapi import APIRouter, Depends, Query, Request
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import crud, schemas
+from app.core import get_user_id_from_request
+from app.database import get_db
+
+router = APIRouter()
+
+@router.get("/", response_model=schemas.SyncResponse)
+async def sync_changes(
+    request: Request,
+    since: int = Query(0, ge=0),
+    limit: int = Query(500, ge=1, le=5000),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Delta sync for offline clients. Start with `since=0` to download the
+    library, store the returned `cursor` and pass it as `since` next time to
+    get only what changed: current versions of created or updated prompts,
+    categories and tags, and the ids of deleted ones. Keep calling while
+    `has_more` is true. If `reset` is true the cursor was too old to be
+    caught up and the response starts over from the beginning.
+    """
+    current_user_id = get_user_id_from_request(request)
+    return await crud.get_changes(db, since=since, limit=limit, user_id=current_user_id)
@@ -1,8 +1,10 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
 
 from app import crud, schemas
+from app.core.tag_graph import METRICS
+from app.core.tag_index import tag_index
 from app.database import get_db
 
 router = APIRouter()
@@ -19,6 +21,17 @@ async def read_tags(
     tags = await crud.get_tags(db, skip=skip, limit=limit)
     return tags
 
+@router.get("/suggest", response_model=List[schemas.TagSuggestionResponse])
+async def suggest_tags(
+    prefix: str = "",
+    limit: int = Query(10, ge=1, le=50)
+):
+    """
+    Autocomplete tag names: the most used tags starting with `prefix`
+    (case-insensitive), served from an in-memory index.
+    """
+    return tag_index.suggest(prefix, limit=limit)
+
 @router.get("/{tag_id}", response_model=schemas.TagResponse)
 async def read_tag(
     tag_id: int, 
@@ -32,6 +45,27 @@ async def read_tag(
         raise HTTPException(status_code=404, detail="Tag not found")
     return db_tag
 
+@router.get("/{tag_id}/related", response_model=List[schemas.RelatedTagResponse])
+async def read_related_tags(
+    tag_id: int,
+    limit: int = Query(10, ge=1, le=50),
+    metric: str = Query("jaccard", pattern=f"^({'|'.join(METRICS)})$"),
+    min_count: int = Query(1, ge=1),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Tags most often used together with a tag, ranked by Jaccard similarity
+    (shared prompts / prompts with either tag) or PMI, from an in-memory
+    co-occurrence matrix. `min_count` drops pairs sharing fewer prompts,
+    which keeps PMI from favouring one-off combinations of rare tags.
+    """
+    related = await crud.get_related_tags(
+        db, tag_id=tag_id, limit=limit, metric=metric, min_count=min_count
+    )
+    if related is None:
+        raise HTTPException(status_code=404, detail="Tag not found")
+    return related
+
 @router.delete("/{tag_id}", response_model=schemas.TagResponse)
 async def delete_tag(
     tag_id: int, 
@@ -1,10 +1,13 @@
 # This file makes the core directory a Python package
 # Import security utilities to make them easily accessible
 from .security import get_current_user_id, get_user_id_from_request, security
+from .write_coordinator import WriteCoordinator, write_coordinator
 
 # This allows importing like: from app.core import get_current_user_id
 __all__ = [
     'get_current_user_id',
     'get_user_id_from_request',
-    'security'
+    'security',
+    'WriteCoordinator',
+    'write_coordinator'
 ]
@@ -0,0 +1,161 @@
+import asyncio
+import hashlib
+import json
+import os
+import random
+import re
+from abc import ABC, abstractmethod
+from typing import AsyncIterator, Optional
+
+# Which provider serves AI suggestions: "gemini" or "local"
+AI_PROVIDER = os.getenv("AI_PROVIDER", "gemini").lower()
+AI_MODEL_NAME = os.getenv("AI_MODEL_NAME", "gemini-2.0-flash")
+
+# Local provider behaviour, for offline load tests and benchmarks
+AI_LOCAL_LATENCY_MS = float(os.getenv("AI_LOCAL_LATENCY_MS", "800"))
+AI_LOCAL_JITTER_MS = float(os.getenv("AI_LOCAL_JITTER_MS", "200"))
+AI_LOCAL_FAILURE_RATE = float(os.getenv("AI_LOCAL_FAILURE_RATE", "0"))
+AI_LOCAL_STREAM_CHUNKS = int(os.getenv("AI_LOCAL_STREAM_CHUNKS", "20"))
+AI_LOCAL_SEED = int(os.getenv("AI_LOCAL_SEED", "42"))
+
+
+class AIProviderError(Exception):
+    """The upstream provider failed to produce an answer"""
+
+
+class AIProvider(ABC):
+    """Interface for text generation backends used by the suggestions API"""
+
+    name = "base"
+
+    def __init__(self, model: str):
+        self.model = model
+
+    @abstractmethod
+    async def generate(self, prompt_text: str) -> str:
+        """Return the complete answer for a prompt"""
+
+    @abstractmethod
+    def stream(self, prompt_text: str) -> AsyncIterator[str]:
+        """Yield the answer as text chunks as they are produced (an async generator)"""
+
+
+class GeminiProvider(AIProvider):
+    """Google Gemini through google.generativeai's async API"""
+
+    name = "gemini"
+
+    def __init__(self, model: str = AI_MODEL_NAME, api_key: Optional[str] = None):
+        super().__init__(model)
+        self._api_key = api_key or os.getenv("GOOGLE_AI_API_KEY")
+        self._client = None
+
+    def _get_client(self):
+        # google.generativeai pulls in gRPC and protobuf; load it on the first call
+        # rather than at startup
+        if self._client is None:
+            import google.generativeai as genai
+
+            genai.configure(api_key=self._api_key)
+            self._client = genai.GenerativeModel(self.model)
+        return self._client
+
+    async def generate(self, prompt_text: str) -> str:
+        response = await self._get_client().generate_content_async(prompt_text)
+        return response.text
+
+    async def stream(self, prompt_text: str) -> AsyncIterator[str]:
+        response = await self._get_client().generate_content_async(prompt_text, stream=True)
+        async for chunk in response:
+            if chunk.text:
+                yield chunk.text
+
+
+class LocalProvider(AIProvider):
+    """
+    Deterministic in-process provider: answers with canned JSON derived from
+    the prompt after a simulated latency, and fails a configurable fraction of
+    calls. Latencies and failures come from a seeded RNG, so a benchmark run
+    with the same seed and call order is reproducible.
+    """
+
+    name = "local"
+
+    def __init__(
+        self,
+        latency_ms: float = AI_LOCAL_LATENCY_MS,
+        jitter_ms: float = AI_LOCAL_JITTER_MS,
+        failure_rate: float = AI_LOCAL_FAILURE_RATE,
+        stream_chunks: int = AI_LOCAL_STREAM_CHUNKS,
+        seed: int = AI_LOCAL_SEED,
+    ):
+        super().__init__("local")
+        self.latency = latency_ms / 1000.0
+        self.jitter = jitter_ms / 1000.0
+        self.failure_rate = failure_rate
+        self.stream_chunks = max(1, stream_chunks)
+        self._random = random.Random(seed)
+
+    def _delay(self) -> float:
+        return max(0.0, self.latency + self._random.uniform(-self.jitter, self.jitter))
+
+    def _maybe_fail(self) -> None:
+        if self._random.random() < self.failure_rate:
+            raise AIProviderError("Simulated provider failure")
+
+    @staticmethod
+    def answer(prompt_text: str) -> str:
+        """Canned answer for a prompt; identical prompts get identical answers"""
+        match = re.search(r'Original Prompt: "(.*?)"\n', prompt_text, re.S)
+        original = match.group(1) if match else prompt_text
+        words = [w.lower() for w in re.findall(r"[A-Za-z]{4,}", original)]
+        digest = hashlib.sha256(original.encode("utf-8")).hexdigest()[:8]
+        return "```json\n" + json.dumps({
+            "improved_prompt": f"{original.strip()} Be specific about the audience, format and length.",
+            "suggestions": [
+                "State the intended audience",
+                "Describe the expected output format",
+                f"Reference id {digest}",
+            ],
+            "tags": sorted(set(words))[:3] or ["general"],
+        }) + "\n```"
+
+    async def generate(self, prompt_text: str) -> str:
+        delay = self._delay()
+        self._maybe_fail()
+        await asyncio.sleep(delay)
+        return self.answer(prompt_text)
+
+    async def stream(self, prompt_text: str) -> AsyncIterator[str]:
+        delay = self._delay()
+        self._maybe_fail()
+        text = self.answer(prompt_text)
+        size = max(1, -(-len(text) // self.stream_chunks))
+        for i in range(0, len(text), size):
+            await asyncio.sleep(delay / self.stream_chunks)
+            yield text[i:i + size]
+
+
+_providers = {
+    GeminiProvider.name: GeminiProvider,
+    LocalProvider.name: LocalProvider,
+}
+_provider: Optional[AIProvider] = None
+
+
+def get_provider() -> AIProvider:
+    """The configured provider (AI_PROVIDER), created on first use"""
+    global _provider
+    if _provider is None:
+        try:
+            provider_class = _providers[AI_PROVIDER]
+        except KeyError:
+            raise ValueError(f"Unknown AI_PROVIDER {AI_PROVIDER!r}; expected one of {sorted(_providers)}")
+        _provider = provider_class()
+    return _provider
+
+
+def set_provider(provider: Optional[AIProvider]) -> None:
+    """Replace the active provider (None resets to the configured one)"""
+    global _provider
+    _provider = provider
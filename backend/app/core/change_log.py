@@ -0,0 +1,135 @@
+import asyncio
+import logging
+import os
+from datetime import datetime, timedelta
+from typing import Iterable, Optional
+
+from sqlalchemy import delete, func, insert, literal, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import models
+
+logger = logging.getLogger(__name__)
+
+# Days a delete stays in the change log; clients that sync less often than this get a full resync
+SYNC_TOMBSTONE_RETENTION_DAYS = float(os.getenv("SYNC_TOMBSTONE_RETENTION_DAYS", "30"))
+# Seconds between compactions (0 disables the background task)
+SYNC_COMPACT_SECONDS = float(os.getenv("SYNC_COMPACT_SECONDS", "3600"))
+# Seconds a change log entry must age before GET /api/sync returns it. With
+# concurrent writers (PostgreSQL) ids are allocated before commit, so an entry
+# can commit behind a cursor a client already holds; the window gives such
+# transactions time to commit. SQLite's single writer commits ids in order.
+SYNC_SETTLE_SECONDS = float(os.getenv("SYNC_SETTLE_SECONDS", "5"))
+
+UPSERT = "upsert"
+DELETE = "delete"
+
+# Entity name in the log -> model
+ENTITIES = {
+    "prompt": models.Prompt,
+    "category": models.Category,
+    "tag": models.Tag,
+}
+
+
+async def record_change(db: AsyncSession, entity: str, entity_ids: Iterable[int], action: str = UPSERT) -> None:
+    """
+    Append changes to the log in the caller's transaction, so an entry is
+    committed, or rolled back, together with the change it describes
+    """
+    rows = [{"entity": entity, "entity_id": entity_id, "action": action} for entity_id in entity_ids]
+    if rows:
+        await db.execute(insert(models.ChangeLog), rows)
+
+
+async def sync_horizon(db: AsyncSession) -> int:
+    """Highest cursor whose tombstones have been purged; older cursors need a full resync"""
+    return (await db.execute(select(func.max(models.ChangeLogCompaction.horizon)))).scalar() or 0
+
+
+def settle_cutoff(db: AsyncSession) -> Optional[datetime]:
+    """Entries created at or after this may still be overtaken by a late commit; None if none can"""
+    if SYNC_SETTLE_SECONDS <= 0 or db.get_bind().dialect.name == "sqlite":
+        return None
+    return datetime.utcnow() - timedelta(seconds=SYNC_SETTLE_SECONDS)
+
+
+async def compact_change_log(session_factory, retention_days: float = SYNC_TOMBSTONE_RETENTION_DAYS) -> int:
+    """
+    Drop entries superseded by a newer entry for the same entity (a client
+    reading past any cursor still sees each entity's latest change), then
+    tombstones older than the retention period, recording the highest purged
+    cursor as the new sync horizon. Returns the number of entries removed.
+    """
+    log = models.ChangeLog
+    async with session_factory() as session:
+        latest = select(func.max(log.id)).group_by(log.entity, log.entity_id)
+        removed = (await session.execute(delete(log).where(log.id.not_in(latest)))).rowcount
+
+        cutoff = datetime.utcnow() - timedelta(days=retention_days)
+        horizon = (await session.execute(
+            select(func.max(log.id)).where(log.action == DELETE, log.created_at < cutoff)
+        )).scalar()
+        if horizon is not None:
+            purged = (await session.execute(
+                delete(log).where(log.action == DELETE, log.id <= horizon)
+            )).rowcount
+            session.add(models.ChangeLogCompaction(horizon=horizon, removed=purged))
+            removed += purged
+        await session.commit()
+    if removed:
+        logger.info("Compacted %d change log entries", removed)
+    return removed
+
+
+async def backfill_change_log(session_factory) -> int:
+    """Log an upsert for every entity without an entry (e.g. created before the log existed)"""
+    log = models.ChangeLog
+    added = 0
+    async with session_factory() as session:
+        for entity, model in ENTITIES.items():
+            missing = select(literal(entity), model.id, literal(UPSERT)).where(
+                model.id.not_in(select(log.entity_id).where(log.entity == entity))
+            )
+            result = await session.execute(
+                insert(log).from_select(["entity", "entity_id", "action"], missing)
+            )
+            added += result.rowcount
+        await session.commit()
+    if added:
+        logger.info("Added %d entities to the change log", added)
+    return added
+
+
+class ChangeLogCompactor:
+    """Runs compact_change_log periodically in the background"""
+
+    def __init__(self):
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self, session_factory, interval: float = SYNC_COMPACT_SECONDS) -> None:
+        if interval > 0 and self._task is None:
+            self._task = asyncio.create_task(self._compact_loop(session_factory, interval))
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _compact_loop(self, session_factory, interval: float) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await compact_change_log(session_factory)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Change log compaction failed")
+
+
+change_log_compactor = ChangeLogCompactor()
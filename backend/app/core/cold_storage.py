@@ -0,0 +1,81 @@
+import os
+import zlib
+from typing import Dict, Iterable, Tuple
+
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import models
+
+# Content larger than this many UTF-8 bytes is stored compressed in prompt_bodies (0 disables)
+PROMPT_COLD_STORAGE_BYTES = int(os.getenv("PROMPT_COLD_STORAGE_BYTES", "16384"))
+# Characters of a large prompt kept inline for listings and substring search
+PROMPT_PREVIEW_CHARS = int(os.getenv("PROMPT_PREVIEW_CHARS", "500"))
+PROMPT_COMPRESSION_LEVEL = int(os.getenv("PROMPT_COMPRESSION_LEVEL", "6"))
+
+# Codec written for new bodies; stored per row so others can be added without rewriting old ones
+CODEC = "zlib"
+_DECOMPRESSORS = {"zlib": zlib.decompress}
+
+
+def inline_content(content: str) -> Tuple[str, bool]:
+    """(value for prompts.content, whether the full text goes to cold storage)"""
+    if PROMPT_COLD_STORAGE_BYTES and len(content.encode("utf-8")) > PROMPT_COLD_STORAGE_BYTES:
+        return content[:PROMPT_PREVIEW_CHARS], True
+    return content, False
+
+
+def compress(content: str) -> bytes:
+    return zlib.compress(content.encode("utf-8"), PROMPT_COMPRESSION_LEVEL)
+
+
+def decompress(codec: str, data: bytes) -> str:
+    return _DECOMPRESSORS[codec](data).decode("utf-8")
+
+
+async def write_body(db: AsyncSession, prompt_id: int, content: str, replace: bool = False) -> None:
+    """Store a prompt's full content compressed, in the caller's transaction"""
+    values = {"codec": CODEC, "size": len(content.encode("utf-8")), "data": compress(content)}
+    if replace:
+        result = await db.execute(
+            update(models.PromptBody).where(models.PromptBody.prompt_id == prompt_id).values(values)
+        )
+        if result.rowcount:
+            return
+    await db.execute(insert(models.PromptBody).values(prompt_id=prompt_id, **values))
+
+
+async def delete_body(db: AsyncSession, prompt_id: int) -> None:
+    await db.execute(delete(models.PromptBody).where(models.PromptBody.prompt_id == prompt_id))
+
+
+async def load_contents(db: AsyncSession, prompt_ids: Iterable[int]) -> Dict[int, str]:
+    """{prompt_id: full content} for prompts in cold storage, in one query"""
+    prompt_ids = list(prompt_ids)
+    if not prompt_ids:
+        return {}
+    rows = await db.execute(
+        select(models.PromptBody.prompt_id, models.PromptBody.codec, models.PromptBody.data)
+        .where(models.PromptBody.prompt_id.in_(prompt_ids))
+    )
+    return {row.prompt_id: decompress(row.codec, row.data) for row in rows}
+
+
+async def load_content(db: AsyncSession, prompt_id: int) -> str:
+    return (await load_contents(db, [prompt_id]))[prompt_id]
+
+
+def prompt_texts():
+    """
+    SELECT of (id, title, content, codec, data) for readers that need every
+    prompt's full text (search backfill, vector and tag training); pass rows
+    to full_content()
+    """
+    return select(
+        models.Prompt.id, models.Prompt.title, models.Prompt.content,
+        models.PromptBody.codec, models.PromptBody.data,
+    ).outerjoin(models.PromptBody, models.PromptBody.prompt_id == models.Prompt.id)
+
+
+def full_content(row) -> str:
+    return decompress(row.codec, row.data) if row.data is not None else row.content
@@ -0,0 +1,200 @@
+import asyncio
+import json
+import logging
+import os
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Callable, Dict, Iterable, Iterator, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+# "local" delivers within this process; "redis" fans out across workers via pub/sub
+EVENTS_BACKEND = os.getenv("EVENTS_BACKEND", "local").lower()
+EVENTS_REDIS_URL = os.getenv("EVENTS_REDIS_URL", "redis://localhost:6379/0")
+EVENTS_REDIS_CHANNEL = os.getenv("EVENTS_REDIS_CHANNEL", "kuma:events")
+# Events buffered per connection before a slow client is told to resync
+EVENTS_QUEUE_SIZE = int(os.getenv("EVENTS_QUEUE_SIZE", "256"))
+# Seconds of silence before a heartbeat comment is sent (keeps proxies from closing the stream)
+EVENTS_HEARTBEAT_SECONDS = float(os.getenv("EVENTS_HEARTBEAT_SECONDS", "15"))
+
+# Sent in place of a backlog the client could not keep up with
+RESYNC = "resync"
+
+
+class EventBackend(ABC):
+    """Carries published events to the broadcaster of every worker"""
+
+    @abstractmethod
+    async def start(self, deliver: Callable[[dict], None]) -> None:
+        """Begin passing events published by any worker to `deliver`"""
+
+    @abstractmethod
+    def publish(self, event: dict) -> None:
+        """Send an event to every worker's broadcaster"""
+
+    async def stop(self) -> None:
+        pass
+
+
+class LocalBackend(EventBackend):
+    """Single-process stand-in: events go straight to this worker's subscribers"""
+
+    def __init__(self):
+        self._deliver: Optional[Callable[[dict], None]] = None
+
+    async def start(self, deliver: Callable[[dict], None]) -> None:
+        self._deliver = deliver
+
+    def publish(self, event: dict) -> None:
+        if self._deliver is not None:
+            self._deliver(event)
+
+
+class RedisBackend(EventBackend):
+    """Redis pub/sub: every worker publishes to and listens on one channel (needs the `redis` package)"""
+
+    def __init__(self, url: str = EVENTS_REDIS_URL, channel: str = EVENTS_REDIS_CHANNEL):
+        self.url = url
+        self.channel = channel
+        self._client = None
+        self._pubsub = None
+        self._listener: Optional[asyncio.Task] = None
+        self._pending: Set[asyncio.Task] = set()
+
+    async def start(self, deliver: Callable[[dict], None]) -> None:
+        import redis.asyncio as redis
+
+        self._client = redis.from_url(self.url)
+        self._pubsub = self._client.pubsub()
+        await self._pubsub.subscribe(self.channel)
+        self._listener = asyncio.create_task(self._listen(deliver))
+
+    def publish(self, event: dict) -> None:
+        task = asyncio.get_running_loop().create_task(
+            self._client.publish(self.channel, json.dumps(event, default=str))
+        )
+        self._pending.add(task)
+        task.add_done_callback(self._published)
+
+    def _published(self, task: asyncio.Task) -> None:
+        self._pending.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning("Failed to publish event: %s", task.exception())
+
+    async def _listen(self, deliver: Callable[[dict], None]) -> None:
+        while True:
+            try:
+                async for message in self._pubsub.listen():
+                    if message["type"] == "message":
+                        deliver(json.loads(message["data"]))
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Event listener failed; resubscribing")
+                await asyncio.sleep(1)
+
+    async def stop(self) -> None:
+        if self._pending:
+            await asyncio.gather(*self._pending, return_exceptions=True)
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+            self._listener = None
+        if self._pubsub is not None:
+            await self._pubsub.aclose()
+            await self._client.aclose()
+            self._pubsub = self._client = None
+
+
+_backends: Dict[str, Callable[[], EventBackend]] = {
+    "local": LocalBackend,
+    "redis": RedisBackend,
+}
+
+
+class Subscription:
+    """
+    One connected client: a bounded queue of events, optionally limited to
+    some entities ("prompt", "category", "tag"). When the client falls
+    behind and the queue fills, its backlog is dropped and replaced by a
+    single resync event, so a slow reader costs a refetch rather than
+    unbounded memory.
+    """
+
+    def __init__(self, entities: Optional[Set[str]] = None, maxsize: int = EVENTS_QUEUE_SIZE):
+        self.entities = entities
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize)
+        self.dropped = 0
+
+    def offer(self, event: dict) -> None:
+        if self.entities and event["type"].split(".", 1)[0] not in self.entities:
+            return
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            while not self.queue.empty():
+                self.queue.get_nowait()
+                self.dropped += 1
+            self.queue.put_nowait({"type": RESYNC, "data": {"dropped": self.dropped}})
+
+
+class EventBroadcaster:
+    """
+    In-process fan-out of change events from the CRUD write paths to the
+    connected SSE clients (GET /api/events). Publishing never waits on
+    clients: each subscription has its own bounded queue.
+    """
+
+    def __init__(self):
+        self._subscriptions: Set[Subscription] = set()
+        self._backend: Optional[EventBackend] = None
+
+    def __len__(self) -> int:
+        return len(self._subscriptions)
+
+    async def start(self) -> None:
+        if self._backend is not None:
+            return
+        try:
+            backend = _backends[EVENTS_BACKEND]()
+        except KeyError:
+            raise ValueError(f"Unknown EVENTS_BACKEND {EVENTS_BACKEND!r}; expected one of {sorted(_backends)}")
+        await backend.start(self._deliver)
+        self._backend = backend
+
+    async def stop(self) -> None:
+        if self._backend is not None:
+            await self._backend.stop()
+            self._backend = None
+
+    def publish(self, event_type: str, data: dict) -> None:
+        """Announce a committed change, e.g. publish("prompt.updated", {"id": 3})"""
+        event = {
+            "type": event_type,
+            "data": {**data, "at": datetime.now(timezone.utc).isoformat()},
+        }
+        if self._backend is None:
+            # Not started (e.g. scripts, tests without the app lifespan): local delivery only
+            self._deliver(event)
+        else:
+            self._backend.publish(event)
+
+    def _deliver(self, event: dict) -> None:
+        for subscription in list(self._subscriptions):
+            subscription.offer(event)
+
+    @contextmanager
+    def subscribe(self, entities: Optional[Iterable[str]] = None) -> Iterator[Subscription]:
+        subscription = Subscription(set(entities) if entities else None)
+        self._subscriptions.add(subscription)
+        try:
+            yield subscription
+        finally:
+            self._subscriptions.discard(subscription)
+
+
+event_broadcaster = EventBroadcaster()
@@ -0,0 +1,210 @@
+import time
+import weakref
+from contextvars import ContextVar
+from typing import Optional
+
+from fastapi import Response
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+)
+from prometheus_client.core import GaugeMetricFamily
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+# Request metrics; names and labels match the provisioned Grafana dashboard
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route template",
+    ["method", "route", "status_code"],
+)
+HTTP_REQUESTS_IN_PROGRESS = Gauge(
+    "http_requests_in_progress",
+    "HTTP requests currently being handled",
+    ["method"],
+)
+
+# Database metrics
+DB_STATEMENT_DURATION = Histogram(
+    "db_statement_duration_seconds",
+    "SQL statement execution time",
+    ["operation"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5),
+)
+DB_STATEMENTS_PER_REQUEST = Histogram(
+    "db_statements_per_request",
+    "Number of SQL statements issued while handling a request",
+    ["route"],
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55),
+)
+DB_TIME_PER_REQUEST = Histogram(
+    "db_time_per_request_seconds",
+    "Total SQL execution time while handling a request",
+    ["route"],
+)
+
+# Cache metrics (hit ratio = hits / (hits + misses))
+CACHE_REQUESTS = Counter(
+    "cache_requests_total",
+    "Cache lookups by cache and result",
+    ["cache", "result"],
+)
+
+# AI provider metrics
+AI_REQUEST_DURATION = Histogram(
+    "ai_request_duration_seconds",
+    "Latency of upstream AI provider calls",
+    ["model", "outcome"],
+    buckets=(0.1, 0.25, 0.5, 1.0, 2.0, 4.0, 8.0, 15.0, 30.0, 60.0),
+)
+AI_QUEUE_WAIT = Histogram(
+    "ai_queue_wait_seconds",
+    "Time spent waiting for a free upstream AI slot",
+    buckets=(0.001, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+)
+AI_REQUESTS_IN_FLIGHT = Gauge(
+    "ai_requests_in_flight",
+    "Upstream AI calls currently running",
+)
+AI_REQUESTS_WAITING = Gauge(
+    "ai_requests_waiting",
+    "Requests queued for an upstream AI slot",
+)
+
+UNMATCHED_ROUTE = "unmatched"
+
+
+class RequestDbStats:
+    """Statement count and time accumulated for the current request."""
+
+    __slots__ = ("statements", "duration")
+
+    def __init__(self):
+        self.statements = 0
+        self.duration = 0.0
+
+
+# Set by MetricsMiddleware for the lifetime of a request
+request_db_stats: ContextVar[Optional[RequestDbStats]] = ContextVar("request_db_stats", default=None)
+
+
+def record_cache(cache: str, hit: bool) -> None:
+    """Count a cache lookup for the hit-ratio metrics."""
+    CACHE_REQUESTS.labels(cache=cache, result="hit" if hit else "miss").inc()
+
+
+def instrument_engine(engine: AsyncEngine) -> None:
+    """
+    Time every statement run on the engine and attribute it to the current
+    request, and report its pool at scrape time. Instrumenting an engine
+    again is a no-op.
+    """
+    sync_engine = engine.sync_engine
+    if sync_engine in pool_collector.engines:
+        return
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        # Kept on the statement's execution context, so a statement that
+        # raises leaves nothing behind on the connection
+        context._metrics_query_start = time.perf_counter()
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - context._metrics_query_start
+        operation = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else "OTHER"
+        DB_STATEMENT_DURATION.labels(operation=operation).observe(elapsed)
+        stats = request_db_stats.get()
+        if stats is not None:
+            stats.statements += 1
+            stats.duration += elapsed
+
+    pool_collector.engines[sync_engine] = sync_engine.url.render_as_string(hide_password=True)
+
+
+class PoolCollector:
+    """
+    Reads connection pool utilization of the instrumented engines at scrape
+    time, so it costs nothing per request. Registered once; engines are held
+    weakly, so a disposed and discarded engine drops out of the metrics.
+    """
+
+    def __init__(self):
+        self.engines: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+
+    def collect(self):
+        metrics = {}
+        for sync_engine, label in list(self.engines.items()):
+            # Read the pool now: dispose() replaces it.
+            # Not every pool class tracks checkouts (e.g. StaticPool for in-memory SQLite)
+            for name, attr, doc in (
+                ("db_pool_size", "size", "Configured connection pool size"),
+                ("db_pool_checked_out", "checkedout", "Connections currently checked out"),
+                ("db_pool_overflow", "overflow", "Connections opened beyond the pool size"),
+                ("db_pool_checked_in", "checkedin", "Idle connections in the pool"),
+            ):
+                getter = getattr(sync_engine.pool, attr, None)
+                if getter is not None:
+                    if name not in metrics:
+                        metrics[name] = GaugeMetricFamily(name, doc, labels=["engine"])
+                    metrics[name].add_metric([label], getter())
+        yield from metrics.values()
+
+
+pool_collector = PoolCollector()
+REGISTRY.register(pool_collector)
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording latency, in-flight requests and per-request
+    database work, labelled by route template (e.g. /api/prompts/{prompt_id})
+    to keep label cardinality bounded.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] == "/metrics":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status_code = 500
+        stats = RequestDbStats()
+        token = request_db_stats.set(stats)
+        # The route template is only known once the router has matched it,
+        # so the in-flight gauge is labelled by method alone
+        in_progress = HTTP_REQUESTS_IN_PROGRESS.labels(method=method)
+        in_progress.inc()
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            in_progress.dec()
+            request_db_stats.reset(token)
+            route = scope.get("route")
+            route_path = getattr(route, "path", UNMATCHED_ROUTE)
+            HTTP_REQUEST_DURATION.labels(
+                method=method, route=route_path, status_code=str(status_code)
+            ).observe(elapsed)
+            DB_STATEMENTS_PER_REQUEST.labels(route=route_path).observe(stats.statements)
+            DB_TIME_PER_REQUEST.labels(route=route_path).observe(stats.duration)
+
+
+async def metrics_endpoint() -> Response:
+    """Expose all metrics in the Prometheus text format."""
+    return Response(generate_latest(REGISTRY), media_type=CONTENT_TYPE_LATEST)
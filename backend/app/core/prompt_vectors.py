@@ -0,0 +1,486 @@
+import asyncio
+import json
+import logging
+import math
+import os
+import shutil
+import tempfile
+import threading
+import zlib
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import DateTime, func, select
+
+try:
+    import fcntl
+except ImportError:  # Windows: the single-writer lock is not enforced
+    fcntl = None
+
+from app import models
+from app.core.cold_storage import full_content, prompt_texts
+from app.core.tag_suggester import tokenize
+
+logger = logging.getLogger(__name__)
+
+RELATED_PROMPTS_ENABLED = os.getenv("RELATED_PROMPTS_ENABLED", "true").lower() in ("1", "true", "yes")
+# Files are <path>.vectors (float32 rows), <path>.ids (prompt id per row),
+# <path>.clusters (partition per row), <path>.stamps (prompt updated_at per row),
+# <path>.df.npy, <path>.centroids.npy, <path>.meta.json and <path>.lock.
+# One process writes a given path; other workers keep a private copy.
+RELATED_VECTORS_PATH = os.getenv("RELATED_VECTORS_PATH", "./prompt_vectors")
+# Hashed feature dimensions; 256 float32s is 1 KiB per prompt (~500 MB for 500k prompts)
+RELATED_VECTOR_DIM = int(os.getenv("RELATED_VECTOR_DIM", "256"))
+# Below this many prompts every row is scored; above it only the nearest partitions
+RELATED_PARTITION_MIN_PROMPTS = int(os.getenv("RELATED_PARTITION_MIN_PROMPTS", "20000"))
+# Partitions scored per query when partitioned
+RELATED_PARTITION_PROBES = int(os.getenv("RELATED_PARTITION_PROBES", "8"))
+# Rows scored per matrix-vector product in a full scan, bounding temporary memory
+_CHUNK_ROWS = 65536
+# Rows sampled per partition to train the centroids
+_TRAIN_ROWS_PER_PARTITION = 40
+_EMPTY = -1
+# Row files and their item sizes (besides the vectors)
+_ROW_FILES = ((".ids", np.int64), (".clusters", np.int32), (".stamps", np.float64))
+
+# A prompt's last change, as stamped on its row
+_UPDATED = func.coalesce(models.Prompt.updated_at, models.Prompt.created_at, type_=DateTime(timezone=True))
+
+
+def _stamp(value: Optional[datetime]) -> float:
+    """A timestamp as stored per row; naive values are UTC (as written by the app)"""
+    if value is None:
+        return math.nan
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+def _database_identity(session_factory) -> Optional[str]:
+    bind = getattr(session_factory, "kw", {}).get("bind")
+    return bind.url.render_as_string(hide_password=True) if bind is not None else None
+
+
+def _features(text: str) -> Counter:
+    words = tokenize(text)
+    return Counter(words + [f"{a} {b}" for a, b in zip(words, words[1:])])
+
+
+class PromptVectors:
+    """
+    Related-prompt search over locally computed vectors.
+
+    Each prompt is a hashed TF-IDF vector: words and word pairs are hashed
+    into `dim` signed buckets, weighted by sublinear term frequency and the
+    inverse document frequency of the bucket, and L2-normalized. Rows live in
+    a memory-mapped float32 file, so the index survives restarts without
+    being recomputed and the OS pages it in on demand. Similarity is cosine
+    (a dot product, since rows are unit length), scored with batched
+    matrix-vector products and a partial sort for the top K.
+
+    Scoring every row is bound by memory bandwidth (~50 ms for 500k rows on
+    one core), so large indexes are split into ~sqrt(N) partitions by
+    spherical k-means, and a query scores only the rows of the
+    `probes` partitions nearest to it. This is approximate: a close neighbour
+    filed in a different partition can be missed.
+
+    Rows are written as prompts are created, updated and deleted; deleted
+    rows are zeroed and reused. IDF weights and partitions are those current
+    when a row was written; `rebuild` recomputes everything.
+
+    The files record the database they were built from and each row's
+    prompt `updated_at`: on startup `sync` rebuilds an index built against
+    another database and re-embeds rows whose prompt changed meanwhile.
+    Only one process may write the files (an exclusive lock file enforces
+    it); other workers build a private, temporary index instead. Each
+    worker's index reflects the writes it served itself plus the database
+    as of its startup.
+    """
+
+    def __init__(
+        self,
+        path: str = RELATED_VECTORS_PATH,
+        dim: int = RELATED_VECTOR_DIM,
+        partition_min_prompts: int = RELATED_PARTITION_MIN_PROMPTS,
+        probes: int = RELATED_PARTITION_PROBES,
+    ):
+        self.path = path
+        self.dim = dim
+        self.partition_min_prompts = partition_min_prompts
+        self.probes = probes
+        self._lock = threading.Lock()
+        self._vectors: Optional[np.memmap] = None
+        self._ids: Optional[np.memmap] = None
+        self._clusters: Optional[np.memmap] = None
+        self._stamps: Optional[np.memmap] = None
+        self._database: Optional[str] = None
+        # Set by load() and rebuild(); until then (e.g. RELATED_PROMPTS_ENABLED=false,
+        # so sync never ran) writes are ignored rather than creating files unlocked
+        self._loaded = False
+        self._lock_file = None
+        self._private_dir: Optional[str] = None
+        self._shared_path = path
+        self._rows: Dict[int, int] = {}
+        self._free: List[int] = []
+        self._size = 0  # rows in use, including freed ones below the high-water mark
+        self._df = np.zeros(dim, dtype=np.float64)
+        self._documents = 0
+        self._centroids: Optional[np.ndarray] = None
+        self._partitions: List[List[int]] = []
+
+    # Storage
+
+    def _open(self) -> None:
+        capacity = os.path.getsize(self.path + ".ids") // 8
+        self._vectors = np.memmap(self.path + ".vectors", dtype=np.float32, mode="r+", shape=(capacity, self.dim))
+        self._ids = np.memmap(self.path + ".ids", dtype=np.int64, mode="r+", shape=(capacity,))
+        self._clusters = np.memmap(self.path + ".clusters", dtype=np.int32, mode="r+", shape=(capacity,))
+        self._stamps = np.memmap(self.path + ".stamps", dtype=np.float64, mode="r+", shape=(capacity,))
+
+    def _flush_rows(self) -> None:
+        for rows in (self._vectors, self._ids, self._clusters, self._stamps):
+            rows.flush()
+
+    def _grow(self, needed: int) -> None:
+        capacity = 0 if self._ids is None else len(self._ids)
+        if needed <= capacity:
+            return
+        new_capacity = max(1024, capacity * 2, needed)
+        if self._vectors is not None:
+            self._flush_rows()
+            self._vectors = self._ids = self._clusters = self._stamps = None
+        # Extend the files (zero-filled) and map them again
+        files = [(".vectors", 4 * self.dim)] + [(suffix, np.dtype(dtype).itemsize) for suffix, dtype in _ROW_FILES]
+        for suffix, itemsize in files:
+            with open(self.path + suffix, "ab") as f:
+                f.truncate(new_capacity * itemsize)
+        self._open()
+        self._ids[capacity:] = _EMPTY
+        self._stamps[capacity:] = math.nan
+
+    def load(self, database: Optional[str] = None) -> bool:
+        """
+        Open the stored index; returns False if there is none, or it doesn't
+        match `dim` or (when given) the database it should have been built from
+        """
+        with self._lock:
+            suffixes = (".vectors", ".ids", ".clusters", ".stamps", ".df.npy", ".meta.json")
+            if not all(os.path.exists(self.path + suffix) for suffix in suffixes):
+                return False
+            df = np.load(self.path + ".df.npy")
+            if df.shape != (self.dim + 1,):
+                return False
+            with open(self.path + ".meta.json") as f:
+                stored_database = json.load(f).get("database")
+            if database is not None and stored_database != database:
+                return False
+            self._database = stored_database
+            self._open()
+            self._df, self._documents = df[:-1].copy(), int(df[-1])
+            used = np.flatnonzero(self._ids != _EMPTY)
+            self._rows = dict(zip(self._ids[used].tolist(), used.tolist()))
+            self._size = int(used[-1]) + 1 if len(used) else 0
+            self._free = np.flatnonzero(self._ids[:self._size] == _EMPTY).tolist()
+            self._centroids = None
+            if os.path.exists(self.path + ".centroids.npy"):
+                self._centroids = np.load(self.path + ".centroids.npy")
+                self._index_partitions(used)
+            self._loaded = True
+            return True
+
+    def flush(self) -> None:
+        with self._lock:
+            if self._vectors is not None:
+                self._flush_rows()
+            np.save(self.path + ".df.npy", np.append(self._df, self._documents))
+            with open(self.path + ".meta.json", "w") as f:
+                json.dump({"database": self._database}, f)
+
+    # Vectors
+
+    def _hash(self, features: Counter) -> Tuple[np.ndarray, np.ndarray]:
+        buckets = np.empty(len(features), dtype=np.int64)
+        weights = np.empty(len(features), dtype=np.float64)
+        for i, (feature, count) in enumerate(features.items()):
+            h = zlib.crc32(feature.encode("utf-8"))
+            buckets[i] = h % self.dim
+            # A hash bit picks the sign so collisions tend to cancel out
+            weights[i] = (1.0 + math.log(count)) * (1.0 if h & 0x80000000 else -1.0)
+        return buckets, weights
+
+    def _vector(self, buckets: np.ndarray, weights: np.ndarray) -> np.ndarray:
+        idf = np.log((1.0 + self._documents) / (1.0 + self._df[buckets])) + 1.0
+        vector = np.zeros(self.dim, dtype=np.float64)
+        np.add.at(vector, buckets, weights * idf)
+        norm = np.linalg.norm(vector)
+        return (vector / norm if norm else vector).astype(np.float32)
+
+    def _remove(self, prompt_id: int) -> None:
+        row = self._rows.pop(prompt_id, None)
+        if row is None:
+            return
+        if self._centroids is not None:
+            self._partitions[self._clusters[row]].remove(row)
+        self._vectors[row] = 0
+        self._ids[row] = _EMPTY
+        self._stamps[row] = math.nan
+        self._free.append(row)
+        # Document frequencies are only added to; a rebuild resets them
+
+    def _upsert(self, prompt_id: int, text: str, stamp: float = math.nan) -> None:
+        buckets, weights = self._hash(_features(text))
+        if prompt_id in self._rows:
+            self._remove(prompt_id)
+        else:
+            self._df[np.unique(buckets)] += 1
+            self._documents += 1
+        if self._free:
+            row = self._free.pop()
+        else:
+            row = self._size
+            self._grow(row + 1)
+            self._size += 1
+        vector = self._vector(buckets, weights)
+        self._rows[prompt_id] = row
+        self._ids[row] = prompt_id
+        self._stamps[row] = stamp
+        self._vectors[row] = vector
+        if self._centroids is not None:
+            cluster = int(np.argmax(self._centroids @ vector))
+            self._clusters[row] = cluster
+            self._partitions[cluster].append(row)
+
+    def upsert(self, prompt_id: int, text: str, updated_at: Optional[datetime] = None) -> None:
+        """Add or replace a prompt's vector; `updated_at` is the prompt's, for `sync`"""
+        with self._lock:
+            if self._loaded:
+                self._upsert(prompt_id, text, _stamp(updated_at))
+
+    def stamp(self, prompt_id: int) -> float:
+        """The updated_at recorded for a prompt's row (NaN if unknown)"""
+        row = self._rows.get(prompt_id)
+        return math.nan if row is None else float(self._stamps[row])
+
+    def remove(self, prompt_id: int) -> None:
+        with self._lock:
+            if self._vectors is not None:
+                self._remove(prompt_id)
+
+    def rebuild(
+        self,
+        documents: Iterable[Tuple[int, str]],
+        stamps: Optional[Dict[int, datetime]] = None,
+        database: Optional[str] = None,
+    ) -> None:
+        """
+        Recompute every vector (and IDF and partitions) from (prompt id, text)
+        pairs, with each prompt's updated_at and the database they came from
+        """
+        documents = [(prompt_id, self._hash(_features(text))) for prompt_id, text in documents]
+        stamps = stamps or {}
+        with self._lock:
+            self._database = database
+            self._df = np.zeros(self.dim, dtype=np.float64)
+            for _, (buckets, _) in documents:
+                self._df[np.unique(buckets)] += 1
+            self._documents = len(documents)
+            self._vectors = self._ids = self._clusters = self._stamps = None
+            for suffix in (".vectors", ".ids", ".clusters", ".stamps", ".centroids.npy"):
+                if os.path.exists(self.path + suffix):
+                    os.remove(self.path + suffix)
+            self._rows, self._free, self._size = {}, [], len(documents)
+            self._centroids, self._partitions = None, []
+            self._grow(len(documents))
+            for row, (prompt_id, (buckets, weights)) in enumerate(documents):
+                self._rows[prompt_id] = row
+                self._ids[row] = prompt_id
+                self._stamps[row] = _stamp(stamps.get(prompt_id))
+                self._vectors[row] = self._vector(buckets, weights)
+            self._loaded = True
+        self.partition()
+        self.flush()
+
+    # Partitions
+
+    def partition(self, iterations: int = 10) -> bool:
+        """
+        Split the rows into ~sqrt(N) partitions with spherical k-means trained
+        on a sample; no-op below `partition_min_prompts`. Returns whether the
+        index is partitioned. The heavy work runs without holding the lock, so
+        queries and writes continue meanwhile (on the previous partitions).
+        """
+        with self._lock:
+            used = np.flatnonzero(self._ids[:self._size] != _EMPTY) if self._size else np.empty(0, np.int64)
+            if len(used) < self.partition_min_prompts:
+                self._centroids, self._partitions = None, []
+                return False
+            vectors = self._vectors
+
+        rng = np.random.default_rng(0)
+        count = max(2, int(math.sqrt(len(used))))
+        sample_size = min(len(used), count * _TRAIN_ROWS_PER_PARTITION)
+        sample = np.array(vectors[np.sort(rng.choice(used, sample_size, replace=False))])
+        centroids = sample[rng.choice(len(sample), count, replace=False)]
+        for _ in range(iterations):
+            assignment = np.argmax(sample @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assignment, sample)
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            # Keep the previous centroid for partitions that lost every row
+            centroids = np.where(norms > 0, sums / np.maximum(norms, 1e-12), centroids)
+        centroids = centroids.astype(np.float32)
+        clusters = np.empty(len(used), dtype=np.int32)
+        for start in range(0, len(used), _CHUNK_ROWS):
+            rows = used[start:start + _CHUNK_ROWS]
+            clusters[start:start + len(rows)] = np.argmax(vectors[rows] @ centroids.T, axis=1)
+
+        with self._lock:
+            if self._vectors is not vectors:
+                return False  # rebuilt or grown meanwhile; the caller can try again
+            self._clusters[used] = clusters
+            now_used = np.flatnonzero(self._ids[:self._size] != _EMPTY)
+            added = np.setdiff1d(now_used, used)
+            if len(added):
+                self._clusters[added] = np.argmax(self._vectors[added] @ centroids.T, axis=1)
+            self._centroids = centroids
+            self._index_partitions(now_used)
+            np.save(self.path + ".centroids.npy", centroids)
+            return True
+
+    def _index_partitions(self, used: np.ndarray) -> None:
+        clusters = np.asarray(self._clusters[used])
+        order = np.argsort(clusters, kind="stable")
+        bounds = np.searchsorted(clusters[order], np.arange(len(self._centroids) + 1))
+        rows = used[order]
+        self._partitions = [rows[bounds[i]:bounds[i + 1]].tolist() for i in range(len(self._centroids))]
+
+    # Queries
+
+    def related(self, prompt_id: int, limit: int = 5) -> List[Tuple[int, float]]:
+        """(prompt id, cosine similarity) of the prompts most similar to `prompt_id`"""
+        with self._lock:
+            row = self._rows.get(prompt_id) if self._loaded else None
+            if row is None:
+                return []
+            query = np.array(self._vectors[row])
+            if not query.any():
+                return []
+            if self._centroids is None:
+                rows, scores = self._scan(query)
+            else:
+                rows, scores = self._probe(query)
+            scores[rows == row] = -np.inf
+            k = min(limit, len(scores))
+            if k == 0:
+                return []
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top])]
+            return [
+                (int(self._ids[rows[i]]), round(float(scores[i]), 4))
+                for i in top if scores[i] > 0
+            ]
+
+    def _scan(self, query: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Score every row"""
+        scores = np.empty(self._size, dtype=np.float32)
+        for start in range(0, self._size, _CHUNK_ROWS):
+            end = min(self._size, start + _CHUNK_ROWS)
+            scores[start:end] = self._vectors[start:end] @ query
+        return np.arange(self._size), scores
+
+    def _probe(self, query: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Score the rows of the partitions nearest to the query"""
+        probes = min(self.probes, len(self._centroids))
+        nearest = np.argpartition(-(self._centroids @ query), probes - 1)[:probes]
+        rows = np.sort(np.fromiter(
+            (row for cluster in nearest for row in self._partitions[cluster]), dtype=np.int64
+        ))
+        return rows, self._vectors[rows] @ query
+
+    # Lifecycle
+
+    def _acquire_writer_lock(self) -> bool:
+        """Take the index files' exclusive lock; False if another process holds it"""
+        if fcntl is None or self._lock_file is not None:
+            return True
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        lock_file = open(self.path + ".lock", "a")
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return False
+        self._lock_file = lock_file
+        return True
+
+    async def sync(self, session_factory) -> None:
+        """
+        Load the stored index and reconcile it with the database (removed,
+        missing and changed prompts), or rebuild it
+        """
+        if not RELATED_PROMPTS_ENABLED:
+            return
+        if not self._acquire_writer_lock():
+            self._private_dir = tempfile.mkdtemp(prefix="prompt_vectors-")
+            logger.warning(
+                "%s is in use by another process; building a private related-prompt index in %s",
+                self.path, self._private_dir,
+            )
+            self._shared_path, self.path = self.path, os.path.join(self._private_dir, "prompt_vectors")
+        database = _database_identity(session_factory)
+        stmt = prompt_texts().add_columns(_UPDATED.label("updated"))
+        if not await asyncio.to_thread(self.load, database):
+            async with session_factory() as session:
+                rows = (await session.execute(stmt)).all()
+            await asyncio.to_thread(
+                self.rebuild,
+                [(row.id, f"{row.title} {full_content(row)}") for row in rows],
+                {row.id: row.updated for row in rows},
+                database,
+            )
+            logger.info("Built related-prompt vectors for %d prompts", len(rows))
+            return
+
+        async with session_factory() as session:
+            current = {
+                row.id: _stamp(row.updated)
+                for row in await session.execute(select(models.Prompt.id, _UPDATED.label("updated")))
+            }
+            # New prompts have no row (NaN never compares equal), edited ones an older stamp
+            stale = [prompt_id for prompt_id, stamp in current.items() if self.stamp(prompt_id) != stamp]
+            rows = []
+            for start in range(0, len(stale), 500):
+                batch = stale[start:start + 500]
+                rows += (await session.execute(stmt.where(models.Prompt.id.in_(batch)))).all()
+        for prompt_id in self._rows.keys() - current.keys():
+            self.remove(prompt_id)
+        for row in rows:
+            self.upsert(row.id, f"{row.title} {full_content(row)}", row.updated)
+        if rows:
+            logger.info("Re-embedded %d new or changed prompts", len(rows))
+        # Partition once the index is large enough, and re-partition as it doubles
+        partitioned = self._centroids is not None
+        if len(self._rows) >= self.partition_min_prompts and (
+            not partitioned or len(self._rows) > 2 * len(self._centroids) ** 2
+        ):
+            await asyncio.to_thread(self.partition)
+
+    def close(self) -> None:
+        if self._vectors is not None:
+            self.flush()
+        self._loaded = False
+        if self._lock_file is not None:
+            self._lock_file.close()  # releases the lock
+            self._lock_file = None
+        if self._private_dir is not None:
+            self._vectors = self._ids = self._clusters = self._stamps = None
+            shutil.rmtree(self._private_dir, ignore_errors=True)
+            self._private_dir = None
+            self.path = self._shared_path
+
+
+prompt_vectors = PromptVectors()
@@ -0,0 +1,129 @@
+import logging
+import os
+import re
+import weakref
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import lru_cache
+from typing import Iterator, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+logger = logging.getLogger(__name__)
+
+DEBUG = os.getenv("DEBUG", "false").lower() in ("1", "true", "yes")
+# A statement shape repeated this many times in one request is reported as N+1
+N_PLUS_ONE_THRESHOLD = int(os.getenv("N_PLUS_ONE_THRESHOLD", "3"))
+QUERY_COUNT_HEADER = "X-Query-Count"
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"(?<![\w$])\d+(?:\.\d+)?\b")
+_NAMED_PARAM = re.compile(r"%\(\w+\)s|:\w+|\$\d+")
+_PARAM_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+
+# SQLAlchemy's compiled cache means the same strings come back again and again
+@lru_cache(maxsize=4096)
+def normalize_statement(statement: str) -> str:
+    """
+    Reduce a SQL statement to its shape: literals and bound parameters become
+    `?` and IN lists collapse to `(?)`, so `WHERE id IN (?, ?)` and
+    `WHERE id IN (?, ?, ?)` are the same query.
+    """
+    shape = _STRING_LITERAL.sub("?", statement)
+    shape = _NAMED_PARAM.sub("?", shape)
+    shape = _NUMBER_LITERAL.sub("?", shape)
+    shape = _PARAM_LIST.sub("(?)", shape)
+    return _WHITESPACE.sub(" ", shape).strip()
+
+
+class QueryTracker:
+    """Counts statements and their shapes over a unit of work (usually a request)."""
+
+    def __init__(self):
+        self.count = 0
+        self.shapes: Counter = Counter()
+
+    def record(self, statement: str) -> None:
+        self.count += 1
+        self.shapes[normalize_statement(statement)] += 1
+
+    def repeated_shapes(self, threshold: int = N_PLUS_ONE_THRESHOLD) -> List[tuple]:
+        """Statement shapes executed at least `threshold` times, most frequent first."""
+        return [(shape, n) for shape, n in self.shapes.most_common() if n >= threshold]
+
+
+# Tracker for the request being handled (set by QueryTrackingMiddleware)
+current_tracker: ContextVar[Optional[QueryTracker]] = ContextVar("current_query_tracker", default=None)
+# Trackers that see every statement regardless of context, e.g. the test
+# query budget, which runs in a different thread than the app under TestClient
+_global_trackers: List[QueryTracker] = []
+# Engines already feeding the trackers, held weakly
+_instrumented: "weakref.WeakSet" = weakref.WeakSet()
+
+
+@contextmanager
+def track_queries() -> Iterator[QueryTracker]:
+    """Record every statement executed on instrumented engines while the block runs."""
+    tracker = QueryTracker()
+    _global_trackers.append(tracker)
+    try:
+        yield tracker
+    finally:
+        _global_trackers.remove(tracker)
+
+
+def instrument_queries(engine: AsyncEngine) -> None:
+    """Feed statements run on the engine to the active query trackers (once per engine)."""
+    if engine.sync_engine in _instrumented:
+        return
+    _instrumented.add(engine.sync_engine)
+
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        tracker = current_tracker.get()
+        if tracker is not None:
+            tracker.record(statement)
+        for tracker in _global_trackers:
+            tracker.record(statement)
+
+
+class QueryTrackingMiddleware:
+    """
+    ASGI middleware counting statements per request. Repeated statement shapes
+    (likely N+1 patterns) are logged as warnings; in DEBUG mode the count is
+    also returned in the X-Query-Count response header.
+    """
+
+    def __init__(self, app, expose_header: bool = DEBUG, threshold: int = N_PLUS_ONE_THRESHOLD):
+        self.app = app
+        self.expose_header = expose_header
+        self.threshold = threshold
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        tracker = QueryTracker()
+        token = current_tracker.set(tracker)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start" and self.expose_header:
+                headers = list(message.get("headers", []))
+                headers.append((QUERY_COUNT_HEADER.lower().encode(), str(tracker.count).encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            current_tracker.reset(token)
+            for shape, n in tracker.repeated_shapes(self.threshold):
+                logger.warning(
+                    "Possible N+1: %s %s ran %d times in one request: %s",
+                    scope["method"], scope["path"], n, shape,
+                )
@@ -0,0 +1,148 @@
+import logging
+from datetime import datetime
+from typing import Iterable, List, Optional
+
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+
+from app import models
+
+logger = logging.getLogger(__name__)
+
+# Prompts rebuilt per statement when refreshing or backfilling views
+_BATCH_SIZE = 500
+
+
+def _timestamp(value: Optional[datetime]) -> Optional[str]:
+    return value.isoformat() if value is not None else None
+
+
+def category_json(category: Optional[models.Category]) -> Optional[dict]:
+    if category is None:
+        return None
+    return {
+        "id": category.id,
+        "name": category.name,
+        "description": category.description,
+        "created_at": _timestamp(category.created_at),
+    }
+
+
+def tags_json(tags: Iterable[models.Tag]) -> List[dict]:
+    return [{"id": tag.id, "name": tag.name, "created_at": _timestamp(tag.created_at)} for tag in tags]
+
+
+def view_values(
+    prompt: models.Prompt, category: Optional[models.Category], tags: Iterable[models.Tag]
+) -> dict:
+    """The prompt_view row for a prompt, from already loaded objects"""
+    return {
+        "id": prompt.id,
+        "title": prompt.title,
+        "content": prompt.content,
+        "category_id": prompt.category_id,
+        "user_id": prompt.user_id,
+        "like_count": prompt.like_count or 0,
+        "content_compressed": prompt.content_compressed or False,
+        "created_at": prompt.created_at,
+        "updated_at": prompt.updated_at,
+        "category": category_json(category),
+        "tags": tags_json(tags),
+    }
+
+
+async def write_prompt_view(
+    db: AsyncSession,
+    prompt: models.Prompt,
+    category: Optional[models.Category],
+    tags: Iterable[models.Tag],
+    created: bool = False,
+) -> None:
+    """
+    Write a prompt's view row in the caller's transaction: inserted for a
+    new prompt, otherwise updated (inserted if it turns out to be missing)
+    """
+    values = view_values(prompt, category, tags)
+    if not created:
+        result = await db.execute(
+            update(models.PromptView).where(models.PromptView.id == prompt.id).values(values)
+        )
+        if result.rowcount:
+            return
+    await db.execute(insert(models.PromptView).values(values))
+
+
+async def refresh_prompt_views(db: AsyncSession, prompt_ids: Iterable[int]) -> None:
+    """Rebuild the view rows of the given prompts from the source tables (e.g. after a tag is deleted)"""
+    prompt_ids = list(prompt_ids)
+    for start in range(0, len(prompt_ids), _BATCH_SIZE):
+        batch = prompt_ids[start:start + _BATCH_SIZE]
+        prompts = (await db.execute(
+            select(models.Prompt)
+            .options(selectinload(models.Prompt.category), selectinload(models.Prompt.tags))
+            .where(models.Prompt.id.in_(batch))
+            .execution_options(populate_existing=True)
+        )).scalars().all()
+        await db.execute(delete(models.PromptView).where(models.PromptView.id.in_(batch)))
+        if prompts:
+            await db.execute(
+                insert(models.PromptView),
+                [view_values(prompt, prompt.category, prompt.tags) for prompt in prompts],
+            )
+
+
+async def update_category_views(db: AsyncSession, category: models.Category) -> None:
+    """Copy a renamed or redescribed category into the views of its prompts"""
+    await db.execute(
+        update(models.PromptView)
+        .where(models.PromptView.category_id == category.id)
+        .values(category=category_json(category))
+    )
+
+
+async def update_like_count_view(
+    db: AsyncSession, prompt_id: int, like_count: int, updated_at: Optional[datetime]
+) -> None:
+    """Copy a like toggle (new count, and the prompt's bumped updated_at) into its view"""
+    await db.execute(
+        update(models.PromptView)
+        .where(models.PromptView.id == prompt_id)
+        .values(like_count=like_count, updated_at=updated_at)
+    )
+
+
+async def delete_prompt_view(db: AsyncSession, prompt_id: int) -> None:
+    await db.execute(delete(models.PromptView).where(models.PromptView.id == prompt_id))
+
+
+def view_to_dict(view, is_liked: bool = False) -> dict:
+    """A prompt_view row (or entity) in the standard prompt response format"""
+    return {
+        "id": view.id,
+        "title": view.title,
+        "content": view.content,
+        "content_truncated": bool(view.content_compressed),
+        "category_id": view.category_id,
+        "user_id": view.user_id,
+        "like_count": view.like_count or 0,
+        "created_at": view.created_at,
+        "updated_at": view.updated_at,
+        "category": view.category,
+        "tags": view.tags or [],
+        "tag_names": [tag["name"] for tag in (view.tags or [])],
+        "is_liked": is_liked,
+    }
+
+
+async def backfill_prompt_views(session_factory) -> int:
+    """Build view rows for prompts that have none (e.g. created before the read model existed)"""
+    async with session_factory() as session:
+        missing = (await session.execute(
+            select(models.Prompt.id).where(models.Prompt.id.not_in(select(models.PromptView.id)))
+        )).scalars().all()
+        await refresh_prompt_views(session, missing)
+        await session.commit()
+    if missing:
+        logger.info("Built read-model views for %d prompts", len(missing))
+    return len(missing)
@@ -0,0 +1,187 @@
+import asyncio
+import logging
+import os
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import select
+
+from app import models
+
+logger = logging.getLogger(__name__)
+
+RECOMMENDER_ENABLED = os.getenv("RECOMMENDER_ENABLED", "true").lower() in ("1", "true", "yes")
+# Seconds between retrains from prompt_likes
+RECOMMENDER_RETRAIN_SECONDS = float(os.getenv("RECOMMENDER_RETRAIN_SECONDS", "900"))
+# Most similar prompts kept per prompt
+RECOMMENDER_NEIGHBOURS = int(os.getenv("RECOMMENDER_NEIGHBOURS", "50"))
+# Likes per user used for training; bounds the pairs (n^2 / 2) a heavy user adds
+RECOMMENDER_MAX_USER_LIKES = int(os.getenv("RECOMMENDER_MAX_USER_LIKES", "500"))
+
+# Fallback for users without likes (or whose likes have no neighbours)
+_POPULAR_SIZE = 200
+
+
+class _Model:
+    """Immutable trained model; replaced wholesale so readers never see a partial build"""
+
+    def __init__(
+        self,
+        prompt_ids: np.ndarray,
+        indptr: np.ndarray,
+        neighbours: np.ndarray,
+        scores: np.ndarray,
+        popular: np.ndarray,
+    ):
+        self.prompt_ids = prompt_ids  # item index -> prompt id
+        self.rows = {int(prompt_id): i for i, prompt_id in enumerate(prompt_ids)}
+        # CSR: neighbours[indptr[i]:indptr[i + 1]] are item i's most similar items
+        self.indptr = indptr
+        self.neighbours = neighbours
+        self.scores = scores
+        self.popular = popular  # item indexes, most liked first
+
+
+def _empty_model() -> _Model:
+    return _Model(
+        np.empty(0, dtype=np.int64), np.zeros(1, dtype=np.int64),
+        np.empty(0, dtype=np.int32), np.empty(0, dtype=np.float32), np.empty(0, dtype=np.int32),
+    )
+
+
+def build_model(likes: Iterable[Tuple[str, int]], neighbours: int = RECOMMENDER_NEIGHBOURS) -> _Model:
+    """
+    Train item-item collaborative filtering from (user, prompt) likes: the
+    cosine similarity of two prompts is the number of users who liked both
+    over the geometric mean of their like counts. Only each prompt's top
+    `neighbours` are kept.
+    """
+    likes = list(likes)
+    if not likes:
+        return _empty_model()
+    _, user_index = np.unique(np.array([str(u) for u, _ in likes]), return_inverse=True)
+    prompt_ids, item_index = np.unique(np.array([p for _, p in likes], dtype=np.int64), return_inverse=True)
+    n_items = len(prompt_ids)
+
+    # One row per distinct (user, item), grouped by user
+    pairs = np.unique(user_index.astype(np.int64) * n_items + item_index)
+    user_of, item_of = np.divmod(pairs, n_items)
+    bounds = np.flatnonzero(np.diff(user_of)) + 1
+    baskets = np.split(item_of, bounds)
+
+    item_likes = np.bincount(item_of, minlength=n_items)
+    popular = np.argsort(-item_likes, kind="stable")[:_POPULAR_SIZE].astype(np.int32)
+
+    # Co-like counts: every pair of items in each user's basket, counted with np.unique
+    keys = []
+    triu: Dict[int, Tuple[np.ndarray, np.ndarray]] = {}
+    for basket in baskets:
+        n = len(basket)
+        if n < 2:
+            continue
+        if n > RECOMMENDER_MAX_USER_LIKES:
+            basket = basket[-RECOMMENDER_MAX_USER_LIKES:]
+            n = len(basket)
+        if n not in triu:
+            triu[n] = np.triu_indices(n, 1)
+        a, b = triu[n]
+        keys.append(basket[a] * n_items + basket[b])
+    if not keys:
+        return _Model(prompt_ids, np.zeros(n_items + 1, dtype=np.int64),
+                      np.empty(0, dtype=np.int32), np.empty(0, dtype=np.float32), popular)
+    keys, together = np.unique(np.concatenate(keys), return_counts=True)
+    a, b = np.divmod(keys, n_items)
+    similarity = (together / np.sqrt(item_likes[a] * item_likes[b])).astype(np.float32)
+
+    # Symmetric, then keep the top `neighbours` of each row
+    rows = np.concatenate([a, b])
+    cols = np.concatenate([b, a]).astype(np.int32)
+    sims = np.concatenate([similarity, similarity])
+    order = np.lexsort((-sims, rows))
+    rows, cols, sims = rows[order], cols[order], sims[order]
+    starts = np.searchsorted(rows, np.arange(n_items))
+    rank = np.arange(len(rows)) - starts[rows]
+    keep = rank < neighbours
+    rows, cols, sims = rows[keep], cols[keep], sims[keep]
+    indptr = np.zeros(n_items + 1, dtype=np.int64)
+    np.cumsum(np.bincount(rows, minlength=n_items), out=indptr[1:])
+    return _Model(prompt_ids, indptr, cols, sims, popular)
+
+
+class PromptRecommender:
+    """
+    "For you" recommendations from like history. The model (each prompt's
+    most similar prompts by co-likes) is trained off the event loop and
+    swapped in atomically; at request time a user's liked prompts pull in
+    their neighbours, whose similarities are summed per candidate.
+    """
+
+    def __init__(self):
+        self._model = _empty_model()
+        self._task: Optional[asyncio.Task] = None
+
+    def load(self, likes: Iterable[Tuple[str, int]]) -> None:
+        """Replace the model with one trained on (user, prompt) likes"""
+        self._model = build_model(likes)
+
+    def recommend(self, liked: Iterable[int], limit: int = 10) -> List[Tuple[int, float]]:
+        """
+        (prompt id, score) for the prompts most similar to the `liked` ones,
+        excluding those. Users with nothing to go on get the most liked
+        prompts, with a score of 0.
+        """
+        model = self._model
+        liked_rows = [model.rows[p] for p in set(liked) if p in model.rows]
+        scores = None
+        if liked_rows:
+            neighbours = np.concatenate([model.neighbours[model.indptr[i]:model.indptr[i + 1]] for i in liked_rows])
+            if len(neighbours):
+                weights = np.concatenate([model.scores[model.indptr[i]:model.indptr[i + 1]] for i in liked_rows])
+                scores = np.bincount(neighbours, weights=weights, minlength=len(model.prompt_ids))
+                scores[liked_rows] = 0
+
+        if scores is None or not scores.any():
+            exclude = set(liked_rows)
+            return [(int(model.prompt_ids[i]), 0.0) for i in model.popular if i not in exclude][:limit]
+
+        k = min(limit, int(np.count_nonzero(scores)))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [(int(model.prompt_ids[i]), round(float(scores[i]), 4)) for i in top]
+
+    async def train(self, session_factory) -> None:
+        """Retrain from every like in the database, building the model in a worker thread"""
+        async with session_factory() as session:
+            likes = (await session.execute(
+                select(models.PromptLike.user_id, models.PromptLike.prompt_id)
+            )).all()
+        self._model = await asyncio.to_thread(build_model, likes)
+        logger.info("Trained recommender on %d likes over %d prompts", len(likes), len(self._model.prompt_ids))
+
+    async def start(self, session_factory, interval: float = RECOMMENDER_RETRAIN_SECONDS) -> None:
+        if not RECOMMENDER_ENABLED or self._task is not None:
+            return
+        self._task = asyncio.create_task(self._retrain_loop(session_factory, interval))
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _retrain_loop(self, session_factory, interval: float) -> None:
+        while True:
+            try:
+                await self.train(session_factory)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Recommender training failed")
+            await asyncio.sleep(interval)
+
+
+recommender = PromptRecommender()
@@ -0,0 +1,246 @@
+import json
+import os
+import re
+import zlib
+from datetime import datetime
+from difflib import SequenceMatcher
+from typing import List, Optional, Union
+
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import models
+
+# Every Nth revision stores the full content, so rebuilding one applies at most N - 1 diffs
+PROMPT_REVISION_SNAPSHOT_INTERVAL = max(1, int(os.getenv("PROMPT_REVISION_SNAPSHOT_INTERVAL", "20")))
+
+SNAPSHOT = "snapshot"
+DELTA = "delta"
+
+# A diff is a list of ops over the previous content's lines: n > 0 copies the
+# next n lines, n < 0 skips the next -n lines, a string is inserted, and a
+# list edits the next line with the same ops over its words (each with the
+# whitespace that follows it)
+Delta = List[Union[int, str, list]]
+
+# Changed lines at least this long are diffed word by word, so an edit to a
+# prompt written as one paragraph doesn't store the whole paragraph again
+_LONG_LINE = 80
+
+# Whitespace stays attached to the word before it: as tokens of their own,
+# spaces would be most of a paragraph and make the diff far slower
+_TOKEN = re.compile(r"\S+\s*|\s+")
+
+
+def _lines(text: str) -> List[str]:
+    return text.splitlines(keepends=True)
+
+
+def _tokens(line: str) -> List[str]:
+    return _TOKEN.findall(line)
+
+
+def _compact(ops: Delta) -> Delta:
+    """Merge adjacent skips and inserts (their order between other ops doesn't matter)"""
+    out: Delta = []
+    skipped, inserted = 0, []
+    # A trailing None flushes the last run
+    for op in ops + [None]:
+        if isinstance(op, str):
+            inserted.append(op)
+        elif isinstance(op, int) and op < 0:
+            skipped += op
+        else:
+            if skipped:
+                out.append(skipped)
+            if inserted:
+                out.append("".join(inserted))
+            skipped, inserted = 0, []
+            if op is not None:
+                out.append(op)
+    return out
+
+
+def _diff(old: List[str], new: List[str]) -> Delta:
+    # Edits are usually local: only the span between the common prefix and
+    # suffix goes through SequenceMatcher
+    prefix = 0
+    while prefix < min(len(old), len(new)) and old[prefix] == new[prefix]:
+        prefix += 1
+    suffix = 0
+    while suffix < min(len(old), len(new)) - prefix and old[-1 - suffix] == new[-1 - suffix]:
+        suffix += 1
+    old, new = old[prefix:len(old) - suffix], new[prefix:len(new) - suffix]
+
+    ops: Delta = [prefix] if prefix else []
+    # No autojunk: in a long paragraph common words would be treated as junk
+    for tag, i1, i2, j1, j2 in SequenceMatcher(None, old, new, autojunk=False).get_opcodes():
+        if tag == "equal":
+            ops.append(i2 - i1)
+            continue
+        if i2 > i1:
+            ops.append(i1 - i2)
+        if j2 > j1:
+            ops.append("".join(new[j1:j2]))
+    if suffix:
+        ops.append(suffix)
+    return ops
+
+
+def _line_delta(old_line: str, new_line: str) -> Delta:
+    """Ops replacing one line: a word diff when the line is long and that is smaller"""
+    if max(len(old_line), len(new_line)) >= _LONG_LINE:
+        words = _compact(_diff(_tokens(old_line), _tokens(new_line)))
+        if len(json.dumps(words)) < len(new_line):
+            return [words]
+    return [-1, new_line]
+
+
+def make_delta(old: str, new: str) -> Delta:
+    """Line diff turning `old` into `new`, with changed long lines diffed word by word"""
+    old_lines, new_lines = _lines(old), _lines(new)
+    ops: Delta = []
+    for tag, i1, i2, j1, j2 in SequenceMatcher(None, old_lines, new_lines).get_opcodes():
+        if tag == "equal":
+            ops.append(i2 - i1)
+            continue
+        if tag == "replace":
+            # Pair changed lines up in order; the rest are removed or inserted whole
+            for old_line, new_line in zip(old_lines[i1:i2], new_lines[j1:j2]):
+                ops.extend(_line_delta(old_line, new_line))
+            paired = min(i2 - i1, j2 - j1)
+            i1, j1 = i1 + paired, j1 + paired
+        if i2 > i1:
+            ops.append(i1 - i2)
+        if j2 > j1:
+            ops.append("".join(new_lines[j1:j2]))
+    return _compact(ops)
+
+
+def _apply(items: List[str], ops: Delta) -> str:
+    out: List[str] = []
+    position = 0
+    for op in ops:
+        if isinstance(op, str):
+            out.append(op)
+        elif isinstance(op, list):
+            out.append(_apply(_tokens(items[position]), op))
+            position += 1
+        elif op > 0:
+            out.extend(items[position:position + op])
+            position += op
+        else:
+            position -= op
+    return "".join(out)
+
+
+def apply_delta(old: str, ops: Delta) -> str:
+    return _apply(_lines(old), ops)
+
+
+def _pack(value) -> bytes:
+    return zlib.compress(json.dumps(value, separators=(",", ":")).encode("utf-8"))
+
+
+def _unpack(data: bytes):
+    return json.loads(zlib.decompress(data))
+
+
+async def _insert_revision(db: AsyncSession, prompt_id: int, number: int, kind: str, title: str,
+                           content: str, data: bytes, user_id: Optional[str],
+                           created_at: Optional[datetime]) -> None:
+    await db.execute(insert(models.PromptRevision).values(
+        prompt_id=prompt_id, number=number, kind=kind, title=title,
+        size=len(content.encode("utf-8")), data=data, user_id=user_id,
+        created_at=created_at or datetime.utcnow(),
+    ))
+
+
+async def record_revision(
+    db: AsyncSession,
+    prompt_id: int,
+    title: str,
+    content: str,
+    user_id: Optional[str] = None,
+    previous: Optional[dict] = None,
+) -> int:
+    """
+    Append a revision with the prompt's new title and content in the caller's
+    transaction; returns its number. For an edit, `previous` is the state
+    before it ({"title", "content", "user_id", "created_at"}): the revision is
+    stored as a diff against it, and it becomes revision 1 of a prompt that
+    has no history yet (e.g. created before revisions were recorded).
+    """
+    if previous is None:
+        await _insert_revision(db, prompt_id, 1, SNAPSHOT, title, content, _pack(content), user_id, None)
+        return 1
+
+    latest = (await db.execute(
+        select(func.max(models.PromptRevision.number)).where(models.PromptRevision.prompt_id == prompt_id)
+    )).scalar() or 0
+    if not latest:
+        await _insert_revision(
+            db, prompt_id, 1, SNAPSHOT, previous["title"], previous["content"],
+            _pack(previous["content"]), previous.get("user_id"), previous.get("created_at"),
+        )
+        latest = 1
+
+    number = latest + 1
+    kind, data = SNAPSHOT, _pack(content)
+    if (number - 1) % PROMPT_REVISION_SNAPSHOT_INTERVAL:
+        delta = _pack(make_delta(previous["content"], content))
+        # A rewrite can diff larger than the content itself
+        if len(delta) < len(data):
+            kind, data = DELTA, delta
+    await _insert_revision(db, prompt_id, number, kind, title, content, data, user_id, None)
+    return number
+
+
+async def get_revisions(db: AsyncSession, prompt_id: int, skip: int = 0, limit: int = 50) -> list:
+    """A prompt's revisions without content, newest first"""
+    revision = models.PromptRevision
+    return (await db.execute(
+        select(revision.number, revision.kind, revision.title, revision.size, revision.user_id, revision.created_at)
+        .where(revision.prompt_id == prompt_id)
+        .order_by(revision.number.desc())
+        .offset(skip)
+        .limit(limit)
+    )).all()
+
+
+async def get_revision(db: AsyncSession, prompt_id: int, number: int) -> Optional[dict]:
+    """
+    A revision with its content, rebuilt from the nearest snapshot at or
+    before it plus the diffs in between (one query)
+    """
+    revision = models.PromptRevision
+    snapshot = (
+        select(func.max(revision.number))
+        .where(revision.prompt_id == prompt_id, revision.number <= number, revision.kind == SNAPSHOT)
+        .scalar_subquery()
+    )
+    rows = (await db.execute(
+        select(revision)
+        .where(revision.prompt_id == prompt_id, revision.number <= number, revision.number >= snapshot)
+        .order_by(revision.number)
+    )).scalars().all()
+    if not rows or rows[-1].number != number:
+        return None
+
+    content = _unpack(rows[0].data)
+    for row in rows[1:]:
+        content = _unpack(row.data) if row.kind == SNAPSHOT else apply_delta(content, _unpack(row.data))
+    target = rows[-1]
+    return {
+        "number": target.number,
+        "kind": target.kind,
+        "title": target.title,
+        "content": content,
+        "size": target.size,
+        "user_id": target.user_id,
+        "created_at": target.created_at,
+    }
+
+
+async def delete_revisions(db: AsyncSession, prompt_id: int) -> None:
+    await db.execute(delete(models.PromptRevision).where(models.PromptRevision.prompt_id == prompt_id))
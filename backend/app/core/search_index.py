@@ -0,0 +1,211 @@
+import html
+import logging
+import math
+import os
+import re
+from typing import Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import column, delete, func, insert, literal, select, table, text, union_all
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import models
+from app.core.cold_storage import full_content, prompt_texts
+
+logger = logging.getLogger(__name__)
+
+TRIGRAM_SEARCH_ENABLED = os.getenv("TRIGRAM_SEARCH_ENABLED", "true").lower() in ("1", "true", "yes")
+# Minimum `similarity` for a prompt to match: the average, over the query's
+# words, of the share of a word's trigrams found in one word of the prompt
+# (pg_trgm's word_similarity_threshold defaults to 0.6 too)
+SEARCH_SIMILARITY_THRESHOLD = float(os.getenv("SEARCH_SIMILARITY_THRESHOLD", "0.6"))
+# Approximate number of words in a content snippet
+SEARCH_SNIPPET_TOKENS = int(os.getenv("SEARCH_SNIPPET_TOKENS", "24"))
+
+# Marks placed by FTS5 around matches; swapped for <mark> tags after escaping
+_OPEN, _CLOSE = "\x02", "\x03"
+
+_WORD = re.compile(r"[^\W_]+")
+
+# Lightweight handle on the FTS5 table created in app.models
+_prompts_fts = table("prompts_fts", column("rowid"))
+
+
+def _words(text: str) -> List[str]:
+    """Distinct words of `text`, lowercased, in order of first appearance"""
+    return list(dict.fromkeys(_WORD.findall(text.lower())))
+
+
+def word_trigrams(word: str) -> Set[str]:
+    """Trigrams of one lowercased word, padded with two spaces in front and one behind"""
+    padded = f"  {word} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def trigrams(text: str) -> Set[str]:
+    """
+    The set of trigrams in `text`, extracted the way pg_trgm does: words are
+    runs of alphanumerics, lowercased, padded with two spaces in front and one
+    behind, so trigrams agree with pg_trgm's show_trgm on Postgres.
+    """
+    result = set()
+    for word in _words(text):
+        result.update(word_trigrams(word))
+    return result
+
+
+def similarity(query: str, text: str) -> float:
+    """
+    The score used for matching and ranking: for each query word, the share of
+    its trigrams found in the best-matching single word of `text`, averaged
+    over the query's words. Trigrams scattered across unrelated words of a long
+    text don't add up to a match. (pg_trgm's word_similarity scores word
+    extents instead; this is the per-word variant the index can answer.)
+    """
+    wanted = [word_trigrams(word) for word in _words(query)]
+    if not wanted:
+        return 0.0
+    candidates = [word_trigrams(word) for word in _words(text)]
+    best = [max((len(query_word & word) for word in candidates), default=0) / len(query_word)
+            for query_word in wanted]
+    return sum(best) / len(wanted)
+
+
+# Slack for comparing float score sums against the threshold
+_EPSILON = 1e-9
+
+
+def fuzzy_matches(query: str, threshold: float = SEARCH_SIMILARITY_THRESHOLD):
+    """
+    Subquery of (prompt_id, score) for prompts whose `similarity` to the query
+    is at least `threshold`, or None if the query has no trigrams. Only the
+    posting lists of the query's trigrams are read: each query word is scored
+    against every indexed word sharing a trigram with it, its best score per
+    prompt kept, and the scores averaged. The cost follows the candidate set
+    rather than the number of prompts.
+    """
+    wanted = [word_trigrams(word) for word in _words(query)]
+    if not TRIGRAM_SEARCH_ENABLED or not wanted:
+        return None
+    index = models.prompt_trigrams.c
+    # Even with every other query word matching fully, a word scoring below
+    # this can't bring a prompt up to the threshold
+    floor = threshold * len(wanted) - (len(wanted) - 1)
+    per_word = []
+    for position, query_word in enumerate(wanted):
+        hits = func.count(index.trigram)
+        stmt = (
+            select(
+                index.prompt_id,
+                literal(position).label("query_word"),
+                (hits * 1.0 / len(query_word)).label("score"),
+            )
+            .where(index.trigram.in_(sorted(query_word)))
+            .group_by(index.prompt_id, index.word)
+        )
+        if floor > 0:
+            stmt = stmt.having(hits >= math.ceil(floor * len(query_word) - _EPSILON))
+        per_word.append(stmt)
+    scored = union_all(*per_word).subquery("word_scores")
+    best = (
+        select(scored.c.prompt_id, func.max(scored.c.score).label("score"))
+        .group_by(scored.c.prompt_id, scored.c.query_word)
+        .subquery("best_word_scores")
+    )
+    total = func.sum(best.c.score)
+    return (
+        select(best.c.prompt_id, (total / len(wanted)).label("score"))
+        .group_by(best.c.prompt_id)
+        .having(total >= threshold * len(wanted) - _EPSILON)
+        .subquery("fuzzy_matches")
+    )
+
+
+def has_fts(db: AsyncSession) -> bool:
+    """The FTS5 index (prompts_fts) only exists on SQLite"""
+    return db.get_bind().dialect.name == "sqlite"
+
+
+def fts_query(search: str) -> Optional[str]:
+    """FTS5 MATCH expression for a user query: any word, as a prefix, quoted so
+    FTS5 syntax in the input is taken literally"""
+    words = _WORD.findall(search.lower())
+    return " OR ".join(f'"{word}"*' for word in words) or None
+
+
+def _to_html(fragment: Optional[str]) -> Optional[str]:
+    if fragment is None:
+        return None
+    return html.escape(fragment).replace(_OPEN, "<mark>").replace(_CLOSE, "</mark>")
+
+
+async def search_highlights(
+    db: AsyncSession, search: str, prompt_ids: List[int]
+) -> Dict[int, Tuple[str, str]]:
+    """
+    {prompt_id: (highlighted title, content snippet)} for the given prompts,
+    from one FTS5 query using the index's match offsets (highlight() and
+    snippet()), so content is not re-scanned per row. Text is HTML-escaped with
+    matches wrapped in <mark>. Prompts found only by trigram similarity, and
+    databases without FTS5, get no entry.
+    """
+    query = fts_query(search)
+    if not prompt_ids or query is None or not has_fts(db):
+        return {}
+    ids = ", ".join(str(int(prompt_id)) for prompt_id in prompt_ids)
+    stmt = text(
+        f"SELECT rowid, highlight(prompts_fts, 0, :open, :close), "
+        f"snippet(prompts_fts, 1, :open, :close, '…', :tokens) "
+        f"FROM prompts_fts WHERE prompts_fts MATCH :query AND rowid IN ({ids})"
+    )
+    rows = await db.execute(stmt, {
+        "open": _OPEN, "close": _CLOSE, "tokens": SEARCH_SNIPPET_TOKENS, "query": query
+    })
+    return {row[0]: (_to_html(row[1]), _to_html(row[2])) for row in rows}
+
+
+async def index_prompt(db: AsyncSession, prompt_id: int, title: str, content: str) -> None:
+    """(Re)write a prompt's trigrams and full-text entry in the caller's transaction"""
+    await db.execute(
+        delete(models.prompt_trigrams).where(models.prompt_trigrams.c.prompt_id == prompt_id)
+    )
+    rows = [
+        {"trigram": t, "prompt_id": prompt_id, "word": position}
+        for position, word in enumerate(_words(f"{title} {content}"))
+        for t in word_trigrams(word)
+    ]
+    if rows:
+        await db.execute(insert(models.prompt_trigrams), rows)
+    if has_fts(db):
+        await db.execute(
+            text("INSERT OR REPLACE INTO prompts_fts (rowid, title, content) VALUES (:id, :title, :content)"),
+            {"id": prompt_id, "title": title, "content": content},
+        )
+
+
+async def unindex_prompt(db: AsyncSession, prompt_id: int) -> None:
+    await db.execute(
+        delete(models.prompt_trigrams).where(models.prompt_trigrams.c.prompt_id == prompt_id)
+    )
+    if has_fts(db):
+        await db.execute(text("DELETE FROM prompts_fts WHERE rowid = :id"), {"id": prompt_id})
+
+
+async def backfill_search_index(session_factory) -> int:
+    """Index prompts missing from the search index (e.g. created before it existed)"""
+    async with session_factory() as session:
+        stmt = prompt_texts().where(
+            models.Prompt.id.not_in(select(models.prompt_trigrams.c.prompt_id).distinct())
+        )
+        if has_fts(session):
+            stmt = stmt.union(
+                prompt_texts().where(
+                    models.Prompt.id.not_in(select(_prompts_fts.c.rowid))
+                )
+            )
+        rows = (await session.execute(stmt)).all()
+        for row in rows:
+            await index_prompt(session, row.id, row.title, full_content(row))
+        await session.commit()
+    if rows:
+        logger.info("Indexed %d prompts for search", len(rows))
+    return len(rows)
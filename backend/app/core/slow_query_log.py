@@ -0,0 +1,206 @@
+import asyncio
+import logging
+import os
+import sys
+import time
+from collections import OrderedDict, deque
+from typing import Any, Deque, Dict, List, Optional
+
+import greenlet
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.core.query_tracker import normalize_statement
+
+logger = logging.getLogger(__name__)
+
+SLOW_QUERY_THRESHOLD_MS = float(os.getenv("SLOW_QUERY_THRESHOLD_MS", "200"))
+# Durations kept per statement shape for the percentiles
+SLOW_QUERY_SAMPLE_SIZE = int(os.getenv("SLOW_QUERY_SAMPLE_SIZE", "1000"))
+# Statement shapes tracked at once; the least recently run is dropped beyond this
+SLOW_QUERY_MAX_SHAPES = int(os.getenv("SLOW_QUERY_MAX_SHAPES", "1000"))
+# Plans are captured at most once per shape in this interval
+SLOW_QUERY_EXPLAIN_INTERVAL = float(os.getenv("SLOW_QUERY_EXPLAIN_INTERVAL", "300"))
+
+CALLER_MODULE = "app.crud"
+EXPLAINABLE = ("SELECT", "UPDATE", "DELETE", "WITH")
+_SKIP_OPTION = "skip_slow_query_log"
+
+
+def redact_parameters(parameters: Any) -> Any:
+    """Replace bound values with their type (and length for strings/bytes)."""
+    if isinstance(parameters, dict):
+        return {key: redact_parameters(value) for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [redact_parameters(value) for value in parameters]
+    if parameters is None:
+        return None
+    if isinstance(parameters, (str, bytes)):
+        return f"<{type(parameters).__name__} len={len(parameters)}>"
+    return f"<{type(parameters).__name__}>"
+
+
+def find_caller(module: str = CALLER_MODULE) -> Optional[str]:
+    """
+    Name of the innermost function from `module` on the stack. Statements run
+    in a greenlet spawned by the async engine, so the awaiting coroutines are
+    found on the parent greenlet's stack.
+    """
+    frame = sys._getframe(1)
+    current = greenlet.getcurrent()
+    while True:
+        while frame is not None:
+            if frame.f_globals.get("__name__") == module:
+                return frame.f_code.co_name
+            frame = frame.f_back
+        current = current.parent
+        if current is None:
+            return None
+        frame = current.gr_frame
+
+
+class ShapeStats:
+    """Timing for one normalized statement shape."""
+
+    def __init__(self, shape: str):
+        self.shape = shape
+        self.count = 0
+        self.slow_count = 0
+        self.durations: Deque[float] = deque(maxlen=SLOW_QUERY_SAMPLE_SIZE)
+        self.callers: set = set()
+        self.plan: Optional[List[str]] = None
+        self.explained_at = 0.0
+
+    def percentile(self, p: float) -> float:
+        if not self.durations:
+            return 0.0
+        ordered = sorted(self.durations)
+        return ordered[min(len(ordered) - 1, int(round(p / 100.0 * (len(ordered) - 1))))]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "statement": self.shape,
+            "count": self.count,
+            "slow_count": self.slow_count,
+            "p50_ms": round(self.percentile(50) * 1000, 3),
+            "p95_ms": round(self.percentile(95) * 1000, 3),
+            "p99_ms": round(self.percentile(99) * 1000, 3),
+            "callers": sorted(self.callers),
+            "plan": self.plan,
+        }
+
+
+class SlowQueryLog:
+    """
+    Times every statement, aggregates durations by statement shape and logs
+    statements slower than the threshold with redacted parameters, duration
+    and calling CRUD function. The query plan of a slow statement is captured
+    by a background task on its own connection, never on the request path.
+    """
+
+    def __init__(self, threshold_ms: float = SLOW_QUERY_THRESHOLD_MS, max_shapes: int = SLOW_QUERY_MAX_SHAPES):
+        self.threshold = threshold_ms / 1000.0
+        self.max_shapes = max_shapes
+        self.stats: "OrderedDict[str, ShapeStats]" = OrderedDict()
+        self.engine: Optional[AsyncEngine] = None
+        self._explain_queue: Optional[asyncio.Queue] = None
+        self._explain_task: Optional[asyncio.Task] = None
+
+    def instrument(self, engine: AsyncEngine) -> None:
+        self.engine = engine
+        sync_engine = engine.sync_engine
+
+        @event.listens_for(sync_engine, "before_cursor_execute")
+        def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            # On the execution context, so a statement that raises leaves nothing behind
+            context._slow_query_start = time.perf_counter()
+
+        @event.listens_for(sync_engine, "after_cursor_execute")
+        def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            elapsed = time.perf_counter() - context._slow_query_start
+            if conn.get_execution_options().get(_SKIP_OPTION):
+                return
+            self.record(statement, parameters, elapsed)
+
+    def record(self, statement: str, parameters: Any, elapsed: float) -> None:
+        shape = normalize_statement(statement)
+        stats = self.stats.get(shape)
+        if stats is None:
+            stats = self.stats[shape] = ShapeStats(shape)
+            if len(self.stats) > self.max_shapes:
+                self.stats.popitem(last=False)
+        else:
+            self.stats.move_to_end(shape)
+        stats.count += 1
+        stats.durations.append(elapsed)
+        if elapsed < self.threshold:
+            return
+
+        caller = find_caller()
+        stats.slow_count += 1
+        if caller:
+            stats.callers.add(caller)
+        logger.warning(
+            "Slow query (%.1f ms) in %s: %s; parameters=%s",
+            elapsed * 1000, caller or "unknown", shape, redact_parameters(parameters),
+        )
+        self._schedule_explain(stats, statement, parameters)
+
+    def _schedule_explain(self, stats: ShapeStats, statement: str, parameters: Any) -> None:
+        # executemany parameter lists can't be explained as a single statement
+        if self._explain_queue is None or isinstance(parameters, list):
+            return
+        keyword = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else ""
+        now = time.monotonic()
+        if keyword not in EXPLAINABLE or now - stats.explained_at < SLOW_QUERY_EXPLAIN_INTERVAL:
+            return
+        stats.explained_at = now
+        try:
+            self._explain_queue.put_nowait((stats, statement, parameters))
+        except asyncio.QueueFull:
+            # Plans are best effort; never let them back up
+            stats.explained_at = 0.0
+
+    async def start(self) -> None:
+        """Start the background plan capture worker."""
+        if self._explain_task is None and self.engine is not None:
+            self._explain_queue = asyncio.Queue(maxsize=100)
+            self._explain_task = asyncio.create_task(self._explain_worker())
+
+    async def stop(self) -> None:
+        if self._explain_task is not None:
+            self._explain_task.cancel()
+            try:
+                await self._explain_task
+            except asyncio.CancelledError:
+                pass
+            self._explain_task = None
+            self._explain_queue = None
+
+    async def _explain_worker(self) -> None:
+        while True:
+            stats, statement, parameters = await self._explain_queue.get()
+            try:
+                stats.plan = await self.explain(statement, parameters)
+            except Exception as e:
+                logger.info("Could not capture plan for %s: %s", stats.shape, e)
+
+    async def explain(self, statement: str, parameters: Any) -> List[str]:
+        """Run the dialect's EXPLAIN for a statement and return the plan lines."""
+        if self.engine.dialect.name == "sqlite":
+            prefix, column = "EXPLAIN QUERY PLAN ", -1
+        else:
+            prefix, column = "EXPLAIN ", 0
+        async with self.engine.connect() as conn:
+            conn = await conn.execution_options(**{_SKIP_OPTION: True})
+            result = await conn.exec_driver_sql(prefix + statement, parameters)
+            return [str(row[column]) for row in result.all()]
+
+    def report(self, limit: int = 50) -> List[Dict[str, Any]]:
+        """Statement shapes with slow executions, worst p95 first."""
+        slow = [stats for stats in self.stats.values() if stats.slow_count]
+        slow.sort(key=lambda stats: stats.percentile(95), reverse=True)
+        return [stats.to_dict() for stats in slow[:limit]]
+
+
+slow_query_log = SlowQueryLog()
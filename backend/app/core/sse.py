@@ -0,0 +1,21 @@
+import json
+from typing import Any, Optional
+
+SSE_MEDIA_TYPE = "text/event-stream"
+# Keep proxies from buffering the stream
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+
+def format_sse(event: str, data: Any, id: Optional[str] = None) -> str:
+    """Encode one Server-Sent Events message with a JSON payload"""
+    lines = []
+    if id is not None:
+        lines.append(f"id: {id}")
+    lines.append(f"event: {event}")
+    lines.append(f"data: {json.dumps(data, default=str)}")
+    return "\n".join(lines) + "\n\n"
+
+
+def format_sse_comment(text: str = "") -> str:
+    """An SSE comment line; clients ignore it, so it works as a heartbeat"""
+    return f": {text}\n\n"
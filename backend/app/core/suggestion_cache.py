@@ -0,0 +1,172 @@
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Optional, Tuple
+
+from app.core.metrics import record_cache
+
+AI_CACHE_ENABLED = os.getenv("AI_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+AI_CACHE_PATH = os.getenv("AI_CACHE_PATH", "./ai_cache.db")
+# Seconds a cached suggestion stays valid (default: one week)
+AI_CACHE_TTL = float(os.getenv("AI_CACHE_TTL", str(7 * 24 * 3600)))
+AI_CACHE_MEMORY_SIZE = int(os.getenv("AI_CACHE_MEMORY_SIZE", "1024"))
+AI_CACHE_MAX_ENTRIES = int(os.getenv("AI_CACHE_MAX_ENTRIES", "100000"))
+
+# Values for the X-Cache response header
+CACHE_HIT_MEMORY = "HIT-MEMORY"
+CACHE_HIT_DISK = "HIT-DISK"
+CACHE_MISS = "MISS"
+
+
+def normalize_prompt(prompt: str) -> str:
+    """Fold case, Unicode forms and whitespace so near-identical prompts share a key"""
+    text = unicodedata.normalize("NFKC", prompt).casefold()
+    return " ".join(text.split())
+
+
+def cache_key(prompt: str, model: str) -> str:
+    """Key for a prompt/model pair: hash of the model name and normalized prompt"""
+    return hashlib.sha256(f"{model}\x00{normalize_prompt(prompt)}".encode("utf-8")).hexdigest()
+
+
+class SuggestionCache:
+    """
+    Two-tier cache for AI suggestions: an in-memory LRU in front of a SQLite
+    file, so results survive restarts and are shared by workers on one host.
+    Entries expire after `ttl` seconds; the disk tier is trimmed to
+    `max_entries` by least recent use.
+    """
+
+    def __init__(
+        self,
+        path: str = AI_CACHE_PATH,
+        ttl: float = AI_CACHE_TTL,
+        memory_size: int = AI_CACHE_MEMORY_SIZE,
+        max_entries: int = AI_CACHE_MAX_ENTRIES,
+    ):
+        self.path = path
+        self.ttl = ttl
+        self.memory_size = memory_size
+        self.max_entries = max_entries
+        self._memory: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._writes = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS suggestion_cache (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL,
+                    expires_at REAL NOT NULL,
+                    last_access REAL NOT NULL
+                )
+                """
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS ix_suggestion_cache_last_access "
+                "ON suggestion_cache (last_access)"
+            )
+        return self._conn
+
+    async def get(self, key: str) -> Tuple[Optional[Any], str]:
+        """Return (value, cache status); value is None on a miss"""
+        now = time.time()
+        entry = self._memory.get(key)
+        if entry is not None:
+            expires_at, value = entry
+            if expires_at > now:
+                self._memory.move_to_end(key)
+                record_cache("ai_suggestions_memory", True)
+                return value, CACHE_HIT_MEMORY
+            del self._memory[key]
+        record_cache("ai_suggestions_memory", False)
+
+        row = await asyncio.to_thread(self._disk_get, key, now)
+        record_cache("ai_suggestions_disk", row is not None)
+        if row is None:
+            return None, CACHE_MISS
+        expires_at, value = row
+        self._remember(key, expires_at, value)
+        return value, CACHE_HIT_DISK
+
+    async def set(self, key: str, value: Any) -> None:
+        expires_at = time.time() + self.ttl
+        self._remember(key, expires_at, value)
+        await asyncio.to_thread(self._disk_set, key, value, expires_at)
+
+    def _remember(self, key: str, expires_at: float, value: Any) -> None:
+        self._memory[key] = (expires_at, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_size:
+            self._memory.popitem(last=False)
+
+    def _disk_get(self, key: str, now: float) -> Optional[Tuple[float, Any]]:
+        with self._lock:
+            conn = self._connect()
+            row = conn.execute(
+                "SELECT value, expires_at FROM suggestion_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if row[1] <= now:
+                conn.execute("DELETE FROM suggestion_cache WHERE key = ?", (key,))
+                conn.commit()
+                return None
+            conn.execute(
+                "UPDATE suggestion_cache SET last_access = ? WHERE key = ?", (now, key)
+            )
+            conn.commit()
+            return row[1], json.loads(row[0])
+
+    def _disk_set(self, key: str, value: Any, expires_at: float) -> None:
+        with self._lock:
+            conn = self._connect()
+            now = time.time()
+            conn.execute(
+                "INSERT OR REPLACE INTO suggestion_cache (key, value, expires_at, last_access) "
+                "VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value), expires_at, now),
+            )
+            self._writes += 1
+            # Evict in batches rather than on every write
+            if self._writes % 100 == 0:
+                self._evict(conn, now)
+            conn.commit()
+
+    def _evict(self, conn: sqlite3.Connection, now: float) -> None:
+        conn.execute("DELETE FROM suggestion_cache WHERE expires_at <= ?", (now,))
+        conn.execute(
+            """
+            DELETE FROM suggestion_cache WHERE key IN (
+                SELECT key FROM suggestion_cache ORDER BY last_access DESC LIMIT -1 OFFSET ?
+            )
+            """,
+            (self.max_entries,),
+        )
+
+    def evict(self) -> None:
+        """Drop expired entries and trim the disk tier to its size limit now"""
+        with self._lock:
+            conn = self._connect()
+            self._evict(conn, time.time())
+            conn.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+suggestion_cache = SuggestionCache()
@@ -0,0 +1,146 @@
+import asyncio
+import logging
+import os
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import func, select
+
+from app import models
+
+logger = logging.getLogger(__name__)
+
+# Seconds between rebuilds from the database, which pick up writes made by other workers
+TAG_GRAPH_REFRESH_SECONDS = float(os.getenv("TAG_GRAPH_REFRESH_SECONDS", "600"))
+
+METRICS = ("jaccard", "pmi")
+
+
+class TagCooccurrence:
+    """
+    Sparse tag co-occurrence matrix over prompt_tags: for every pair of tags
+    used on the same prompt, the number of prompts carrying both, plus each
+    tag's prompt count. Built with one grouped self-join and kept current as
+    tag associations change, so related tags are computed from the tag's own
+    row without touching the database.
+    """
+
+    def __init__(self):
+        self._pairs: Dict[int, Counter] = defaultdict(Counter)
+        self._counts: Counter = Counter()
+        self._prompts = 0
+        self._task: Optional[asyncio.Task] = None
+
+    def load(self, pairs: Iterable[Tuple[int, int, int]], counts: Iterable[Tuple[int, int]], prompts: int) -> None:
+        """Replace the matrix with (tag a, tag b, prompts) pairs (a < b) and (tag, prompts) counts"""
+        matrix: Dict[int, Counter] = defaultdict(Counter)
+        for a, b, together in pairs:
+            matrix[a][b] = together
+            matrix[b][a] = together
+        self._pairs = matrix
+        self._counts = Counter(dict(counts))
+        self._prompts = prompts
+
+    def add_prompt(self, tag_ids: Iterable[int]) -> None:
+        """Count a prompt carrying `tag_ids`"""
+        self._update(set(tag_ids), 1)
+
+    def remove_prompt(self, tag_ids: Iterable[int]) -> None:
+        self._update(set(tag_ids), -1)
+
+    def _update(self, tag_ids: set, delta: int) -> None:
+        if not tag_ids:
+            return
+        self._prompts += delta
+        for a in tag_ids:
+            self._counts[a] += delta
+            if self._counts[a] <= 0:
+                del self._counts[a]
+            for b in tag_ids:
+                if a != b:
+                    row = self._pairs[a]
+                    row[b] += delta
+                    if row[b] <= 0:
+                        del row[b]
+
+    def remove_tag(self, tag_id: int) -> None:
+        for other in self._pairs.pop(tag_id, {}):
+            self._pairs[other].pop(tag_id, None)
+        self._counts.pop(tag_id, None)
+
+    def related(self, tag_id: int, limit: int = 10, metric: str = "jaccard", min_count: int = 1) -> List[dict]:
+        """
+        Tags most associated with `tag_id`, each with the number of prompts
+        sharing both tags and a score: Jaccard (shared / either) or PMI
+        (log of how much more often they co-occur than if independent).
+        """
+        row = self._pairs.get(tag_id)
+        count = self._counts.get(tag_id, 0)
+        if not row or not count:
+            return []
+        others = np.fromiter(row.keys(), dtype=np.int64, count=len(row))
+        together = np.fromiter(row.values(), dtype=np.float64, count=len(row))
+        other_counts = np.fromiter((self._counts.get(o, 0) for o in others), dtype=np.float64, count=len(row))
+
+        if metric == "pmi":
+            scores = np.log(together * max(self._prompts, 1) / (count * np.maximum(other_counts, 1)))
+        else:
+            scores = together / np.maximum(count + other_counts - together, 1)
+        scores[together < min_count] = -np.inf
+
+        k = min(limit, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.lexsort((others[top], -scores[top]))]
+        return [
+            {"id": int(others[i]), "count": int(together[i]), "score": round(float(scores[i]), 4)}
+            for i in top if np.isfinite(scores[i])
+        ]
+
+    async def reload(self, session_factory) -> None:
+        """Rebuild from prompt_tags: one grouped self-join for the pairs, one group-by for the counts"""
+        a = models.prompt_tags.alias("a")
+        b = models.prompt_tags.alias("b")
+        pairs_stmt = (
+            select(a.c.tag_id, b.c.tag_id, func.count())
+            .join(b, (a.c.prompt_id == b.c.prompt_id) & (a.c.tag_id < b.c.tag_id))
+            .group_by(a.c.tag_id, b.c.tag_id)
+        )
+        counts_stmt = (
+            select(models.prompt_tags.c.tag_id, func.count())
+            .group_by(models.prompt_tags.c.tag_id)
+        )
+        prompts_stmt = select(func.count(func.distinct(models.prompt_tags.c.prompt_id)))
+        async with session_factory() as session:
+            pairs = (await session.execute(pairs_stmt)).all()
+            counts = (await session.execute(counts_stmt)).all()
+            prompts = (await session.execute(prompts_stmt)).scalar() or 0
+        self.load(pairs, counts, prompts)
+
+    async def start(self, session_factory, interval: float = TAG_GRAPH_REFRESH_SECONDS) -> None:
+        await self.reload(session_factory)
+        if interval > 0 and self._task is None:
+            self._task = asyncio.create_task(self._refresh_loop(session_factory, interval))
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _refresh_loop(self, session_factory, interval: float) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.reload(session_factory)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Tag co-occurrence reload failed")
+
+
+tag_graph = TagCooccurrence()
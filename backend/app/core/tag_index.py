@@ -0,0 +1,124 @@
+import asyncio
+import heapq
+import logging
+import os
+from bisect import bisect_left, insort
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import func, select
+
+from app import models
+
+logger = logging.getLogger(__name__)
+
+# Seconds between reloads from the database, which pick up writes made by other workers
+TAG_INDEX_REFRESH_SECONDS = float(os.getenv("TAG_INDEX_REFRESH_SECONDS", "300"))
+# Prefixes whose results are memoized until the next change
+_CACHE_SIZE = 1024
+
+
+class TagPrefixIndex:
+    """
+    In-memory tag autocomplete: tag names sorted case-insensitively, so the
+    tags starting with a prefix are one contiguous range found by binary
+    search, ranked by how many prompts use each tag. Results for a prefix are
+    memoized until the index changes, which keeps short, popular prefixes
+    cheap.
+    """
+
+    def __init__(self):
+        self._keys: List[Tuple[str, int]] = []  # (lowercased name, tag id), sorted
+        self._tags: Dict[int, List] = {}  # tag id -> [name, usage count]
+        self._cache: Dict[Tuple[str, int], List[dict]] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def __len__(self) -> int:
+        return len(self._tags)
+
+    def load(self, tags: Iterable[Tuple[int, str, int]]) -> None:
+        """Replace the index with (id, name, usage count) rows"""
+        entries = {tag_id: [name, count] for tag_id, name, count in tags}
+        self._keys = sorted((name.lower(), tag_id) for tag_id, (name, _) in entries.items())
+        self._tags = entries
+        self._cache.clear()
+
+    def add(self, tag_id: int, name: str, usage: int = 0) -> None:
+        """Add a tag, or adjust its usage if it is already indexed"""
+        entry = self._tags.get(tag_id)
+        if entry is None:
+            self._tags[tag_id] = [name, max(0, usage)]
+            insort(self._keys, (name.lower(), tag_id))
+        else:
+            entry[1] = max(0, entry[1] + usage)
+        self._cache.clear()
+
+    def remove(self, tag_id: int) -> None:
+        entry = self._tags.pop(tag_id, None)
+        if entry is None:
+            return
+        key = (entry[0].lower(), tag_id)
+        i = bisect_left(self._keys, key)
+        if i < len(self._keys) and self._keys[i] == key:
+            del self._keys[i]
+        self._cache.clear()
+
+    def suggest(self, prefix: str, limit: int = 10) -> List[dict]:
+        """Most used tags whose name starts with `prefix` (case-insensitive)"""
+        prefix = prefix.strip().lower()
+        cache_key = (prefix, limit)
+        cached = self._cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+        lo = bisect_left(self._keys, (prefix,))
+        hi = bisect_left(self._keys, (prefix + "\U0010ffff",), lo)
+        ids = (tag_id for _, tag_id in self._keys[lo:hi])
+        # Most used first; ties keep alphabetical order
+        top = heapq.nsmallest(limit, ids, key=lambda tag_id: -self._tags[tag_id][1])
+        result = [
+            {"id": tag_id, "name": self._tags[tag_id][0], "usage_count": self._tags[tag_id][1]}
+            for tag_id in top
+        ]
+        if len(self._cache) >= _CACHE_SIZE:
+            self._cache.clear()
+        self._cache[cache_key] = result
+        return result
+
+    async def reload(self, session_factory) -> None:
+        """Rebuild from every tag and its prompt count in the database"""
+        stmt = (
+            select(models.Tag.id, models.Tag.name, func.count(models.prompt_tags.c.prompt_id))
+            .outerjoin(models.prompt_tags, models.prompt_tags.c.tag_id == models.Tag.id)
+            .group_by(models.Tag.id, models.Tag.name)
+        )
+        async with session_factory() as session:
+            rows = (await session.execute(stmt)).all()
+        self.load(rows)
+
+    async def start(self, session_factory, interval: float = TAG_INDEX_REFRESH_SECONDS) -> None:
+        await self.reload(session_factory)
+        if interval > 0 and self._task is None:
+            self._task = asyncio.create_task(self._refresh_loop(session_factory, interval))
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _refresh_loop(self, session_factory, interval: float) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.reload(session_factory)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Tag index reload failed")
+
+
+tag_index = TagPrefixIndex()
@@ -0,0 +1,251 @@
+import asyncio
+import logging
+import math
+import os
+import re
+import threading
+import time
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import select
+
+from app import models
+from app.core.cold_storage import full_content, prompt_texts
+
+logger = logging.getLogger(__name__)
+
+TAG_SUGGESTER_ENABLED = os.getenv("TAG_SUGGESTER_ENABLED", "true").lower() in ("1", "true", "yes")
+# Seconds between full retrains from the database (picks up edits and deletes)
+TAG_SUGGESTER_RETRAIN_SECONDS = float(os.getenv("TAG_SUGGESTER_RETRAIN_SECONDS", "3600"))
+# Seconds between folding newly created prompts into the index (in a worker thread)
+TAG_SUGGESTER_REFRESH_SECONDS = float(os.getenv("TAG_SUGGESTER_REFRESH_SECONDS", "30"))
+# Weight of tag co-occurrence relative to text similarity
+TAG_SUGGESTER_COOCCURRENCE_WEIGHT = float(os.getenv("TAG_SUGGESTER_COOCCURRENCE_WEIGHT", "0.3"))
+
+_TOKEN = re.compile(r"[a-z0-9][a-z0-9+#_-]{1,}")
+_STOP_WORDS = frozenset(
+    "the and for with that this from your you are was were will would can could should "
+    "into about over than then them they their there these those what which when where "
+    "who how all any each more most other some such only own same not but its it's our "
+    "have has had been being does did doing also just very use using".split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    return [t for t in _TOKEN.findall(text.lower()) if t not in _STOP_WORDS]
+
+
+class _Index:
+    """Immutable scoring snapshot; replaced wholesale so readers never see a partial build"""
+
+    def __init__(
+        self,
+        tags: List[str],
+        idf: Dict[str, float],
+        postings: Dict[str, Tuple[np.ndarray, np.ndarray]],
+        cooccurrence: Dict[str, Tuple[np.ndarray, np.ndarray]],
+    ):
+        self.tags = tags
+        self.tag_ids = {name: i for i, name in enumerate(tags)}
+        self.idf = idf
+        self.postings = postings
+        # tag -> (ids of tags seen with it, P(other | tag))
+        self.cooccurrence = cooccurrence
+
+
+class TagSuggester:
+    """
+    Suggests tags for free text from the existing prompt/tag corpus.
+
+    Each tag is a TF-IDF vector over the words of the prompts carrying it,
+    stored as an inverted index of NumPy arrays (term -> tag ids, weights), so
+    scoring touches only the query's terms. Tags that often appear together
+    with the best text matches, or with tags the prompt already has, are
+    boosted by their co-occurrence probability.
+
+    `add_prompt` only queues a newly created prompt: the background task
+    folds queued prompts in and rebuilds the index in a worker thread every
+    TAG_SUGGESTER_REFRESH_SECONDS, then swaps it in, so neither requests nor
+    the event loop ever wait on a rebuild. `train` reloads everything from the
+    database every TAG_SUGGESTER_RETRAIN_SECONDS.
+    """
+
+    def __init__(self, cooccurrence_weight: float = TAG_SUGGESTER_COOCCURRENCE_WEIGHT):
+        self.cooccurrence_weight = cooccurrence_weight
+        # Held by builds (load, fold_pending), which run off the event loop
+        self._lock = threading.Lock()
+        self._reset()
+        self._index = _Index([], {}, {}, {})
+        # (text, tags) of prompts created since the last build; appends are atomic
+        self._pending: List[Tuple[str, List[str]]] = []
+        self._task: Optional[asyncio.Task] = None
+
+    def _reset(self) -> None:
+        self._tag_terms: Dict[str, Counter] = defaultdict(Counter)
+        self._tag_counts: Counter = Counter()
+        self._pair_counts: Dict[str, Counter] = defaultdict(Counter)
+        self._doc_freq: Counter = Counter()
+        self._documents = 0
+
+    def _add(self, text: str, tags: Iterable[str]) -> None:
+        tags = sorted({t for t in tags if t})
+        terms = Counter(tokenize(text))
+        self._documents += 1
+        self._doc_freq.update(terms.keys())
+        for tag in tags:
+            self._tag_terms[tag].update(terms)
+            self._tag_counts[tag] += 1
+            for other in tags:
+                if other != tag:
+                    self._pair_counts[tag][other] += 1
+
+    def add_prompt(self, text: str, tags: Iterable[str]) -> None:
+        """Queue a newly created prompt for the next background refresh (never blocks)"""
+        self._pending.append((text, list(tags)))
+
+    def _take_pending(self) -> List[Tuple[str, List[str]]]:
+        pending, self._pending = self._pending, []
+        return pending
+
+    def fold_pending(self) -> int:
+        """
+        Add queued prompts to the corpus statistics and swap in a rebuilt index.
+        Blocking: call from a worker thread. Returns the number of prompts added.
+        """
+        with self._lock:
+            pending = self._take_pending()
+            if pending:
+                for text, tags in pending:
+                    self._add(text, tags)
+                self._rebuild()
+        return len(pending)
+
+    def load(self, documents: Iterable[Tuple[str, Iterable[str]]]) -> None:
+        """Replace the corpus with (text, tag names) pairs and rebuild the index"""
+        with self._lock:
+            self._reset()
+            for text, tags in documents:
+                self._add(text, tags)
+            self._rebuild()
+
+    def _rebuild(self) -> None:
+        n = self._documents
+        idf = {term: math.log((1 + n) / (1 + df)) + 1.0 for term, df in self._doc_freq.items()}
+        tags = sorted(self._tag_terms)
+        term_tags: Dict[str, List[int]] = defaultdict(list)
+        term_weights: Dict[str, List[float]] = defaultdict(list)
+        for tag_id, tag in enumerate(tags):
+            terms = self._tag_terms[tag]
+            weights = {t: (1.0 + math.log(c)) * idf[t] for t, c in terms.items()}
+            norm = math.sqrt(sum(w * w for w in weights.values())) or 1.0
+            for term, weight in weights.items():
+                term_tags[term].append(tag_id)
+                term_weights[term].append(weight / norm)
+        postings = {
+            term: (np.asarray(ids, dtype=np.int32), np.asarray(term_weights[term], dtype=np.float32))
+            for term, ids in term_tags.items()
+        }
+        tag_ids = {name: i for i, name in enumerate(tags)}
+        cooccurrence = {
+            tag: (
+                np.asarray([tag_ids[o] for o in others], dtype=np.int32),
+                np.asarray(list(others.values()), dtype=np.float32) / self._tag_counts[tag],
+            )
+            for tag, others in self._pair_counts.items() if others
+        }
+        self._index = _Index(tags, idf, postings, cooccurrence)
+
+    def suggest(self, text: str, existing: Iterable[str] = (), limit: int = 5) -> List[Tuple[str, float]]:
+        """Ranked (tag, score) suggestions for `text`, excluding tags in `existing`"""
+        index = self._index
+        if not index.tags:
+            return []
+        existing = {t for t in existing if t}
+        scores = np.zeros(len(index.tags), dtype=np.float32)
+
+        terms = Counter(t for t in tokenize(text) if t in index.postings)
+        if terms:
+            query = {t: (1.0 + math.log(c)) * index.idf[t] for t, c in terms.items()}
+            norm = math.sqrt(sum(w * w for w in query.values()))
+            for term, weight in query.items():
+                tag_ids, weights = index.postings[term]
+                scores[tag_ids] += weights * (weight / norm)
+
+        # Seeds for co-occurrence: tags the prompt already has, plus the best text matches
+        seeds = {tag: 1.0 for tag in existing if tag in index.tag_ids}
+        for tag_id in np.argsort(-scores)[:3]:
+            if scores[tag_id] > 0:
+                seeds.setdefault(index.tags[tag_id], float(scores[tag_id]))
+        if seeds and self.cooccurrence_weight:
+            boost = np.zeros_like(scores)
+            for seed, seed_weight in seeds.items():
+                if seed in index.cooccurrence:
+                    tag_ids, probabilities = index.cooccurrence[seed]
+                    boost[tag_ids] += seed_weight * probabilities
+            scores += self.cooccurrence_weight * boost / sum(seeds.values())
+
+        for tag in existing:
+            if tag in index.tag_ids:
+                scores[index.tag_ids[tag]] = 0
+        top = np.argsort(-scores)[:limit]
+        return [(index.tags[i], round(float(scores[i]), 4)) for i in top if scores[i] > 0]
+
+    async def train(self, session_factory) -> None:
+        """Rebuild from every prompt and its tags in the database"""
+        # Queued prompts are committed, so the reads below include them
+        self._take_pending()
+        async with session_factory() as session:
+            prompts = (await session.execute(prompt_texts())).all()
+            pairs = (await session.execute(
+                select(models.prompt_tags.c.prompt_id, models.Tag.name)
+                .join(models.Tag, models.Tag.id == models.prompt_tags.c.tag_id)
+            )).all()
+
+        tags_by_prompt: Dict[int, List[str]] = defaultdict(list)
+        for prompt_id, name in pairs:
+            tags_by_prompt[prompt_id].append(name)
+        documents = [
+            (f"{row.title} {full_content(row)}", tags_by_prompt[row.id])
+            for row in prompts if row.id in tags_by_prompt
+        ]
+        await asyncio.to_thread(self.load, documents)
+
+    async def start(
+        self,
+        session_factory,
+        interval: float = TAG_SUGGESTER_RETRAIN_SECONDS,
+        refresh_interval: float = TAG_SUGGESTER_REFRESH_SECONDS,
+    ) -> None:
+        if not TAG_SUGGESTER_ENABLED or self._task is not None:
+            return
+        self._task = asyncio.create_task(self._retrain_loop(session_factory, interval, refresh_interval))
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _retrain_loop(self, session_factory, interval: float, refresh_interval: float) -> None:
+        next_train = 0.0
+        while True:
+            try:
+                if time.monotonic() >= next_train:
+                    next_train = time.monotonic() + interval
+                    await self.train(session_factory)
+                elif self._pending:
+                    await asyncio.to_thread(self.fold_pending)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Tag suggester training failed")
+            await asyncio.sleep(min(interval, refresh_interval) if refresh_interval > 0 else interval)
+
+
+tag_suggester = TagSuggester()
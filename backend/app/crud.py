@@ -1,102 +1,209 @@
 from datetime import datetime
-from typing import List, Optional, Dict, Any, Union, Set
+from typing import List, Optional, Dict, Any, Union, Set, Tuple
 
 from fastapi import HTTPException, status
-from sqlalchemy import select, or_, and_
+from sqlalchemy import select, or_, and_, func, null
 from sqlalchemy.orm import Session, selectinload
 from sqlalchemy.ext.asyncio import AsyncSession
-from thefuzz import fuzz
 
 from . import models, schemas
+from .core.change_log import DELETE, record_change, settle_cutoff, sync_horizon
+from .core.cold_storage import delete_body, inline_content, load_content, load_contents, write_body
+from .core.events import event_broadcaster
+from .core.prompt_vectors import prompt_vectors
+from .core.read_model import (
+    delete_prompt_view, refresh_prompt_views, update_category_views, update_like_count_view,
+    view_to_dict, write_prompt_view
+)
+from .core.recommender import recommender
+from .core.revisions import delete_revisions, get_revision, get_revisions, record_revision
+from .core.search_index import fuzzy_matches, index_prompt, search_highlights, unindex_prompt
+from .core.tag_graph import tag_graph
+from .core.tag_index import tag_index
+from .core.tag_suggester import tag_suggester
+from .core.write_coordinator import write_coordinator
 
 def calculate_similarity(text1: str, text2: str) -> float:
     """Calculate similarity between two texts (0-100)"""
+    # Imported on first use to keep it off the startup path
+    from thefuzz import fuzz
+
     return fuzz.token_sort_ratio(text1.lower(), text2.lower())
 
+def prompt_filters(
+    search: Optional[str] = None,
+    category_id: Optional[int] = None,
+    tag: Optional[str] = None,
+    matches=None,
+    source=models.Prompt
+) -> list:
+    """
+    WHERE clauses on `source` (models.Prompt, or the models.PromptView read
+    model) for the prompt list's search, category and tag filters.
+    Search goes through the trigram index, which matches whole words and their
+    misspellings; pass `matches` to reuse a fuzzy_matches subquery that is
+    already joined. Only a query without trigrams (or with trigram search
+    disabled) falls back to a substring match, which scans every prompt.
+    """
+    filters = []
+    if search:
+        if matches is None:
+            matches = fuzzy_matches(search)
+            if matches is None:
+                filters.append(or_(
+                    source.title.ilike(f"%{search}%"),
+                    source.content.ilike(f"%{search}%")
+                ))
+            else:
+                filters.append(source.id.in_(select(matches.c.prompt_id)))
+        else:
+            filters.append(matches.c.prompt_id.is_not(None))
+    if category_id is not None:
+        filters.append(source.category_id == category_id)
+    if tag:
+        filters.append(
+            source.id.in_(
+                select(models.prompt_tags.c.prompt_id)
+                .join(models.Tag, models.Tag.id == models.prompt_tags.c.tag_id)
+                .where(func.lower(models.Tag.name) == tag.lower())
+            )
+        )
+    return filters
+
+async def get_prompt_facets(
+    db: AsyncSession,
+    search: Optional[str] = None,
+    category_id: Optional[int] = None,
+    tag: Optional[str] = None,
+    tag_limit: int = 10
+) -> dict:
+    """
+    Count the prompts matching the list filters, by category and by tag, with
+    grouped queries (no prompts are loaded). Each facet ignores its own filter,
+    so the counts show what selecting a different category or tag would give.
+    """
+    try:
+        total = (await db.execute(
+            select(func.count(models.Prompt.id)).where(*prompt_filters(search, category_id, tag))
+        )).scalar() or 0
+
+        category_count = func.count(models.Prompt.id).label("count")
+        stmt = (
+            select(models.Category.id, models.Category.name, category_count)
+            .join(models.Prompt, models.Prompt.category_id == models.Category.id)
+            .where(*prompt_filters(search, None, tag))
+            .group_by(models.Category.id, models.Category.name)
+            .order_by(category_count.desc(), models.Category.name)
+        )
+        categories = (await db.execute(stmt)).all()
+
+        tag_count = func.count(models.prompt_tags.c.prompt_id).label("count")
+        stmt = (
+            select(models.Tag.id, models.Tag.name, tag_count)
+            .join(models.prompt_tags, models.prompt_tags.c.tag_id == models.Tag.id)
+            .where(models.prompt_tags.c.prompt_id.in_(
+                select(models.Prompt.id).where(*prompt_filters(search, category_id, None))
+            ))
+            .group_by(models.Tag.id, models.Tag.name)
+            .order_by(tag_count.desc(), models.Tag.name)
+            .limit(tag_limit)
+        )
+        tags = (await db.execute(stmt)).all()
+
+        return {
+            "total": total,
+            "categories": [{"id": row.id, "name": row.name, "count": row.count} for row in categories],
+            "tags": [{"id": row.id, "name": row.name, "count": row.count} for row in tags],
+        }
+
+    except Exception as e:
+        print(f"Error in get_prompt_facets: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error counting prompt facets: {str(e)}"
+        )
+
 async def get_prompts(
     db: AsyncSession, 
     skip: int = 0, 
     limit: int = 100, 
     search: Optional[str] = None,
-    user_id: Optional[str] = None
+    user_id: Optional[str] = None,
+    category_id: Optional[int] = None,
+    tag: Optional[str] = None,
+    include_content: bool = True,
+    prompt_ids: Optional[List[int]] = None,
+    full_content: bool = False
 ) -> List[dict]:
     """
-    Get all prompts with optional search, including category and tags.
+    Get all prompts with optional search, category and tag filters, including category and tags.
     If user_id is provided, will include like status for that user.
+    Searches add a highlighted title and a content snippet around the matches;
+    with include_content=False the full content is left out.
+    Large prompts carry a content preview unless full_content is set.
+    prompt_ids limits the result to those prompts.
     Returns a list of prompt dictionaries.
     """
     try:
-        # Base query for prompts with category and tags
+        # Prompts with their category and tags come from the read model in one query.
+        # Plain rows rather than entities, so writes earlier in the session are always seen
+        view = models.PromptView
+        columns = list(view.__table__.c)
+        if not include_content:
+            # Don't read content at all (it is most of a row's bytes); rows keep the field as NULL
+            columns = [c for c in columns if c.name != "content"] + [null().label("content")]
         stmt = (
-            select(models.Prompt)
-            .options(
-                selectinload(models.Prompt.category),
-                selectinload(models.Prompt.tags)
-            )
+            select(*columns)
             .offset(skip)
             .limit(limit)
-            .order_by(models.Prompt.created_at.desc())
+            .order_by(view.created_at.desc())
         )
         
-        # Apply search filter if provided
-        if search:
-            stmt = stmt.where(
-                or_(
-                    models.Prompt.title.ilike(f"%{search}%"),
-                    models.Prompt.content.ilike(f"%{search}%")
-                )
+        # Rank searches by trigram similarity, so close spellings come first
+        matches = fuzzy_matches(search) if search else None
+        if matches is not None:
+            stmt = (
+                stmt.outerjoin(matches, matches.c.prompt_id == view.id)
+                .order_by(None)
+                .order_by(func.coalesce(matches.c.score, 0).desc(), view.created_at.desc())
             )
         
+        # Filter in SQL so pagination applies to the filtered set and the
+        # (category_id, created_at) / tag indexes can be used
+        stmt = stmt.where(*prompt_filters(search, category_id, tag, matches, source=view))
+        if prompt_ids is not None:
+            stmt = stmt.where(view.id.in_(prompt_ids))
+        
         # Execute the query
         result = await db.execute(stmt)
-        prompts = result.scalars().all()
+        prompts = result.all()
         
         # Get liked prompt IDs for the user if user_id is provided
         user_liked_prompt_ids = set()
-        if user_id:
+        if user_id and prompts:
             stmt = select(models.PromptLike.prompt_id).where(
-                models.PromptLike.user_id == user_id
+                models.PromptLike.user_id == user_id,
+                models.PromptLike.prompt_id.in_([prompt.id for prompt in prompts])
             )
             result = await db.execute(stmt)
             user_liked_prompt_ids = {row[0] for row in result.all()}
         
+        highlights = {}
+        if search and prompts:
+            highlights = await search_highlights(db, search, [prompt.id for prompt in prompts])
+        
+        bodies = {}
+        if full_content and include_content:
+            bodies = await load_contents(db, [prompt.id for prompt in prompts if prompt.content_compressed])
+        
         # Prepare the response
         prompt_list = []
         for prompt in prompts:
-            # Prepare category data
-            category_data = None
-            if prompt.category:
-                category_data = {
-                    "id": prompt.category.id,
-                    "name": prompt.category.name,
-                    "description": prompt.category.description,
-                    "created_at": prompt.category.created_at
-                }
-            
-            # Prepare tags data
-            tags_data = []
-            if prompt.tags:
-                for tag in prompt.tags:
-                    tags_data.append({
-                        "id": tag.id,
-                        "name": tag.name,
-                        "created_at": tag.created_at
-                    })
-            
-            prompt_dict = {
-                "id": prompt.id,
-                "title": prompt.title,
-                "content": prompt.content,
-                "category_id": prompt.category_id,
-                "created_at": prompt.created_at,
-                "updated_at": prompt.updated_at,
-                "like_count": prompt.like_count or 0,
-                "user_id": prompt.user_id,
-                "category": category_data,
-                "tags": tags_data,
-                "tag_names": [tag.name for tag in (prompt.tags or [])],
-                "is_liked": prompt.id in user_liked_prompt_ids
-            }
+            prompt_dict = view_to_dict(prompt, is_liked=prompt.id in user_liked_prompt_ids)
+            if prompt.id in bodies:
+                prompt_dict["content"], prompt_dict["content_truncated"] = bodies[prompt.id], False
+            if prompt.id in highlights:
+                prompt_dict["title_highlight"], prompt_dict["snippet"] = highlights[prompt.id]
             prompt_list.append(prompt_dict)
         
         return prompt_list
@@ -119,18 +226,10 @@ async def get_prompt(
     Returns a dictionary with the prompt data.
     """
     try:
-        # Get the prompt with category and tags
-        stmt = (
-            select(models.Prompt)
-            .options(
-                selectinload(models.Prompt.category),
-                selectinload(models.Prompt.tags)
-            )
-            .where(models.Prompt.id == prompt_id)
-        )
-        
+        # The read model row already carries the category and tags
+        stmt = select(models.PromptView.__table__).where(models.PromptView.id == prompt_id)
         result = await db.execute(stmt)
-        prompt = result.scalars().first()
+        prompt = result.first()
         
         if not prompt:
             return None
@@ -140,44 +239,12 @@ async def get_prompt(
         if user_id:
             is_liked = await is_prompt_liked_by_user(db, prompt_id, user_id)
         
-        # Get category data
-        category_data = None
-        if prompt.category:
-            category_data = {
-                "id": prompt.category.id,
-                "name": prompt.category.name,
-                "description": prompt.category.description,
-                "created_at": prompt.category.created_at
-            }
-        
-        # Get tags data
-        tags_data = []
-        if hasattr(prompt, 'tags') and prompt.tags:
-            tags_data = [
-                {
-                    "id": tag.id, 
-                    "name": tag.name,
-                    "created_at": tag.created_at
-                } 
-                for tag in prompt.tags
-            ]
-        
-        # Create the response dictionary
-        response = {
-            "id": prompt.id,
-            "title": prompt.title,
-            "content": prompt.content,
-            "category_id": prompt.category_id,
-            "user_id": prompt.user_id,
-            "like_count": prompt.like_count,
-            "created_at": prompt.created_at,
-            "updated_at": prompt.updated_at,
-            "category": category_data,
-            "tags": tags_data,
-            "is_liked": is_liked
-        }
-        
-        return response
+        prompt_dict = view_to_dict(prompt, is_liked=is_liked)
+        # Large content is only read (and decompressed) for the detail view
+        if prompt.content_compressed:
+            prompt_dict["content"] = await load_content(db, prompt_id)
+            prompt_dict["content_truncated"] = False
+        return prompt_dict
         
     except Exception as e:
         print(f"Error in get_prompt: {str(e)}")
@@ -186,6 +253,46 @@ async def get_prompt(
             detail=f"Error retrieving prompt: {str(e)}"
         )
 
+async def get_related_prompts(db: AsyncSession, prompt_id: int, limit: int = 5) -> Optional[List[dict]]:
+    """
+    Prompts most similar to a prompt by content, from the local vector index.
+    Returns None if the prompt doesn't exist.
+    """
+    if await db.get(models.Prompt, prompt_id) is None:
+        return None
+    return await _scored_prompt_summaries(db, prompt_vectors.related(prompt_id, limit=limit))
+
+async def get_recommended_prompts(db: AsyncSession, user_id: str, limit: int = 10) -> List[dict]:
+    """
+    Prompts recommended to a user from the prompts they liked, via the
+    item-item recommender trained on everyone's likes.
+    """
+    liked = await get_user_liked_prompt_ids(db, user_id)
+    # Ask for a few extra in case prompts were deleted since the last training
+    recommended = recommender.recommend(liked, limit=limit + 5)
+    return (await _scored_prompt_summaries(db, recommended))[:limit]
+
+async def _scored_prompt_summaries(db: AsyncSession, scored: List[Tuple[int, float]]) -> List[dict]:
+    """Summaries of (prompt id, score) pairs in the given order, skipping prompts that no longer exist"""
+    if not scored:
+        return []
+    stmt = (
+        select(models.Prompt)
+        .options(selectinload(models.Prompt.tags))
+        .where(models.Prompt.id.in_([prompt_id for prompt_id, _ in scored]))
+    )
+    prompts = {prompt.id: prompt for prompt in (await db.execute(stmt)).scalars().all()}
+    return [
+        {
+            "id": prompt_id,
+            "title": prompts[prompt_id].title,
+            "category_id": prompts[prompt_id].category_id,
+            "tag_names": [tag.name for tag in prompts[prompt_id].tags],
+            "score": score
+        }
+        for prompt_id, score in scored if prompt_id in prompts
+    ]
+
 async def create_prompt(
     db: AsyncSession, 
     prompt: schemas.PromptCreate, 
@@ -194,89 +301,26 @@ async def create_prompt(
     """
     Create a new prompt with optional category and tags.
     Returns the created prompt or a dictionary with similar prompt info if a similar prompt exists.
+    When write coalescing is enabled, the insert shares a commit with concurrent writes.
     """
     try:
-        # First, check if category exists
-        stmt = select(models.Category).where(models.Category.id == prompt.category_id)
-        result = await db.execute(stmt)
-        category = result.scalar_one_or_none()
-        
-        if not category:
-            raise HTTPException(status_code=404, detail="Category not found")
-        
-        # Create the prompt
-        db_prompt = models.Prompt(
-            title=prompt.title,
-            content=prompt.content,
-            category_id=prompt.category_id,
-            user_id=user_id,
-            like_count=0,
-            created_at=datetime.utcnow(),
-            updated_at=datetime.utcnow()
+        result, created_tags = await write_coordinator.run(
+            db, lambda session: stage_prompt(session, prompt, user_id)
         )
-        
-        db.add(db_prompt)
-        await db.flush()  # Get the ID
-        
-        # Handle tags if provided
-        if hasattr(prompt, 'tag_names') and prompt.tag_names:
-            tag_objs = []
-            for tag_name in prompt.tag_names:
-                tag_name = tag_name.strip()
-                if not tag_name:
-                    continue
-                    
-                # Check if tag exists
-                tag_stmt = select(models.Tag).where(models.Tag.name == tag_name)
-                tag_result = await db.execute(tag_stmt)
-                tag = tag_result.scalar_one_or_none()
-                
-                # Create tag if it doesn't exist
-                if not tag:
-                    tag = models.Tag(name=tag_name, created_at=datetime.utcnow())
-                    db.add(tag)
-                    await db.flush()
-                
-                tag_objs.append(tag)
-            
-            # Create association objects for the many-to-many relationship
-            for tag in tag_objs:
-                stmt = select(models.prompt_tags).where(
-                    models.prompt_tags.c.prompt_id == db_prompt.id,
-                    models.prompt_tags.c.tag_id == tag.id
-                )
-                result = await db.execute(stmt)
-                if not result.scalar_one_or_none():
-                    stmt = models.prompt_tags.insert().values(
-                        prompt_id=db_prompt.id,
-                        tag_id=tag.id
-                    )
-                    await db.execute(stmt)
-        
-        # Commit the transaction
-        await db.commit()
-        
-        # Build the response
-        response = {
-            "id": db_prompt.id,
-            "title": db_prompt.title,
-            "content": db_prompt.content,
-            "category_id": db_prompt.category_id,
-            "user_id": db_prompt.user_id,
-            "like_count": db_prompt.like_count,
-            "created_at": db_prompt.created_at,
-            "updated_at": db_prompt.updated_at,
-            "category": {
-                "id": category.id,
-                "name": category.name,
-                "description": category.description,
-                "created_at": category.created_at
-            },
-            "tags": [{"id": tag.id, "name": tag.name, "created_at": tag.created_at} for tag in tag_objs],
-            "is_liked": False
-        }
-        
-        return response
+        # Keep the local tag suggester current between background retrains
+        tag_suggester.add_prompt(
+            f"{result['title']} {result['content']}", [tag["name"] for tag in result["tags"]]
+        )
+        for tag in result["tags"]:
+            tag_index.add(tag["id"], tag["name"], 1)
+        tag_graph.add_prompt(tag["id"] for tag in result["tags"])
+        prompt_vectors.upsert(result["id"], f"{result['title']} {result['content']}", result["updated_at"])
+        for tag_id, name in created_tags:
+            event_broadcaster.publish("tag.created", {"id": tag_id, "name": name})
+        event_broadcaster.publish("prompt.created", {
+            "id": result["id"], "category_id": result["category_id"], "tag_ids": [tag["id"] for tag in result["tags"]]
+        })
+        return result
             
     except HTTPException:
         await db.rollback()
@@ -289,6 +333,94 @@ async def create_prompt(
             detail=f"Error creating prompt: {str(e)}"
         )
 
+async def stage_prompt(
+    db: AsyncSession, 
+    prompt: schemas.PromptCreate, 
+    user_id: Optional[str] = None
+) -> Tuple[dict, List[Tuple[int, str]]]:
+    """
+    Add a new prompt with its tags to the session without committing.
+    Returns the prompt in the standard response format, and the (id, name)
+    of tags created for it, for the caller to announce after the commit.
+    """
+    # First, check if category exists
+    stmt = select(models.Category).where(models.Category.id == prompt.category_id)
+    result = await db.execute(stmt)
+    category = result.scalar_one_or_none()
+    
+    if not category:
+        raise HTTPException(status_code=404, detail="Category not found")
+    
+    # Create the prompt; large content goes to cold storage, leaving a preview inline
+    content, compressed = inline_content(prompt.content)
+    db_prompt = models.Prompt(
+        title=prompt.title,
+        content=content,
+        content_compressed=compressed,
+        category_id=prompt.category_id,
+        user_id=user_id,
+        like_count=0,
+        created_at=datetime.utcnow(),
+        updated_at=datetime.utcnow()
+    )
+    
+    db.add(db_prompt)
+    await db.flush()  # Get the ID
+    if compressed:
+        await write_body(db, db_prompt.id, prompt.content)
+    await index_prompt(db, db_prompt.id, db_prompt.title, prompt.content)
+    await record_revision(db, db_prompt.id, db_prompt.title, prompt.content, user_id=user_id)
+    
+    # Handle tags if provided
+    tag_objs = []
+    created_tags = []
+    if hasattr(prompt, 'tag_names') and prompt.tag_names:
+        for tag_name in prompt.tag_names:
+            tag_name = tag_name.strip()
+            if not tag_name:
+                continue
+                
+            tag, created = await get_or_create_tag(db, tag_name)
+            if created:
+                created_tags.append((tag.id, tag.name))
+            tag_objs.append(tag)
+        
+        # Create association objects for the many-to-many relationship
+        for tag in tag_objs:
+            stmt = select(models.prompt_tags).where(
+                models.prompt_tags.c.prompt_id == db_prompt.id,
+                models.prompt_tags.c.tag_id == tag.id
+            )
+            result = await db.execute(stmt)
+            if not result.scalar_one_or_none():
+                stmt = models.prompt_tags.insert().values(
+                    prompt_id=db_prompt.id,
+                    tag_id=tag.id
+                )
+                await db.execute(stmt)
+    await record_change(db, "prompt", [db_prompt.id])
+    await write_prompt_view(db, db_prompt, category, tag_objs, created=True)
+    
+    # Build the response
+    return {
+        "id": db_prompt.id,
+        "title": db_prompt.title,
+        "content": prompt.content,
+        "category_id": db_prompt.category_id,
+        "user_id": db_prompt.user_id,
+        "like_count": db_prompt.like_count,
+        "created_at": db_prompt.created_at,
+        "updated_at": db_prompt.updated_at,
+        "category": {
+            "id": category.id,
+            "name": category.name,
+            "description": category.description,
+            "created_at": category.created_at
+        },
+        "tags": [{"id": tag.id, "name": tag.name, "created_at": tag.created_at} for tag in tag_objs],
+        "is_liked": False
+    }, created_tags
+
 
 async def update_prompt(
     db: AsyncSession, 
@@ -323,8 +455,11 @@ async def update_prompt(
                 detail="Not authorized to update this prompt"
             )
             
+        # Large prompts keep only a preview inline; compare against the full text
+        current_content = await load_content(db, db_prompt.id) if db_prompt.content_compressed else db_prompt.content
+        
         # Check for similar prompts if content is being updated
-        if prompt.content and prompt.content != db_prompt.content:
+        if prompt.content and prompt.content != current_content:
             stmt = select(models.Prompt).where(
                 and_(
                     or_(
@@ -337,10 +472,12 @@ async def update_prompt(
             
             result = await db.execute(stmt)
             existing_prompts = result.scalars().all()
+            bodies = await load_contents(db, [p.id for p in existing_prompts if p.content_compressed])
             
             # Check for similar prompts
             for existing_prompt in existing_prompts:
-                similarity = calculate_similarity(prompt.content, existing_prompt.content)
+                existing_content = bodies.get(existing_prompt.id, existing_prompt.content)
+                similarity = calculate_similarity(prompt.content, existing_content)
                 if similarity > 80:  # Threshold for considering prompts similar
                     return {
                         "similar_prompt_id": existing_prompt.id,
@@ -350,9 +487,22 @@ async def update_prompt(
         # Update prompt fields
         update_data = prompt.dict(exclude_unset=True)
         
+        # The state being replaced, kept as the base of the new revision
+        previous = None
+        if 'title' in update_data or 'content' in update_data:
+            previous = {
+                "title": db_prompt.title,
+                "content": current_content,
+                "user_id": db_prompt.user_id,
+                "created_at": db_prompt.updated_at or db_prompt.created_at,
+            }
+        
         # Handle tag updates if provided
+        old_tags = new_tags = None
+        created_tags = []
         if 'tag_names' in update_data:
             tag_names = update_data.pop('tag_names')
+            old_tags = [(tag.id, tag.name) for tag in db_prompt.tags]
             
             # Clear existing tags
             db_prompt.tags = []
@@ -360,9 +510,12 @@ async def update_prompt(
             
             # Add new tags
             for tag_name in tag_names:
-                tag = await get_or_create_tag(db, tag_name.strip())
+                tag, created = await get_or_create_tag(db, tag_name.strip())
+                if created:
+                    created_tags.append((tag.id, tag.name))
                 if tag not in db_prompt.tags:
                     db_prompt.tags.append(tag)
+            new_tags = [(tag.id, tag.name) for tag in db_prompt.tags]
         
         # Update other fields
         for field, value in update_data.items():
@@ -371,8 +524,44 @@ async def update_prompt(
         
         db_prompt.updated_at = datetime.utcnow()
         
+        # Move the content into or out of cold storage as its size requires
+        content = None
+        if 'content' in update_data:
+            content = update_data['content']
+            inline, compressed = inline_content(content)
+            if compressed:
+                await write_body(db, db_prompt.id, content, replace=db_prompt.content_compressed)
+            elif db_prompt.content_compressed:
+                await delete_body(db, db_prompt.id)
+            db_prompt.content, db_prompt.content_compressed = inline, compressed
+        elif 'title' in update_data:
+            content = previous["content"]
+        
+        if content is not None:
+            await index_prompt(db, db_prompt.id, db_prompt.title, content)
+            if (db_prompt.title, content) != (previous["title"], previous["content"]):
+                await record_revision(db, db_prompt.id, db_prompt.title, content, user_id=user_id, previous=previous)
+        await record_change(db, "prompt", [db_prompt.id])
+        category = None
+        if db_prompt.category_id is not None:
+            category = await db.get(models.Category, db_prompt.category_id)
+        await write_prompt_view(db, db_prompt, category, db_prompt.tags)
+        
         await db.commit()
         await db.refresh(db_prompt)
+
+        if content is not None:
+            prompt_vectors.upsert(db_prompt.id, f"{db_prompt.title} {content}", db_prompt.updated_at)
+        if old_tags is not None:
+            for tag_id, name in old_tags:
+                tag_index.add(tag_id, name, -1)
+            for tag_id, name in new_tags:
+                tag_index.add(tag_id, name, 1)
+            tag_graph.remove_prompt(tag_id for tag_id, _ in old_tags)
+            tag_graph.add_prompt(tag_id for tag_id, _ in new_tags)
+        for tag_id, name in created_tags:
+            event_broadcaster.publish("tag.created", {"id": tag_id, "name": name})
+        event_broadcaster.publish("prompt.updated", {"id": db_prompt.id, "category_id": db_prompt.category_id})
         
         # Get the updated prompt with relationships
         updated_prompt = await get_prompt(db, prompt_id=prompt_id, user_id=user_id)
@@ -430,7 +619,7 @@ async def delete_prompt(
         prompt_data = {
             "id": db_prompt.id,
             "title": db_prompt.title,
-            "content": db_prompt.content,
+            "content": await load_content(db, db_prompt.id) if db_prompt.content_compressed else db_prompt.content,
             "category_id": db_prompt.category_id,
             "user_id": db_prompt.user_id,
             "created_at": db_prompt.created_at,
@@ -442,8 +631,20 @@ async def delete_prompt(
         }
         
         # Delete the prompt
+        deleted_tags = [(tag.id, tag.name) for tag in db_prompt.tags]
+        await unindex_prompt(db, db_prompt.id)
+        await record_change(db, "prompt", [db_prompt.id], DELETE)
+        await delete_prompt_view(db, db_prompt.id)
+        if db_prompt.content_compressed:
+            await delete_body(db, db_prompt.id)
+        await delete_revisions(db, db_prompt.id)
         await db.delete(db_prompt)
         await db.commit()
+        for tag_id, name in deleted_tags:
+            tag_index.add(tag_id, name, -1)
+        tag_graph.remove_prompt(tag_id for tag_id, _ in deleted_tags)
+        prompt_vectors.remove(prompt_id)
+        event_broadcaster.publish("prompt.deleted", {"id": prompt_id})
         
         return prompt_data
         
@@ -458,28 +659,113 @@ async def delete_prompt(
             detail=f"Error deleting prompt: {str(e)}"
         )
 
-async def get_or_create_tag(db: AsyncSession, name: str) -> models.Tag:
-    """Get or create a tag by name"""
-    try:
-        # Check if tag exists
-        stmt = select(models.Tag).where(models.Tag.name == name)
-        result = await db.execute(stmt)
-        tag = result.scalar_one_or_none()
-        
-        if tag is None:
-            # Create new tag
-            tag = models.Tag(name=name)
-            db.add(tag)
-            await db.commit()
-            await db.refresh(tag)
-        
-        return tag
-    except Exception as e:
-        await db.rollback()
-        raise HTTPException(
-            status_code=500,
-            detail=f"Failed to get or create tag: {str(e)}"
+async def get_prompt_revisions(
+    db: AsyncSession, prompt_id: int, skip: int = 0, limit: int = 50
+) -> Optional[list]:
+    """
+    A prompt's revisions, newest first, without content.
+    Returns None if the prompt doesn't exist.
+    """
+    if await db.get(models.Prompt, prompt_id) is None:
+        return None
+    return await get_revisions(db, prompt_id, skip=skip, limit=limit)
+
+async def get_prompt_revision(db: AsyncSession, prompt_id: int, number: int) -> Optional[dict]:
+    """A revision of a prompt with its title and content as they were then, or None"""
+    return await get_revision(db, prompt_id, number)
+
+async def get_changes(
+    db: AsyncSession, since: int = 0, limit: int = 500, user_id: Optional[str] = None
+) -> dict:
+    """
+    Changes committed after the `since` cursor, read from the change log:
+    the current state of each created or updated prompt, category and tag,
+    and the ids of deleted ones. A cursor older than the last compaction's
+    horizon may have missed deletes, so the client is told to reset and
+    gets the log from the start. Reading to the end of the log brings the
+    cursor up to the horizon, which may be past every entry still kept.
+    Where ids can commit out of order, a page stops before the first entry
+    younger than the settle window, so the cursor never passes a change
+    that may still commit.
+    """
+    horizon = await sync_horizon(db)
+    reset = 0 < since < horizon
+    if reset:
+        since = 0
+    log = models.ChangeLog
+    stmt = (
+        select(log.id, log.entity, log.entity_id, log.action)
+        .where(log.id > since)
+        .order_by(log.id)
+        .limit(limit + 1)
+    )
+    cutoff = settle_cutoff(db)
+    if cutoff is not None:
+        unsettled = select(func.min(log.id)).where(log.id > since, log.created_at >= cutoff).scalar_subquery()
+        stmt = stmt.where(or_(unsettled.is_(None), log.id < unsettled))
+    rows = (await db.execute(stmt)).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    # Only the last change to each entity in the page matters
+    latest: Dict[tuple, str] = {}
+    for row in rows:
+        latest[(row.entity, row.entity_id)] = row.action
+    changed = {"prompt": [], "category": [], "tag": []}
+    deleted = {"prompt": [], "category": [], "tag": []}
+    for (entity, entity_id), action in latest.items():
+        (deleted if action == DELETE else changed)[entity].append(entity_id)
+
+    prompts = []
+    if changed["prompt"]:
+        prompts = await get_prompts(
+            db, limit=len(changed["prompt"]), user_id=user_id, prompt_ids=changed["prompt"],
+            full_content=True
         )
+    categories = tags = []
+    if changed["category"]:
+        categories = (await db.execute(
+            select(models.Category).where(models.Category.id.in_(changed["category"]))
+        )).scalars().all()
+    if changed["tag"]:
+        tags = (await db.execute(
+            select(models.Tag).where(models.Tag.id.in_(changed["tag"]))
+        )).scalars().all()
+
+    cursor = rows[-1].id if rows else since
+    if not has_more:
+        cursor = max(cursor, horizon)
+    return {
+        "cursor": cursor,
+        "has_more": has_more,
+        "reset": reset,
+        "prompts": prompts,
+        "categories": categories,
+        "tags": tags,
+        "deleted": {"prompts": deleted["prompt"], "categories": deleted["category"], "tags": deleted["tag"]},
+    }
+
+async def get_or_create_tag(db: AsyncSession, name: str) -> Tuple[models.Tag, bool]:
+    """
+    Get or create a tag by name, without committing: a new tag is flushed
+    and logged in the caller's transaction, and the caller commits (and
+    announces it) together with the rest of the write.
+    Returns the tag and whether it was created.
+    """
+    # Check if tag exists
+    stmt = select(models.Tag).where(models.Tag.name == name)
+    result = await db.execute(stmt)
+    tag = result.scalar_one_or_none()
+    
+    if tag is not None:
+        return tag, False
+    
+    # Create new tag
+    tag = models.Tag(name=name, created_at=datetime.utcnow())
+    db.add(tag)
+    await db.flush()
+    await record_change(db, "tag", [tag.id])
+    return tag, True
 
 async def get_categories(db: AsyncSession, skip: int = 0, limit: int = 100) -> List[models.Category]:
     """Get all categories"""
@@ -512,8 +798,11 @@ async def create_category(db: AsyncSession, category: schemas.CategoryCreate) ->
     """Create a new category"""
     db_category = models.Category(**category.model_dump())
     db.add(db_category)
+    await db.flush()
+    await record_change(db, "category", [db_category.id])
     await db.commit()
     await db.refresh(db_category)
+    event_broadcaster.publish("category.created", {"id": db_category.id, "name": db_category.name})
     return db_category
 
 async def update_category(
@@ -529,9 +818,12 @@ async def update_category(
     update_data = category.model_dump(exclude_unset=True)
     for key, value in update_data.items():
         setattr(db_category, key, value)
+    await record_change(db, "category", [db_category.id])
+    await update_category_views(db, db_category)
     
     await db.commit()
     await db.refresh(db_category)
+    event_broadcaster.publish("category.updated", {"id": db_category.id, "name": db_category.name})
     return db_category
 
 async def get_tags(db: AsyncSession, skip: int = 0, limit: int = 100) -> List[models.Tag]:
@@ -555,13 +847,41 @@ async def get_tag(db: AsyncSession, tag_id: int) -> Optional[models.Tag]:
     result = await db.execute(stmt)
     return result.scalars().first()
 
+async def get_related_tags(
+    db: AsyncSession, tag_id: int, limit: int = 10, metric: str = "jaccard", min_count: int = 1
+) -> Optional[List[dict]]:
+    """
+    Tags most often used together with a tag, scored from the in-memory
+    co-occurrence matrix. Returns None if the tag doesn't exist.
+    """
+    if await db.get(models.Tag, tag_id) is None:
+        return None
+    related = tag_graph.related(tag_id, limit=limit, metric=metric, min_count=min_count)
+    if not related:
+        return []
+
+    stmt = select(models.Tag.id, models.Tag.name).where(models.Tag.id.in_([tag["id"] for tag in related]))
+    names = dict((await db.execute(stmt)).all())
+    return [{**tag, "name": names[tag["id"]]} for tag in related if tag["id"] in names]
+
 async def delete_tag(db: AsyncSession, tag_id: int):
     """Delete a tag (will remove from prompts but not delete prompts)"""
     db_tag = await db.get(models.Tag, tag_id)
     if not db_tag:
         raise HTTPException(status_code=404, detail="Tag not found")
+    # Prompts that carried the tag change too
+    tagged = (await db.execute(
+        select(models.prompt_tags.c.prompt_id).where(models.prompt_tags.c.tag_id == tag_id)
+    )).scalars().all()
+    await record_change(db, "prompt", tagged)
+    await record_change(db, "tag", [tag_id], DELETE)
     await db.delete(db_tag)
+    await db.flush()
+    await refresh_prompt_views(db, tagged)
     await db.commit()
+    tag_index.remove(tag_id)
+    tag_graph.remove_tag(tag_id)
+    event_broadcaster.publish("tag.deleted", {"id": tag_id})
     return db_tag
 
 
@@ -569,6 +889,7 @@ async def like_prompt(db: AsyncSession, prompt_id: int, user_id: Optional[str] =
     """
     Like a prompt for a user. If already liked, removes the like.
     Returns the updated prompt with the new like count in the standard format.
+    When write coalescing is enabled, the toggle shares a commit with concurrent writes.
     """
     if not user_id:
         raise HTTPException(
@@ -577,50 +898,11 @@ async def like_prompt(db: AsyncSession, prompt_id: int, user_id: Optional[str] =
         )
     
     try:
-        # Check if prompt exists using get_prompt to ensure consistent data format
-        prompt = await get_prompt(db, prompt_id, user_id=user_id)
-        if not prompt:
-            raise HTTPException(status_code=404, detail="Prompt not found")
-        
-        # Check if already liked
-        stmt = select(models.PromptLike).where(
-            and_(
-                models.PromptLike.prompt_id == prompt_id,
-                models.PromptLike.user_id == user_id
-            )
+        result = await write_coordinator.run(
+            db, lambda session: stage_like_toggle(session, prompt_id, user_id)
         )
-        result = await db.execute(stmt)
-        existing_like = result.scalars().first()
-        
-        # Get the actual prompt model for updates
-        db_prompt = await db.get(models.Prompt, prompt_id)
-        if not db_prompt:
-            raise HTTPException(status_code=404, detail="Prompt not found")
-        
-        if existing_like:
-            # Unlike: remove the like and decrement count
-            await db.delete(existing_like)
-            db_prompt.like_count = max(0, db_prompt.like_count - 1)
-            is_liked = False
-        else:
-            # Like: add a new like and increment count
-            like = models.PromptLike(prompt_id=prompt_id, user_id=user_id)
-            db.add(like)
-            db_prompt.like_count += 1
-            is_liked = True
-        
-        db_prompt.updated_at = datetime.utcnow()
-        await db.commit()
-        
-        # Return the updated prompt in the standard format
-        updated_prompt = await get_prompt(db, prompt_id, user_id=user_id)
-        if not updated_prompt:
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail="Failed to retrieve updated prompt"
-            )
-            
-        return updated_prompt
+        event_broadcaster.publish("prompt.liked", {"id": prompt_id, "like_count": result["like_count"]})
+        return result
         
     except HTTPException:
         await db.rollback()
@@ -634,6 +916,52 @@ async def like_prompt(db: AsyncSession, prompt_id: int, user_id: Optional[str] =
         )
 
 
+async def stage_like_toggle(db: AsyncSession, prompt_id: int, user_id: str) -> dict:
+    """
+    Toggle a user's like on a prompt in the session without committing.
+    Returns the updated prompt in the standard format.
+    """
+    # Check if already liked
+    stmt = select(models.PromptLike).where(
+        and_(
+            models.PromptLike.prompt_id == prompt_id,
+            models.PromptLike.user_id == user_id
+        )
+    )
+    result = await db.execute(stmt)
+    existing_like = result.scalars().first()
+    
+    # Get the actual prompt model for updates
+    db_prompt = await db.get(models.Prompt, prompt_id)
+    if not db_prompt:
+        raise HTTPException(status_code=404, detail="Prompt not found")
+    
+    if existing_like:
+        # Unlike: remove the like and decrement count
+        await db.delete(existing_like)
+        db_prompt.like_count = max(0, db_prompt.like_count - 1)
+    else:
+        # Like: add a new like and increment count
+        like = models.PromptLike(prompt_id=prompt_id, user_id=user_id)
+        db.add(like)
+        db_prompt.like_count += 1
+    
+    db_prompt.updated_at = datetime.utcnow()
+    await record_change(db, "prompt", [prompt_id])
+    await update_like_count_view(db, prompt_id, db_prompt.like_count, db_prompt.updated_at)
+    await db.flush()
+    
+    # Return the updated prompt in the standard format
+    updated_prompt = await get_prompt(db, prompt_id, user_id=user_id)
+    if not updated_prompt:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to retrieve updated prompt"
+        )
+        
+    return updated_prompt
+
+
 async def get_user_liked_prompt_ids(db: AsyncSession, user_id: str) -> Set[int]:
     """Get a set of prompt IDs that the user has liked"""
     stmt = select(models.PromptLike.prompt_id).where(
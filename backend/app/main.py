@@ -1,20 +1,71 @@
 import asyncio
+import os
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
-from app.database import engine
+from app.database import async_session_maker, engine
 from app.models import Base
 from app.api.api import api_router
+from app.core.change_log import backfill_change_log, change_log_compactor
+from app.core.events import event_broadcaster
+from app.core.metrics import MetricsMiddleware, instrument_engine, metrics_endpoint
+from app.core.query_tracker import DEBUG, QueryTrackingMiddleware, instrument_queries
+from app.core.prompt_vectors import prompt_vectors
+from app.core.read_model import backfill_prompt_views
+from app.core.recommender import recommender
+from app.core.search_index import backfill_search_index
+from app.core.slow_query_log import slow_query_log
+from app.core.suggestion_cache import suggestion_cache
+from app.core.tag_graph import tag_graph
+from app.core.tag_index import tag_index
+from app.core.tag_suggester import tag_suggester
+from app.core.write_coordinator import write_coordinator
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() in ("1", "true", "yes")
+DB_CREATE_ALL = os.getenv("DB_CREATE_ALL", "true").lower() in ("1", "true", "yes")
 
 # This will be called when the application starts
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    # Create database tables (in a real app, use migrations like Alembic)
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
+    # Create database tables; disable with DB_CREATE_ALL=false where Alembic manages the schema
+    if DB_CREATE_ALL:
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+    # Index prompts the trigram search has not seen yet
+    await backfill_search_index(async_session_maker)
+    # Give existing rows a change log entry so a first sync sees them, and compact the log periodically
+    await backfill_change_log(async_session_maker)
+    # Build read-model rows for prompts that predate prompt_view
+    await backfill_prompt_views(async_session_maker)
+    await change_log_compactor.start(async_session_maker)
+    # Start group-commit write coalescing if enabled (WRITE_COALESCING=true)
+    await write_coordinator.start()
+    # Change feed for GET /api/events (EVENTS_BACKEND=redis to span workers)
+    await event_broadcaster.start()
+    await slow_query_log.start()
+    # Train the local tag suggester now and periodically in the background
+    await tag_suggester.start(async_session_maker)
+    # Tag autocomplete index, reloaded periodically to pick up other workers' writes
+    await tag_index.start(async_session_maker)
+    # Tag co-occurrence matrix behind related tags, rebuilt the same way
+    await tag_graph.start(async_session_maker)
+    # Related-prompt vectors: open the stored index and catch up with the database
+    await prompt_vectors.sync(async_session_maker)
+    # Train the like-based recommender now and periodically in the background
+    await recommender.start(async_session_maker)
     yield
     # Clean up resources when the app shuts down
+    await recommender.stop()
+    await tag_graph.stop()
+    await tag_index.stop()
+    await tag_suggester.stop()
+    await slow_query_log.stop()
+    await write_coordinator.stop()
+    await change_log_compactor.stop()
+    await event_broadcaster.stop()
+    suggestion_cache.close()
+    prompt_vectors.close()
     await engine.dispose()
 
 app = FastAPI(
@@ -38,6 +89,19 @@ app.add_middleware(
     max_age=600,
 )
 
+# Prometheus metrics, scraped by monitoring/prometheus/prometheus.yml
+if METRICS_ENABLED:
+    instrument_engine(engine)
+    app.add_middleware(MetricsMiddleware)
+    app.add_api_route("/metrics", metrics_endpoint, include_in_schema=False)
+
+# Per-request statement counting and N+1 detection (X-Query-Count header in DEBUG)
+instrument_queries(engine)
+app.add_middleware(QueryTrackingMiddleware)
+
+# Slow-query log (SLOW_QUERY_THRESHOLD_MS) with plans captured in the background
+slow_query_log.instrument(engine)
+
 # Include API router
 app.include_router(api_router, prefix="/api")
 
@@ -48,3 +112,9 @@ async def root():
 @app.get("/health")
 async def health_check():
     return {"status": "healthy"}
+
+if DEBUG:
+    @app.get("/debug/slow-queries", include_in_schema=False)
+    async def slow_queries(limit: int = 50):
+        """Slow statement shapes with p50/p95/p99 latency, callers and plans."""
+        return slow_query_log.report(limit=limit)
@@ -1,7 +1,7 @@
 from datetime import datetime
 from typing import List, Optional, Dict, Any
 
-from sqlalchemy import ForeignKey, Table, Column, Integer, String, DateTime, func, event
+from sqlalchemy import DDL, JSON, Boolean, ForeignKey, LargeBinary, Table, Column, Integer, String, DateTime, Index, false, func, event
 from sqlalchemy.orm import Mapped, mapped_column, relationship, DeclarativeBase, object_session
 
 class Base(DeclarativeBase):
@@ -13,6 +13,23 @@ prompt_tags = Table(
     Base.metadata,
     Column("prompt_id", Integer, ForeignKey("prompts.id"), primary_key=True),
     Column("tag_id", Integer, ForeignKey("tags.id"), primary_key=True),
+    # The primary key covers prompt -> tags; this covers tag -> prompts joins
+    Index("ix_prompt_tags_tag_id_prompt_id", "tag_id", "prompt_id"),
+)
+
+# Trigram side table for typo-tolerant search (see app/core/search_index.py):
+# one row per trigram of each distinct word of a prompt, so a query word is
+# scored against single words. The primary key doubles as the posting list:
+# trigram -> (prompt id, word).
+prompt_trigrams = Table(
+    "prompt_trigrams",
+    Base.metadata,
+    Column("trigram", String(3), primary_key=True),
+    Column("prompt_id", Integer, ForeignKey("prompts.id", ondelete="CASCADE"), primary_key=True),
+    # Position of the word among the prompt's distinct words
+    Column("word", Integer, primary_key=True),
+    # Reindexing and deleting a prompt
+    Index("ix_prompt_trigrams_prompt_id", "prompt_id"),
 )
 
 class PromptLike(Base):
@@ -27,11 +44,10 @@ class PromptLike(Base):
     prompt: Mapped["Prompt"] = relationship("Prompt", back_populates="likes")
     
     __table_args__ = (
-        # Ensure a user can only like a prompt once
-        {'sqlite_autoincrement': True},
-    )
-    __table_args__ = (
-        # Composite unique constraint
+        # Ensure a user can only like a prompt once (also serves "is liked" lookups)
+        Index("ix_prompt_likes_prompt_user", "prompt_id", "user_id", unique=True),
+        # Covering index for "which prompts has this user liked"
+        Index("ix_prompt_likes_user_prompt", "user_id", "prompt_id"),
         {'sqlite_autoincrement': True},
     )
 
@@ -52,6 +68,8 @@ class Prompt(Base):
     )
     like_count: Mapped[int] = mapped_column(Integer, default=0, nullable=False, index=True)  # Denormalized count for performance
     user_id: Mapped[Optional[str]] = mapped_column(String, nullable=True)  # ID of the user who created the prompt
+    # Large content lives compressed in prompt_bodies; `content` then holds a preview
+    content_compressed: Mapped[bool] = mapped_column(Boolean, default=False, server_default=false(), nullable=False)
 
     # Relationships
     category: Mapped[Optional["Category"]] = relationship(
@@ -63,6 +81,14 @@ class Prompt(Base):
     likes: Mapped[List["PromptLike"]] = relationship(
         "PromptLike", back_populates="prompt", cascade="all, delete-orphan"
     )
+
+    __table_args__ = (
+        # Indexes matched to crud.get_prompts: newest-first listing, optionally
+        # filtered by category or owner
+        Index("ix_prompts_created_at", "created_at"),
+        Index("ix_prompts_category_id_created_at", "category_id", "created_at"),
+        Index("ix_prompts_user_id_created_at", "user_id", "created_at"),
+    )
     
     @property
     def likes_count(self) -> int:
@@ -75,6 +101,41 @@ class Prompt(Base):
             return False
         return any(like.user_id == user_id for like in self.likes)
 
+class PromptBody(Base):
+    """
+    Cold storage for large prompt content, compressed (see app/core/cold_storage.py).
+    Kept out of the prompts table so listings don't page in large bodies; the
+    data column is deferred and only read for detail views.
+    """
+    __tablename__ = "prompt_bodies"
+
+    prompt_id: Mapped[int] = mapped_column(Integer, ForeignKey("prompts.id", ondelete="CASCADE"), primary_key=True)
+    codec: Mapped[str] = mapped_column(String(8), nullable=False)
+    size: Mapped[int] = mapped_column(Integer, nullable=False)  # uncompressed UTF-8 bytes
+    data: Mapped[bytes] = mapped_column(LargeBinary, nullable=False, deferred=True)
+
+class PromptRevision(Base):
+    """
+    One saved version of a prompt's title and content (see app/core/revisions.py).
+    Content is stored compressed, as a full snapshot every few revisions and
+    otherwise as a line diff against the previous revision.
+    """
+    __tablename__ = "prompt_revisions"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    prompt_id: Mapped[int] = mapped_column(Integer, ForeignKey("prompts.id", ondelete="CASCADE"), nullable=False)
+    number: Mapped[int] = mapped_column(Integer, nullable=False)  # 1, 2, ... per prompt
+    kind: Mapped[str] = mapped_column(String(8), nullable=False)  # snapshot or delta
+    title: Mapped[str] = mapped_column(String, nullable=False)
+    size: Mapped[int] = mapped_column(Integer, nullable=False)  # content UTF-8 bytes
+    data: Mapped[bytes] = mapped_column(LargeBinary, nullable=False)
+    user_id: Mapped[Optional[str]] = mapped_column(String, nullable=True)
+    created_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (
+        Index("ix_prompt_revisions_prompt_id_number", "prompt_id", "number", unique=True),
+    )
+
 class Category(Base):
     __tablename__ = "categories"
 
@@ -103,3 +164,77 @@ class Tag(Base):
     prompts: Mapped[List["Prompt"]] = relationship(
         "Prompt", secondary=prompt_tags, back_populates="tags"
     )
+
+# Case-insensitive tag filtering (expression index, declared once the column exists)
+Index("ix_tags_name_lower", func.lower(Tag.name))
+
+# Full-text index used for search snippets and highlighting on SQLite (rowid = prompts.id).
+# FTS5 virtual tables can't be declared as models, so it is created alongside the schema.
+event.listen(
+    Base.metadata,
+    "after_create",
+    DDL("CREATE VIRTUAL TABLE IF NOT EXISTS prompts_fts USING fts5(title, content)").execute_if(dialect="sqlite"),
+)
+
+class PromptView(Base):
+    """
+    Denormalized read model: one row per prompt with its category and tags
+    embedded as JSON, so prompt lists and detail reads are a single indexed
+    query without joins. Written by the CRUD write paths alongside the source
+    tables (see app/core/read_model.py).
+    """
+    __tablename__ = "prompt_view"
+
+    id: Mapped[int] = mapped_column(Integer, ForeignKey("prompts.id", ondelete="CASCADE"), primary_key=True)
+    title: Mapped[str] = mapped_column(String, nullable=False)
+    content: Mapped[str] = mapped_column(String, nullable=False)
+    category_id: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    user_id: Mapped[Optional[str]] = mapped_column(String, nullable=True)
+    like_count: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    # `content` is a preview; the full text is in prompt_bodies
+    content_compressed: Mapped[bool] = mapped_column(Boolean, default=False, server_default=false(), nullable=False)
+    created_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
+    updated_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
+    category: Mapped[Optional[Dict[str, Any]]] = mapped_column(JSON, nullable=True)  # id, name, description, created_at
+    tags: Mapped[List[Dict[str, Any]]] = mapped_column(JSON, nullable=False, default=list)  # [{id, name, created_at}]
+
+    __table_args__ = (
+        # Same listing orders as the prompts table
+        Index("ix_prompt_view_created_at", "created_at"),
+        Index("ix_prompt_view_category_id_created_at", "category_id", "created_at"),
+        Index("ix_prompt_view_user_id_created_at", "user_id", "created_at"),
+    )
+
+class ChangeLog(Base):
+    """
+    Append-only log of committed changes to prompts, categories and tags,
+    written in the same transaction as the change and read by GET /api/sync
+    (see app/core/change_log.py). The id is the sync cursor.
+    """
+    __tablename__ = "change_log"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    entity: Mapped[str] = mapped_column(String(16), nullable=False)  # prompt, category or tag
+    entity_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    action: Mapped[str] = mapped_column(String(8), nullable=False)  # upsert or delete (a tombstone)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now()
+    )
+
+    __table_args__ = (
+        # Compaction keeps the newest entry per entity
+        Index("ix_change_log_entity_entity_id", "entity", "entity_id"),
+        # Never reuse the id of a compacted entry, or clients holding it as a cursor would skip changes
+        {"sqlite_autoincrement": True},
+    )
+
+class ChangeLogCompaction(Base):
+    """A change log compaction that purged tombstones; cursors below its horizon may have missed deletes"""
+    __tablename__ = "change_log_compactions"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    horizon: Mapped[int] = mapped_column(Integer, nullable=False)
+    removed: Mapped[int] = mapped_column(Integer, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now()
+    )
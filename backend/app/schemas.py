@@ -48,6 +48,19 @@ class TagResponse(TagBase):
 
     model_config = ConfigDict(from_attributes=True)
 
+class TagSuggestionResponse(BaseModel):
+    """Tag autocomplete entry"""
+    id: int
+    name: str
+    usage_count: int
+
+class RelatedTagResponse(BaseModel):
+    """Tag used together with another tag: shared prompts and association score"""
+    id: int
+    name: str
+    count: int
+    score: float
+
 class CategoryResponse(CategoryBase):
     id: int
     created_at: datetime
@@ -62,7 +75,10 @@ class LikeResponse(BaseModel):
 class PromptResponse(BaseModel):
     id: int
     title: str
-    content: str
+    # None when a list was requested with include_content=false
+    content: Optional[str]
+    # Listings of large prompts carry a preview; the full content comes from GET /prompts/{id}
+    content_truncated: bool = False
     created_at: datetime
     updated_at: Optional[datetime] = None
     category_id: Optional[int] = None
@@ -72,6 +88,9 @@ class PromptResponse(BaseModel):
     like_count: int = 0
     is_liked: bool = False
     user_id: Optional[str] = None
+    # Search results only: HTML-escaped text with matches wrapped in <mark>
+    title_highlight: Optional[str] = None
+    snippet: Optional[str] = None
 
     model_config = ConfigDict(from_attributes=True)
 
@@ -82,6 +101,64 @@ class PromptResponse(BaseModel):
             self.tag_names = [tag.name for tag in self.tags]
         return self
 
+class RelatedPromptResponse(BaseModel):
+    """A prompt similar to another, with its cosine similarity"""
+    id: int
+    title: str
+    category_id: Optional[int] = None
+    tag_names: List[str] = Field(default_factory=list)
+    score: float
+
+class RecommendedPromptResponse(RelatedPromptResponse):
+    """A prompt recommended from like history; score 0 means a popularity fallback"""
+
+class PromptRevisionSummary(BaseModel):
+    """A saved version of a prompt; kind is how its content is stored (snapshot or delta)"""
+    number: int
+    kind: str
+    title: str
+    size: int
+    user_id: Optional[str] = None
+    created_at: Optional[datetime] = None
+
+    model_config = ConfigDict(from_attributes=True)
+
+class PromptRevisionResponse(PromptRevisionSummary):
+    content: str
+
+class FacetCount(BaseModel):
+    id: int
+    name: str
+    count: int
+
+class PromptFacets(BaseModel):
+    """Counts for the prompts matching a search/filter"""
+    total: int
+    categories: List[FacetCount] = Field(default_factory=list)
+    tags: List[FacetCount] = Field(default_factory=list)
+
+class PromptListResponse(BaseModel):
+    """Prompt list with facet counts (GET /api/prompts?facets=true)"""
+    items: List[PromptResponse]
+    facets: PromptFacets
+
+class SyncDeletions(BaseModel):
+    """Ids deleted since the cursor (tombstones)"""
+    prompts: List[int] = Field(default_factory=list)
+    categories: List[int] = Field(default_factory=list)
+    tags: List[int] = Field(default_factory=list)
+
+class SyncResponse(BaseModel):
+    """Changes since a sync cursor (GET /api/sync)"""
+    cursor: int
+    has_more: bool
+    # The given cursor was too old: drop local data and apply this from scratch
+    reset: bool = False
+    prompts: List[PromptResponse] = Field(default_factory=list)
+    categories: List[CategoryResponse] = Field(default_factory=list)
+    tags: List[TagResponse] = Field(default_factory=list)
+    deleted: SyncDeletions = Field(default_factory=SyncDeletions)
+
 # Utility schemas
 class Message(BaseModel):
     detail: str
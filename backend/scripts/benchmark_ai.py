@@ -0,0 +1,100 @@
+"""
+Load-test the AI suggestions pipeline offline against the local provider.
+
+Sends --requests suggestion requests with --concurrency in flight through the
+ASGI app in-process (no network, no API key) and reports throughput, latency
+percentiles and status codes. Provider latency and failure rate come from the
+AI_LOCAL_* settings, which can be overridden with the flags below. The app's
+provider rate limit and concurrency cap (AI_RATE_LIMIT_PER_SECOND,
+AI_MAX_CONCURRENCY) shape the results too; override them with --rate-limit and
+--max-concurrency (0 disables either) to measure the pipeline itself.
+
+    python scripts/benchmark_ai.py --requests 200 --concurrency 20 --latency-ms 500
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+
+# Add the backend directory to the Python path
+sys.path.append(str(Path(__file__).parent.parent))
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+async def run(args):
+    import httpx
+    from app.api import ai
+    from app.core.ai_providers import LocalProvider, set_provider
+    from app.core.rate_limit import TokenBucket
+    from app.main import app
+
+    set_provider(LocalProvider(
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        failure_rate=args.failure_rate,
+        seed=args.seed,
+    ))
+    ai.AI_CACHE_ENABLED = args.cache
+    ai._provider_rate_limit = TokenBucket(args.rate_limit, args.burst) if args.rate_limit > 0 else None
+    ai._provider_slots = asyncio.Semaphore(args.max_concurrency or args.requests)
+
+    # Repeat prompts across --distinct values to exercise caching and coalescing
+    prompts = [f"Benchmark prompt number {i % args.distinct}" for i in range(args.requests)]
+    slots = asyncio.Semaphore(args.concurrency)
+    latencies = []
+    statuses = Counter()
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        async def one(prompt):
+            async with slots:
+                start = time.perf_counter()
+                response = await client.post("/api/ai/suggestions", json={"prompt": prompt})
+                latencies.append(time.perf_counter() - start)
+                statuses[response.status_code] += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one(prompt) for prompt in prompts))
+        elapsed = time.perf_counter() - started
+
+    print(f"Requests:    {args.requests} ({args.distinct} distinct prompts, concurrency {args.concurrency})")
+    print(f"Limits:      provider rate "
+          f"{f'{args.rate_limit:g}/s (burst {args.burst:g})' if args.rate_limit > 0 else 'unlimited'}, "
+          f"provider concurrency {args.max_concurrency or 'unlimited'}")
+    print(f"Elapsed:     {elapsed:.2f}s ({args.requests / elapsed:.1f} req/s)")
+    print(f"Latency:     p50 {percentile(latencies, 50) * 1000:.0f}ms  "
+          f"p95 {percentile(latencies, 95) * 1000:.0f}ms  "
+          f"p99 {percentile(latencies, 99) * 1000:.0f}ms  "
+          f"max {max(latencies) * 1000:.0f}ms")
+    print("Status:      " + ", ".join(f"{code}: {count}" for code, count in sorted(statuses.items())))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark AI suggestions with the local provider")
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--distinct", type=int, default=None, help="Number of distinct prompts (default: all distinct)")
+    parser.add_argument("--latency-ms", type=float, default=float(os.getenv("AI_LOCAL_LATENCY_MS", "800")))
+    parser.add_argument("--jitter-ms", type=float, default=float(os.getenv("AI_LOCAL_JITTER_MS", "200")))
+    parser.add_argument("--failure-rate", type=float, default=float(os.getenv("AI_LOCAL_FAILURE_RATE", "0")))
+    parser.add_argument("--seed", type=int, default=int(os.getenv("AI_LOCAL_SEED", "42")))
+    parser.add_argument("--cache", action="store_true", help="Keep the suggestion cache enabled")
+    parser.add_argument("--rate-limit", type=float, default=float(os.getenv("AI_RATE_LIMIT_PER_SECOND", "5")),
+                        help="Provider calls per second (0: no rate limit)")
+    parser.add_argument("--burst", type=float, default=float(os.getenv("AI_RATE_LIMIT_BURST", "10")))
+    parser.add_argument("--max-concurrency", type=int, default=int(os.getenv("AI_MAX_CONCURRENCY", "4")),
+                        help="Provider calls in flight (0: unlimited)")
+    args = parser.parse_args()
+    args.distinct = args.distinct or args.requests
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
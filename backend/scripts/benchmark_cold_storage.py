@@ -0,0 +1,138 @@
+"""
+Compare database size and prompt listing latency with and without cold
+storage for large prompt content.
+
+Builds two temporary databases holding the same --prompts synthetic prompts,
+a --large-share of them --large-kb KB long, one with everything inline and
+one with content over PROMPT_COLD_STORAGE_BYTES compressed into
+prompt_bodies, then times `crud.get_prompts` pages and `crud.get_prompt`.
+
+    python scripts/benchmark_cold_storage.py --prompts 20000 --large-share 0.1 --large-kb 40
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Add the backend directory to the Python path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app import crud, models
+from app.core.cold_storage import CODEC, compress, inline_content
+
+_WORDS = (
+    "act as an expert reviewer summarize the following text step by step explain "
+    "your reasoning list assumptions rewrite concise formal friendly code example "
+    "output json table bullet points constraints context audience tone"
+).split()
+
+
+def _text(rng, size):
+    words = []
+    length = 0
+    while length < size:
+        word = rng.choice(_WORDS)
+        words.append(word)
+        length += len(word) + 1
+    return " ".join(words)
+
+
+def _prompts(count, large_share, large_kb):
+    rng = random.Random(0)
+    started = datetime(2024, 1, 1)
+    for i in range(count):
+        size = large_kb * 1024 if rng.random() < large_share else rng.randint(200, 2000)
+        yield {
+            "id": i + 1,
+            "title": f"Prompt {i}",
+            "content": _text(rng, size),
+            "category_id": rng.randint(1, 20),
+            "like_count": 0,
+            "created_at": started + timedelta(minutes=i),
+        }
+
+
+async def _fill(session_factory, args, cold: bool) -> None:
+    async with session_factory() as session:
+        await session.execute(insert(models.Category), [{"id": i, "name": f"Category {i}"} for i in range(1, 21)])
+        batch = []
+        for prompt in _prompts(args.prompts, args.large_share, args.large_kb):
+            content, compressed = inline_content(prompt["content"]) if cold else (prompt["content"], False)
+            if compressed:
+                await session.execute(insert(models.PromptBody).values(
+                    prompt_id=prompt["id"], codec=CODEC,
+                    size=len(prompt["content"].encode("utf-8")), data=compress(prompt["content"]),
+                ))
+            batch.append({**prompt, "content": content, "content_compressed": compressed})
+            if len(batch) == 1000:
+                await _insert(session, batch)
+                batch = []
+        if batch:
+            await _insert(session, batch)
+        await session.commit()
+
+
+async def _insert(session: AsyncSession, rows) -> None:
+    await session.execute(insert(models.Prompt), rows)
+    await session.execute(insert(models.PromptView), [
+        {**row, "category": {"id": row["category_id"], "name": f"Category {row['category_id']}"}, "tags": []}
+        for row in rows
+    ])
+
+
+async def _time(label, calls, fn):
+    timings = []
+    for args in calls:
+        start = time.perf_counter()
+        await fn(*args)
+        timings.append(time.perf_counter() - start)
+    timings.sort()
+    print(f"  {label}: p50 {timings[len(timings) // 2] * 1000:.1f}ms  "
+          f"p95 {timings[int(len(timings) * 0.95)] * 1000:.1f}ms")
+
+
+async def _run(path: str, args, cold: bool) -> None:
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    async with engine.begin() as conn:
+        await conn.run_sync(models.Base.metadata.create_all)
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+    await _fill(session_factory, args, cold)
+
+    rng = random.Random(1)
+    print(f"{'Cold storage' if cold else 'Inline'}: {os.path.getsize(path) / 1024 / 1024:.1f} MB")
+    async with session_factory() as session:
+        pages = [(session, rng.randrange(0, args.prompts - args.page), args.page) for _ in range(args.queries)]
+        await _time(f"get_prompts ({args.page} per page)", pages,
+                    lambda db, skip, limit: crud.get_prompts(db, skip=skip, limit=limit))
+        categories = [(session, rng.randint(1, 20)) for _ in range(args.queries)]
+        await _time("get_prompts (by category)", categories,
+                    lambda db, category_id: crud.get_prompts(db, limit=args.page, category_id=category_id))
+        details = [(session, rng.randint(1, args.prompts)) for _ in range(args.queries)]
+        await _time("get_prompt", details, lambda db, prompt_id: crud.get_prompt(db, prompt_id))
+    await engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark cold storage of large prompts")
+    parser.add_argument("--prompts", type=int, default=20000)
+    parser.add_argument("--large-share", type=float, default=0.1)
+    parser.add_argument("--large-kb", type=int, default=40)
+    parser.add_argument("--page", type=int, default=50)
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for cold in (False, True):
+            asyncio.run(_run(str(Path(tmp) / f"bench-{int(cold)}.db"), args, cold))
+
+
+if __name__ == "__main__":
+    main()
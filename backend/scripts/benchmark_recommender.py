@@ -0,0 +1,61 @@
+"""
+Measure recommender training time and recommendation latency at scale.
+
+Generates --likes synthetic likes from --users users over --prompts prompts,
+with a skewed (Zipf-like) prompt popularity, trains the model as the
+background task would and times `recommend` for random users.
+
+    python scripts/benchmark_recommender.py --users 50000 --prompts 100000 --likes 1000000
+"""
+import argparse
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+
+import numpy as np
+
+# Add the backend directory to the Python path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.core.recommender import PromptRecommender
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark like-based recommendations")
+    parser.add_argument("--users", type=int, default=50000)
+    parser.add_argument("--prompts", type=int, default=100000)
+    parser.add_argument("--likes", type=int, default=1000000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--limit", type=int, default=10)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    users = rng.integers(0, args.users, args.likes)
+    prompts = (rng.zipf(1.3, args.likes) - 1) % args.prompts
+    likes = [(f"user-{u}", int(p)) for u, p in zip(users, prompts)]
+
+    started = time.perf_counter()
+    recommender = PromptRecommender()
+    recommender.load(likes)
+    print(f"Trained on {len(likes)} likes in {time.perf_counter() - started:.1f}s "
+          f"({len(recommender._model.neighbours)} neighbour entries)")
+
+    liked = defaultdict(set)
+    for user, prompt_id in likes:
+        liked[user].add(prompt_id)
+    sample = [f"user-{u}" for u in rng.integers(0, args.users, args.queries)]
+
+    timings = []
+    for user in sample:
+        start = time.perf_counter()
+        recommender.recommend(liked[user], limit=args.limit)
+        timings.append(time.perf_counter() - start)
+    timings.sort()
+    print(f"recommend(): p50 {timings[len(timings) // 2] * 1000:.2f}ms  "
+          f"p95 {timings[int(len(timings) * 0.95)] * 1000:.2f}ms  "
+          f"max {timings[-1] * 1000:.2f}ms over {args.queries} queries")
+
+
+if __name__ == "__main__":
+    main()
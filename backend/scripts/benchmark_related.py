@@ -0,0 +1,66 @@
+"""
+Measure related-prompt query latency at scale.
+
+Fills a temporary vector index with --prompts random unit vectors (the
+query cost doesn't depend on the text behind them), partitions it as
+startup would and times `related` lookups.
+
+    python scripts/benchmark_related.py --prompts 500000 --dim 256
+"""
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+# Add the backend directory to the Python path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.core.prompt_vectors import PromptVectors
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark related-prompt lookups")
+    parser.add_argument("--prompts", type=int, default=500000)
+    parser.add_argument("--dim", type=int, default=256)
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--limit", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        vectors = PromptVectors(path=str(Path(tmp) / "bench"), dim=args.dim)
+        vectors.rebuild([])
+
+        rng = np.random.default_rng(0)
+        started = time.perf_counter()
+        with vectors._lock:
+            vectors._grow(args.prompts)
+            for start in range(0, args.prompts, 100000):
+                rows = rng.standard_normal((min(100000, args.prompts - start), args.dim)).astype(np.float32)
+                rows /= np.linalg.norm(rows, axis=1, keepdims=True)
+                vectors._vectors[start:start + len(rows)] = rows
+            vectors._ids[:args.prompts] = np.arange(args.prompts)
+            vectors._rows = {i: i for i in range(args.prompts)}
+            vectors._size = args.prompts
+        print(f"Filled {args.prompts} x {args.dim} vectors in {time.perf_counter() - started:.1f}s")
+
+        started = time.perf_counter()
+        if vectors.partition():
+            print(f"Partitioned into {len(vectors._centroids)} partitions in {time.perf_counter() - started:.1f}s")
+
+        vectors.related(0, limit=args.limit)  # page the file in
+        timings = []
+        for prompt_id in rng.integers(0, args.prompts, args.queries):
+            start = time.perf_counter()
+            vectors.related(int(prompt_id), limit=args.limit)
+            timings.append(time.perf_counter() - start)
+        timings.sort()
+        print(f"related(): p50 {timings[len(timings) // 2] * 1000:.1f}ms  "
+              f"p95 {timings[int(len(timings) * 0.95)] * 1000:.1f}ms  "
+              f"max {timings[-1] * 1000:.1f}ms over {args.queries} queries")
+
+
+if __name__ == "__main__":
+    main()
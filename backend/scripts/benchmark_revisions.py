@@ -0,0 +1,147 @@
+"""
+Measure the cost of prompt revision history: time added to each edit,
+storage against keeping full copies, and revision reconstruction latency.
+
+Creates --prompts prompts of about --kb KB in a temporary database, applies
+--edits small edits to each with `record_revision`, then times `get_revision`
+for random revisions and for the slowest case, the last one before a
+snapshot. Runs twice: prompts written as many lines (a few lines changed,
+added or removed per edit) and as a single paragraph (a few words changed).
+
+    python scripts/benchmark_revisions.py --prompts 200 --edits 100 --kb 8 --interval 20
+"""
+import argparse
+import asyncio
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add the backend directory to the Python path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from sqlalchemy import func, insert, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app import models
+from app.core import revisions
+
+
+def _edit(rng, lines):
+    lines = list(lines)
+    for _ in range(rng.randint(1, 3)):
+        i = rng.randrange(len(lines))
+        action = rng.random()
+        if action < 0.6:
+            lines[i] = f"Rewritten line {rng.randint(0, 10**6)}: be specific about the output format\n"
+        elif action < 0.8:
+            lines.insert(i, f"New constraint {rng.randint(0, 10**6)}: cite your sources\n")
+        elif len(lines) > 10:
+            del lines[i]
+    return lines
+
+
+def _edit_paragraph(rng, lines):
+    [paragraph] = lines
+    words = paragraph.split(" ")
+    for _ in range(rng.randint(1, 3)):
+        i = rng.randrange(len(words))
+        action = rng.random()
+        if action < 0.6:
+            words[i] = f"rewritten{rng.randint(0, 10**6)}"
+        elif action < 0.8:
+            words[i:i] = ["and", "cite", "your", "sources"]
+        elif len(words) > 10:
+            del words[i]
+    return [" ".join(words)]
+
+
+def _percentiles(timings):
+    timings = sorted(timings)
+    return (f"p50 {timings[len(timings) // 2] * 1000:.2f}ms  "
+            f"p95 {timings[int(len(timings) * 0.95)] * 1000:.2f}ms  max {timings[-1] * 1000:.2f}ms")
+
+
+async def _run(path: str, args, paragraph: bool) -> None:
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    async with engine.begin() as conn:
+        await conn.run_sync(models.Base.metadata.create_all)
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+    rng = random.Random(0)
+
+    async with session_factory() as session:
+        await session.execute(insert(models.Category).values(id=1, name="Benchmark"))
+        texts = {}
+        for prompt_id in range(1, args.prompts + 1):
+            lines = [f"Line {i}: explain the reasoning behind step {i} in detail\n" for i in range(args.kb * 20)]
+            if paragraph:
+                lines = [" ".join(line.strip() for line in lines)]
+            texts[prompt_id] = lines
+            await session.execute(insert(models.Prompt).values(
+                id=prompt_id, title=f"Prompt {prompt_id}", content="".join(lines), category_id=1, like_count=0,
+            ))
+            await revisions.record_revision(session, prompt_id, f"Prompt {prompt_id}", "".join(lines))
+        await session.commit()
+
+        diff_timings, write_timings = [], []
+        for _ in range(args.edits):
+            for prompt_id, lines in texts.items():
+                new_lines = (_edit_paragraph if paragraph else _edit)(rng, lines)
+                previous = {"title": f"Prompt {prompt_id}", "content": "".join(lines)}
+                start = time.perf_counter()
+                revisions.make_delta(previous["content"], "".join(new_lines))
+                diff_timings.append(time.perf_counter() - start)
+                start = time.perf_counter()
+                await revisions.record_revision(
+                    session, prompt_id, f"Prompt {prompt_id}", "".join(new_lines), previous=previous
+                )
+                write_timings.append(time.perf_counter() - start)
+                texts[prompt_id] = new_lines
+            await session.commit()
+
+        stored, full = (await session.execute(
+            select(func.sum(func.length(models.PromptRevision.data)), func.sum(models.PromptRevision.size))
+        )).one()
+        count = args.prompts * (args.edits + 1)
+        print(f"{'Single paragraph' if paragraph else 'Lines'}: {count} revisions, "
+              f"snapshot every {revisions.PROMPT_REVISION_SNAPSHOT_INTERVAL}")
+        print(f"  diff only:         {_percentiles(diff_timings)}")
+        print(f"  record_revision:   {_percentiles(write_timings)}")
+        print(f"  stored {stored / 1024 / 1024:.1f} MB vs {full / 1024 / 1024:.1f} MB as full copies "
+              f"({full / stored:.0f}x smaller)")
+
+        interval = revisions.PROMPT_REVISION_SNAPSHOT_INTERVAL
+        random_reads, worst_reads = [], []
+        for _ in range(args.queries):
+            prompt_id = rng.randint(1, args.prompts)
+            start = time.perf_counter()
+            await revisions.get_revision(session, prompt_id, rng.randint(1, args.edits + 1))
+            random_reads.append(time.perf_counter() - start)
+            # The last revision before a snapshot applies interval - 1 diffs
+            worst = min(args.edits + 1, interval)
+            start = time.perf_counter()
+            await revisions.get_revision(session, prompt_id, worst)
+            worst_reads.append(time.perf_counter() - start)
+        print(f"  get_revision (random):          {_percentiles(random_reads)}")
+        print(f"  get_revision (longest chain):   {_percentiles(worst_reads)}")
+    await engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark prompt revision history")
+    parser.add_argument("--prompts", type=int, default=200)
+    parser.add_argument("--edits", type=int, default=100)
+    parser.add_argument("--kb", type=int, default=8)
+    parser.add_argument("--interval", type=int, default=revisions.PROMPT_REVISION_SNAPSHOT_INTERVAL)
+    parser.add_argument("--queries", type=int, default=500)
+    args = parser.parse_args()
+    revisions.PROMPT_REVISION_SNAPSHOT_INTERVAL = args.interval
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for paragraph in (False, True):
+            asyncio.run(_run(str(Path(tmp) / f"bench-{int(paragraph)}.db"), args, paragraph))
+
+
+if __name__ == "__main__":
+    main()
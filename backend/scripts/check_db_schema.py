@@ -1,7 +1,13 @@
+import argparse
 import sqlite3
 import os
+import sys
+from pathlib import Path
 from dotenv import load_dotenv
 
+# Add the backend directory to the Python path
+sys.path.append(str(Path(__file__).parent.parent))
+
 # Load environment variables
 load_dotenv()
 
@@ -65,6 +71,153 @@ def check_schema():
     finally:
         conn.close()
 
+# Hot queries issued by crud.py, as SQLAlchemy renders them for SQLite.
+# (name, sql, allowed) - by default any SCAN or temp b-tree sort is a regression;
+# `allowed` whitelists "index_scan" for the unfiltered listing (an ordered index walk
+# stopped by LIMIT) and "temp_sort" where an index already narrowed the result set.
+# The ILIKE '%term%' fallback (queries without trigrams) is deliberately absent: a leading wildcard can't use a b-tree.
+HOT_QUERIES = [
+    (
+        "get_prompts: newest first",
+        "SELECT prompt_view.id FROM prompt_view ORDER BY prompt_view.created_at DESC LIMIT 100 OFFSET 0",
+        {"index_scan"},
+    ),
+    (
+        "get_prompts: by category",
+        "SELECT prompt_view.id FROM prompt_view WHERE prompt_view.category_id = ? "
+        "ORDER BY prompt_view.created_at DESC LIMIT 100 OFFSET 0",
+        set(),
+    ),
+    (
+        "get_prompts: by owner",
+        "SELECT prompt_view.id FROM prompt_view WHERE prompt_view.user_id = ? "
+        "ORDER BY prompt_view.created_at DESC LIMIT 100 OFFSET 0",
+        set(),
+    ),
+    (
+        "get_prompts: by tag",
+        "SELECT prompt_view.id FROM prompt_view WHERE prompt_view.id IN ("
+        "SELECT prompt_tags.prompt_id FROM prompt_tags JOIN tags ON tags.id = prompt_tags.tag_id "
+        "WHERE lower(tags.name) = ?) ORDER BY prompt_view.created_at DESC LIMIT 100 OFFSET 0",
+        {"temp_sort"},
+    ),
+    (
+        "get_prompt",
+        "SELECT prompt_view.id, prompt_view.title FROM prompt_view WHERE prompt_view.id = ?",
+        set(),
+    ),
+    (
+        "get_prompts: trigram candidates",
+        "SELECT prompt_trigrams.prompt_id, count(prompt_trigrams.trigram) FROM prompt_trigrams "
+        "WHERE prompt_trigrams.trigram IN (?, ?, ?) GROUP BY prompt_trigrams.prompt_id, prompt_trigrams.word "
+        "HAVING count(prompt_trigrams.trigram) >= ?",
+        {"temp_sort"},
+    ),
+    (
+        "selectinload Prompt.tags",
+        "SELECT prompt_tags.prompt_id, tags.id FROM prompt_tags JOIN tags ON tags.id = prompt_tags.tag_id "
+        "WHERE prompt_tags.prompt_id IN (?, ?)",
+        set(),
+    ),
+    (
+        "selectinload Tag.prompts",
+        "SELECT prompt_tags.tag_id, prompts.id FROM prompt_tags JOIN prompts ON prompts.id = prompt_tags.prompt_id "
+        "WHERE prompt_tags.tag_id IN (?, ?)",
+        set(),
+    ),
+    (
+        "selectinload Category.prompts",
+        "SELECT prompts.category_id, prompts.id FROM prompts WHERE prompts.category_id IN (?, ?)",
+        set(),
+    ),
+    (
+        "get_prompts: liked ids on page",
+        "SELECT prompt_likes.prompt_id FROM prompt_likes "
+        "WHERE prompt_likes.user_id = ? AND prompt_likes.prompt_id IN (?, ?)",
+        set(),
+    ),
+    (
+        "get_user_liked_prompt_ids",
+        "SELECT prompt_likes.prompt_id FROM prompt_likes WHERE prompt_likes.user_id = ?",
+        set(),
+    ),
+    (
+        "is_prompt_liked_by_user",
+        "SELECT prompt_likes.id FROM prompt_likes "
+        "WHERE prompt_likes.prompt_id = ? AND prompt_likes.user_id = ?",
+        set(),
+    ),
+]
+
+def explain_hot_queries(conn):
+    """
+    Run EXPLAIN QUERY PLAN on every hot query.
+    Returns a list of (name, plan lines) for queries that regressed to a table
+    or index scan, or to an unexpected temp b-tree sort.
+    """
+    failures = []
+    cursor = conn.cursor()
+    for name, sql, allowed in HOT_QUERIES:
+        cursor.execute(f"EXPLAIN QUERY PLAN {sql}", [1] * sql.count("?"))
+        plan = [row[3] for row in cursor.fetchall()]
+        full_scan = any(line.startswith("SCAN ") and " USING " not in line for line in plan)
+        index_scan = any(line.startswith("SCAN ") and " USING " in line for line in plan)
+        temp_sort = any("USE TEMP B-TREE" in line for line in plan)
+        if (
+            full_scan
+            or (index_scan and "index_scan" not in allowed)
+            or (temp_sort and "temp_sort" not in allowed)
+        ):
+            failures.append((name, plan))
+    return failures
+
+def check_query_plans(conn) -> bool:
+    """Print the plan check results; returns True if no hot query regressed."""
+    print("\nChecking query plans for hot queries...")
+    failures = explain_hot_queries(conn)
+    failed_names = {name for name, _ in failures}
+    for name, _, _ in HOT_QUERIES:
+        print(f"  {'FAIL' if name in failed_names else 'ok  '} {name}")
+    for name, plan in failures:
+        print(f"\n  {name} regressed:")
+        for line in plan:
+            print(f"    {line}")
+    return not failures
+
+def connect_to_model_schema():
+    """Create the schema declared in app.models in an in-memory database."""
+    from sqlalchemy import create_engine
+    from app.models import Base
+
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    return engine.raw_connection().driver_connection
+
 if __name__ == "__main__":
-    print("Checking database schema...")
-    check_schema()
+    parser = argparse.ArgumentParser(description="Inspect the database schema and hot query plans.")
+    parser.add_argument(
+        "--plans", action="store_true",
+        help="Only check query plans; exit non-zero if any hot query regressed to a scan"
+    )
+    parser.add_argument(
+        "--models", action="store_true",
+        help="Check plans against the schema declared in app.models instead of sql_app.db"
+    )
+    args = parser.parse_args()
+
+    if not args.plans:
+        print("Checking database schema...")
+        check_schema()
+
+    if args.models:
+        conn = connect_to_model_schema()
+    else:
+        db_path = os.path.abspath("sql_app.db")
+        if not os.path.exists(db_path):
+            print(f"Error: Database file not found at {db_path}")
+            sys.exit(1)
+        conn = sqlite3.connect(db_path)
+    try:
+        sys.exit(0 if check_query_plans(conn) else 1)
+    finally:
+        conn.close()
@@ -1,4 +1,6 @@
 import os
+from contextlib import contextmanager
+
 import pytest
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
@@ -8,11 +10,17 @@ from sqlalchemy.orm import sessionmaker
 import sys
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from app.database import Base, get_db
-from main import create_application
-
-# Test database
+# Point the app at the test database before app.database creates its engine,
+# so the lifespan (create_all, backfills, in-memory indexes) never touches the
+# developer's database and reads the same rows the tests write
 SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
+os.environ["DATABASE_URL"] = "sqlite+aiosqlite:///./test.db"
+
+from app.database import Base
+from app.main import app as application
+from app.core.query_tracker import track_queries
+
+# Sync engine on the same database for direct session fixtures
 engine = create_engine(
     SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
 )
@@ -21,22 +29,36 @@ TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engin
 # Create test database
 Base.metadata.create_all(bind=engine)
 
-# Dependency to override get_db in the app
-def override_get_db():
-    try:
-        db = TestingSessionLocal()
-        yield db
-    finally:
-        db.close()
+# Keep the related-prompt index out of the working directory (and away from the dev server's)
+@pytest.fixture(scope="session", autouse=True)
+def related_vectors_path(tmp_path_factory):
+    from app.core.prompt_vectors import prompt_vectors
+
+    path = str(tmp_path_factory.mktemp("vectors") / "prompt_vectors")
+    prompt_vectors.path = prompt_vectors._shared_path = path
+    yield path
 
 # Create test client
 @pytest.fixture(scope="module")
 def client():
-    app = create_application()
-    app.dependency_overrides[get_db] = override_get_db
-    with TestClient(app) as test_client:
+    with TestClient(application) as test_client:
         yield test_client
 
+# Fixture to assert how many SQL statements a block may issue, e.g.
+#     with query_budget(4):
+#         client.get("/api/prompts/")
+@pytest.fixture
+def query_budget():
+    @contextmanager
+    def budget(max_queries: int):
+        with track_queries() as tracker:
+            yield tracker
+        assert tracker.count <= max_queries, (
+            f"Query budget exceeded: {tracker.count} statements (budget {max_queries})\n"
+            + "\n".join(f"  {n}x {shape}" for shape, n in tracker.shapes.most_common())
+        )
+    return budget
+
 # Fixture to get a test database session
 @pytest.fixture(scope="function")
 def db_session():
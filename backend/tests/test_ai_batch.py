@@ -0,0 +1,157 @@
+import asyncio
+import json
+import os
+import sys
+import time
+
+import httpx
+import pytest
+import pytest_asyncio
+from fastapi import HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+# Add the parent directory to the path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import models
+from app.api import ai
+from app.core.rate_limit import TokenBucket
+from app.database import get_db
+from app.main import app
+
+
+def suggestion_for(prompt_text):
+    return json.dumps({"improved_prompt": f"Improved: {prompt_text[-20:]}", "suggestions": [], "tags": []})
+
+
+@pytest.fixture(autouse=True)
+def fast_ai(monkeypatch):
+    monkeypatch.setattr(ai, "AI_CACHE_ENABLED", False)
+    monkeypatch.setattr(ai, "AI_RETRY_BASE_DELAY", 0.001)
+    monkeypatch.setattr(ai, "_provider_rate_limit", None)
+
+
+@pytest.fixture
+def client():
+    transport = httpx.ASGITransport(app=app)
+    return httpx.AsyncClient(transport=transport, base_url="http://test")
+
+
+@pytest.mark.asyncio
+async def test_token_bucket_limits_rate():
+    bucket = TokenBucket(rate=100, capacity=2)
+    start = time.perf_counter()
+    for _ in range(6):
+        await bucket.acquire()
+    # Two tokens from the burst, four more at 100/s
+    assert time.perf_counter() - start >= 0.035
+
+
+@pytest.mark.asyncio
+async def test_batch_streams_results_with_per_prompt_errors(client, monkeypatch):
+    attempts = {}
+
+    async def provider(prompt_text):
+        attempts[prompt_text] = attempts.get(prompt_text, 0) + 1
+        if "flaky" in prompt_text and attempts[prompt_text] == 1:
+            raise HTTPException(status_code=503, detail="busy")
+        if "broken" in prompt_text:
+            return "not json"
+        return suggestion_for(prompt_text)
+
+    monkeypatch.setattr(ai, "generate_text", provider)
+
+    async with client:
+        response = await client.post(
+            "/api/ai/suggestions/batch", json={"prompts": ["good", "flaky", "broken"]}
+        )
+
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = {item["index"]: item for item in map(json.loads, response.text.splitlines())}
+    assert lines[0]["status"] == "ok"
+    assert lines[1]["status"] == "ok"
+    assert lines[2]["status"] == "error"
+    # The flaky prompt was retried once; the unparseable one was not retried
+    assert sorted(attempts.values()) == [1, 1, 2]
+
+
+@pytest_asyncio.fixture
+async def session_factory(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'jobs.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(models.Base.metadata.create_all)
+    factory = async_sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+    async with factory() as session:
+        category = models.Category(name="Batch")
+        session.add(category)
+        await session.flush()
+        for i in range(3):
+            session.add(models.Prompt(title=f"P{i}", content=f"prompt {i}", category_id=category.id))
+        await session.commit()
+    async def override_get_db():
+        async with factory() as session:
+            yield session
+
+    app.dependency_overrides[get_db] = override_get_db
+    yield factory
+    app.dependency_overrides.pop(get_db, None)
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_background_job_over_category(client, session_factory, monkeypatch):
+    async def provider(prompt_text):
+        return suggestion_for(prompt_text)
+
+    monkeypatch.setattr(ai, "generate_text", provider)
+
+    async with client:
+        created = await client.post("/api/ai/suggestions/jobs", json={"category_id": 1})
+        assert created.status_code == 202
+        job_id = created.json()["id"]
+        for _ in range(100):
+            job = (await client.get(f"/api/ai/suggestions/jobs/{job_id}")).json()
+            if job["status"] == "completed":
+                break
+            await asyncio.sleep(0.01)
+
+    assert job["total"] == job["completed"] == 3
+    assert sorted(r["prompt_id"] for r in job["results"]) == [1, 2, 3]
+
+
+@pytest.mark.asyncio
+async def test_background_job_uses_full_content_of_large_prompts(client, session_factory, monkeypatch):
+    from app.core.cold_storage import PROMPT_COLD_STORAGE_BYTES, inline_content, write_body
+
+    content = "Explain each step in detail. " * (PROMPT_COLD_STORAGE_BYTES // 20) + "final instruction"
+    async with session_factory() as session:
+        preview, compressed = inline_content(content)
+        assert compressed
+        prompt = models.Prompt(title="Large", content=preview, content_compressed=True, category_id=1)
+        session.add(prompt)
+        await session.flush()
+        await write_body(session, prompt.id, content)
+        await session.commit()
+        prompt_id = prompt.id
+
+    seen = []
+
+    async def provider(prompt_text):
+        seen.append(prompt_text)
+        return suggestion_for(prompt_text)
+
+    monkeypatch.setattr(ai, "generate_text", provider)
+
+    async with client:
+        created = await client.post("/api/ai/suggestions/jobs", json={"prompt_ids": [prompt_id]})
+        assert created.status_code == 202
+        job_id = created.json()["id"]
+        for _ in range(100):
+            job = (await client.get(f"/api/ai/suggestions/jobs/{job_id}")).json()
+            if job["status"] == "completed":
+                break
+            await asyncio.sleep(0.01)
+
+    assert job["completed"] == 1
+    [prompt_text] = seen
+    assert content in prompt_text
@@ -0,0 +1,119 @@
+import asyncio
+import json
+import os
+import sys
+import time
+
+import httpx
+import pytest
+
+# Add the parent directory to the path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.api import ai
+from app.main import app
+
+CANNED_RESPONSE = json.dumps({
+    "improved_prompt": "Improved",
+    "suggestions": ["Be specific"],
+    "tags": ["writing"],
+})
+
+
+class SlowProvider:
+    """Local stand-in for the upstream model that takes `delay` seconds per call."""
+
+    def __init__(self, delay: float):
+        self.delay = delay
+        self.active = 0
+        self.max_active = 0
+
+    async def __call__(self, prompt_text: str) -> str:
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        try:
+            await asyncio.sleep(self.delay)
+            return CANNED_RESPONSE
+        finally:
+            self.active -= 1
+
+
+@pytest.fixture(autouse=True)
+def no_suggestion_cache(monkeypatch):
+    # Every call here must reach the (stub) provider
+    monkeypatch.setattr(ai, "AI_CACHE_ENABLED", False)
+
+
+@pytest.fixture
+def client():
+    transport = httpx.ASGITransport(app=app)
+    return httpx.AsyncClient(transport=transport, base_url="http://test")
+
+
+@pytest.mark.asyncio
+async def test_slow_provider_does_not_block_other_endpoints(client, monkeypatch):
+    monkeypatch.setattr(ai, "generate_text", SlowProvider(delay=0.5))
+
+    async with client:
+        suggestion = asyncio.create_task(
+            client.post("/api/ai/suggestions", json={"prompt": "write a poem"})
+        )
+        await asyncio.sleep(0.05)
+        start = time.perf_counter()
+        health = await client.get("/health")
+        elapsed = time.perf_counter() - start
+        response = await suggestion
+
+    assert health.status_code == 200
+    assert elapsed < 0.2
+    assert response.status_code == 200
+    assert response.json()["improved_prompt"] == "Improved"
+
+
+@pytest.mark.asyncio
+async def test_concurrent_upstream_calls_are_capped(client, monkeypatch):
+    provider = SlowProvider(delay=0.05)
+    monkeypatch.setattr(ai, "generate_text", provider)
+    monkeypatch.setattr(ai, "_provider_slots", asyncio.Semaphore(2))
+
+    async with client:
+        responses = await asyncio.gather(*[
+            client.post("/api/ai/suggestions", json={"prompt": f"prompt {i}"})
+            for i in range(6)
+        ])
+
+    assert all(r.status_code == 200 for r in responses)
+    assert provider.max_active == 2
+
+
+@pytest.mark.asyncio
+async def test_upstream_timeout_returns_504(client, monkeypatch):
+    monkeypatch.setattr(ai, "generate_text", SlowProvider(delay=1))
+    monkeypatch.setattr(ai, "AI_REQUEST_TIMEOUT", 0.05)
+
+    async with client:
+        response = await client.post("/api/ai/suggestions", json={"prompt": "slow"})
+
+    assert response.status_code == 504
+
+
+@pytest.mark.asyncio
+async def test_identical_concurrent_requests_share_one_upstream_call(client, monkeypatch):
+    calls = []
+
+    async def provider(prompt_text):
+        calls.append(prompt_text)
+        await asyncio.sleep(0.05)
+        return CANNED_RESPONSE
+
+    monkeypatch.setattr(ai, "generate_text", provider)
+
+    async with client:
+        responses = await asyncio.gather(*[
+            client.post("/api/ai/suggestions", json={"prompt": "Shared prompt"})
+            for _ in range(4)
+        ])
+
+    assert len(calls) == 1
+    assert all(r.json()["improved_prompt"] == "Improved" for r in responses)
+    assert sorted(r.headers["X-Cache"] for r in responses) == ["COALESCED"] * 3 + ["MISS"]
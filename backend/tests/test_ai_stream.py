@@ -0,0 +1,71 @@
+import asyncio
+import json
+import os
+import sys
+
+import httpx
+import pytest
+
+# Add the parent directory to the path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.api import ai
+from app.main import app
+
+ANSWER = '```json\n{"improved_prompt": "Write a \\"short\\" poem", "suggestions": ["Add a theme"], "tags": ["poetry"]}\n```'
+
+
+def parse_events(body):
+    events = []
+    for block in body.strip().split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in block.splitlines())
+        events.append((fields["event"], json.loads(fields["data"])))
+    return events
+
+
+@pytest.fixture(autouse=True)
+def no_suggestion_cache(monkeypatch):
+    monkeypatch.setattr(ai, "AI_CACHE_ENABLED", False)
+
+
+@pytest.mark.asyncio
+async def test_stream_emits_tokens_then_parsed_suggestions(monkeypatch):
+    async def provider_stream(prompt_text):
+        for i in range(0, len(ANSWER), 7):
+            await asyncio.sleep(0)
+            yield ANSWER[i:i + 7]
+
+    monkeypatch.setattr(ai, "generate_text_stream", provider_stream)
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        response = await client.post("/api/ai/suggestions/stream", json={"prompt": "poem"})
+
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = parse_events(response.text)
+    tokens = [data["text"] for name, data in events if name == "token"]
+    assert len(tokens) > 1
+    assert "".join(tokens) == 'Write a "short" poem'
+    assert events[-1] == ("suggestions", {
+        "improved_prompt": 'Write a "short" poem',
+        "suggestions": ["Add a theme"],
+        "tags": ["poetry"],
+    })
+
+
+@pytest.mark.asyncio
+async def test_stream_reports_provider_errors_as_event(monkeypatch):
+    async def provider_stream(prompt_text):
+        yield '{"improved_prompt": "partial'
+        raise RuntimeError("connection reset")
+
+    monkeypatch.setattr(ai, "generate_text_stream", provider_stream)
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        response = await client.post("/api/ai/suggestions/stream", json={"prompt": "poem"})
+
+    events = parse_events(response.text)
+    assert events[0] == ("token", {"text": "partial"})
+    assert events[-1][0] == "error"
+    assert "connection reset" in events[-1][1]["detail"]
@@ -0,0 +1,76 @@
+import os
+import sys
+import uuid
+
+# Add the parent directory to the path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.cold_storage import (
+    PROMPT_COLD_STORAGE_BYTES, PROMPT_PREVIEW_CHARS, compress, decompress, inline_content
+)
+
+
+def _large_content(marker):
+    return " ".join(f"step {i}: refine the answer" for i in range(PROMPT_COLD_STORAGE_BYTES // 10)) + f" {marker}"
+
+
+def test_inline_content_keeps_small_prompts():
+    assert inline_content("short prompt") == ("short prompt", False)
+    content = _large_content("large")
+    inline, compressed = inline_content(content)
+    assert compressed and inline == content[:PROMPT_PREVIEW_CHARS]
+    assert decompress("zlib", compress(content)) == content
+
+
+def test_large_prompt_round_trip(client):
+    category = client.post("/api/categories/", json={"name": f"Cold {uuid.uuid4().hex[:6]}"}).json()
+    marker = f"cold{uuid.uuid4().hex[:8]}"
+    content = _large_content(marker)
+    prompt = client.post("/api/prompts/", json={
+        "title": "Cold storage prompt", "content": content, "category_id": category["id"],
+    }).json()
+    assert prompt["content"] == content
+
+    # Listings carry a preview, the detail view the full content
+    listed = client.get("/api/prompts/", params={"category_id": category["id"]}).json()
+    assert listed[0]["content"] == content[:PROMPT_PREVIEW_CHARS]
+    assert listed[0]["content_truncated"] is True
+    detail = client.get(f"/api/prompts/{prompt['id']}").json()
+    assert detail["content"] == content and detail["content_truncated"] is False
+
+    # Text past the preview is still searchable
+    assert client.get("/api/prompts/", params={"search": marker}).json()[0]["id"] == prompt["id"]
+
+    # Title edits keep the body; shrinking the content brings it back inline
+    client.put(f"/api/prompts/{prompt['id']}", json={"title": "Cold storage prompt v2"})
+    assert client.get(f"/api/prompts/{prompt['id']}").json()["content"] == content
+    client.put(f"/api/prompts/{prompt['id']}", json={"content": "Now short"})
+    listed = client.get("/api/prompts/", params={"category_id": category["id"]}).json()
+    assert listed[0]["content"] == "Now short" and listed[0]["content_truncated"] is False
+
+    # And growing it moves it back out
+    client.put(f"/api/prompts/{prompt['id']}", json={"content": content + " again"})
+    assert client.get(f"/api/prompts/{prompt['id']}").json()["content"] == content + " again"
+
+    deleted = client.delete(f"/api/prompts/{prompt['id']}")
+    assert deleted.status_code == 200
+    assert client.get(f"/api/prompts/{prompt['id']}").status_code == 404
+
+
+def test_update_compares_against_full_content(client):
+    category = client.post("/api/categories/", json={"name": f"Cold {uuid.uuid4().hex[:6]}"}).json()
+    content = _large_content(f"cold{uuid.uuid4().hex[:8]}")
+    large = client.post("/api/prompts/", json={
+        "title": "Cold storage original", "content": content, "category_id": category["id"],
+    }).json()
+    small = client.post("/api/prompts/", json={
+        "title": "Cold storage other", "content": "Unrelated", "category_id": category["id"],
+    }).json()
+
+    # Matching the large prompt's inline preview is not a duplicate of its full text
+    response = client.put(f"/api/prompts/{small['id']}", json={"content": content[:PROMPT_PREVIEW_CHARS]})
+    assert response.status_code == 200
+
+    # Resubmitting the unchanged full content records no new revision
+    assert client.put(f"/api/prompts/{large['id']}", json={"content": content}).status_code == 200
+    assert len(client.get(f"/api/prompts/{large['id']}/revisions").json()) == 1
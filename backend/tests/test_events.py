@@ -0,0 +1,152 @@
+import asyncio
+import json
+import os
+import sys
+import threading
+import uuid
+
+import pytest
+
+# Add the parent directory to the path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.events import RESYNC, EventBackend, EventBroadcaster, event_broadcaster
+from app.core.sse import format_sse_comment
+from app.main import app as application
+
+
+def drain(subscription):
+    events = []
+    while not subscription.queue.empty():
+        events.append(subscription.queue.get_nowait())
+    return events
+
+
+def test_incomplete_backend_fails_when_constructed():
+    class PublishOnly(EventBackend):
+        def publish(self, event):
+            pass
+
+    with pytest.raises(TypeError):
+        PublishOnly()
+
+
+@pytest.mark.asyncio
+async def test_fans_out_to_matching_subscribers():
+    broadcaster = EventBroadcaster()
+    await broadcaster.start()
+    with broadcaster.subscribe() as everything, broadcaster.subscribe(["tag"]) as tags:
+        assert len(broadcaster) == 2
+        broadcaster.publish("prompt.created", {"id": 1})
+        broadcaster.publish("tag.deleted", {"id": 2})
+
+        assert [e["type"] for e in drain(everything)] == ["prompt.created", "tag.deleted"]
+        (event,) = drain(tags)
+        assert event["data"]["id"] == 2 and "at" in event["data"]
+    assert len(broadcaster) == 0
+    await broadcaster.stop()
+
+
+@pytest.mark.asyncio
+async def test_slow_subscriber_gets_resync_instead_of_backlog():
+    broadcaster = EventBroadcaster()
+    with broadcaster.subscribe() as subscription:
+        subscription.queue = asyncio.Queue(3)
+        for i in range(5):
+            broadcaster.publish("prompt.updated", {"id": i})
+
+        events = drain(subscription)
+        assert events[0] == {"type": RESYNC, "data": {"dropped": 3}}
+        assert [e["data"]["id"] for e in events[1:]] == [4]
+
+
+def test_crud_writes_publish_events(client):
+    with event_broadcaster.subscribe(["prompt", "category"]) as subscription:
+        category = client.post("/api/categories/", json={"name": f"Events {uuid.uuid4().hex[:6]}"}).json()
+        prompt = client.post("/api/prompts/", json={
+            "title": "Event prompt",
+            "content": f"Event content {uuid.uuid4().hex}",
+            "category_id": category["id"],
+        }).json()
+        client.put(f"/api/prompts/{prompt['id']}", json={"title": "Event prompt, edited"})
+        client.post(f"/api/prompts/{prompt['id']}/like", headers={"x-user-id": "event-fan"})
+        client.delete(f"/api/prompts/{prompt['id']}")
+
+        events = drain(subscription)
+    assert [(e["type"], e["data"]["id"]) for e in events] == [
+        ("category.created", category["id"]),
+        ("prompt.created", prompt["id"]),
+        ("prompt.updated", prompt["id"]),
+        ("prompt.liked", prompt["id"]),
+        ("prompt.deleted", prompt["id"]),
+    ]
+    assert events[3]["data"]["like_count"] == 1
+
+
+def _read_event_stream(client, query: bytes, until: set, ready: threading.Event):
+    """
+    Drive GET /api/events on the TestClient's event loop (its streaming
+    response never ends, so TestClient itself can't return it) until every
+    event type in `until` has arrived; returns [(event, data)]
+    """
+    async def read():
+        chunks = []
+        done = asyncio.Event()
+
+        async def receive():
+            await done.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            if message["type"] != "http.response.body":
+                return
+            chunks.append(message.get("body", b"").decode())
+            ready.set()
+            if until <= {event for event, _ in _parse("".join(chunks))}:
+                done.set()
+
+        scope = {
+            "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+            "scheme": "http", "path": "/api/events/", "raw_path": b"/api/events/", "root_path": "",
+            "query_string": query, "headers": [(b"host", b"testserver")],
+            "client": ("testclient", 50000), "server": ("testserver", 80),
+        }
+        await asyncio.wait_for(application(scope, receive, send), 10)
+        return _parse("".join(chunks))
+
+    return client.portal.start_task_soon(read)
+
+
+def _parse(text: str):
+    events = []
+    for block in text.split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in block.splitlines() if not line.startswith(":"))
+        if "event" in fields:
+            events.append((fields["event"], json.loads(fields["data"])))
+    return events
+
+
+def test_events_endpoint_streams_writes(client):
+    category = client.post("/api/categories/", json={"name": f"Stream {uuid.uuid4().hex[:6]}"}).json()
+    tag_name = f"streamed-{uuid.uuid4().hex[:6]}"
+    ready = threading.Event()
+    stream = _read_event_stream(client, b"entities=prompt,tag", {"prompt.created", "tag.created"}, ready)
+    assert ready.wait(5)
+
+    prompt = client.post("/api/prompts/", json={
+        "title": "Streamed prompt", "content": "Sent to SSE clients",
+        "category_id": category["id"], "tag_names": [tag_name],
+    }).json()
+
+    events = stream.result(timeout=10)
+    assert events[0][0] == "ready"
+    # Tags created with a prompt are announced too, before the prompt itself
+    assert [(event, data["id"]) for event, data in events[1:]] == [
+        ("tag.created", prompt["tags"][0]["id"]),
+        ("prompt.created", prompt["id"]),
+    ]
+    assert events[1][1]["name"] == tag_name
+
+
+def test_heartbeat_is_an_sse_comment():
+    assert format_sse_comment("heartbeat") == ": heartbeat\n\n"
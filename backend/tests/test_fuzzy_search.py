@@ -0,0 +1,65 @@
+import os
+import sys
+import uuid
+
+# Add the parent directory to the path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.search_index import similarity, trigrams
+
+
+def test_trigrams_match_pg_trgm():
+    # SELECT show_trgm('Cat!') in pg_trgm
+    assert trigrams("Cat!") == {"  c", " ca", "cat", "at "}
+    assert trigrams("...") == set()
+
+
+def test_misspellings_score_above_threshold():
+    assert similarity("sumarize", "Summarize this article") >= 0.6
+    assert similarity("javscript", "Explain JavaScript closures") >= 0.6
+    assert similarity("javscript", "Explain Python decorators") < 0.6
+    assert similarity("javscript calbacks", "Refactor JavaScript callbacks") >= 0.6
+
+
+def test_trigrams_scattered_across_words_do_not_match():
+    marketing = "Summer offers for humans: a marketing variety show with prize draws of every size"
+    assert similarity("sumarize", marketing) < 0.6
+    assert similarity("javscript", "Java developers write a description of the build script") < 0.6
+
+
+def test_search_finds_misspelled_prompts(client):
+    marker = uuid.uuid4().hex[:8]
+    category = client.post("/api/categories/", json={"name": f"Fuzzy {marker}"}).json()
+    created = {}
+    for title in ("Summarize meeting notes", "Refactor JavaScript callbacks", "Write a haiku"):
+        response = client.post("/api/prompts/", json={
+            "title": title,
+            "content": f"{title} for {marker}",
+            "category_id": category["id"],
+        })
+        assert response.status_code == 201
+        created[title] = response.json()["id"]
+
+    response = client.get("/api/prompts/", params={"search": "sumarize", "category_id": category["id"]})
+    assert [p["id"] for p in response.json()] == [created["Summarize meeting notes"]]
+
+    response = client.get("/api/prompts/", params={"search": "javscript calbacks", "category_id": category["id"]})
+    assert [p["id"] for p in response.json()] == [created["Refactor JavaScript callbacks"]]
+
+    # Trigrams spread over unrelated words don't match
+    response = client.post("/api/prompts/", json={
+        "title": "Java build notes",
+        "content": f"Java developers write a description of the build script {marker}",
+        "category_id": category["id"],
+    })
+    response = client.get("/api/prompts/", params={"search": "javscript", "category_id": category["id"]})
+    assert [p["id"] for p in response.json()] == [created["Refactor JavaScript callbacks"]]
+
+    # Edits are reindexed, deletes unindexed
+    prompt_id = created["Write a haiku"]
+    client.put(f"/api/prompts/{prompt_id}", json={"title": "Write a limerick", "content": f"limerick {marker}"})
+    response = client.get("/api/prompts/", params={"search": "limerik", "category_id": category["id"]})
+    assert [p["id"] for p in response.json()] == [prompt_id]
+    client.delete(f"/api/prompts/{prompt_id}")
+    response = client.get("/api/prompts/", params={"search": "limerik", "category_id": category["id"]})
+    assert response.json() == []
@@ -0,0 +1,86 @@
+import os
+import sys
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import create_async_engine
+
+# Add the parent directory to the path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.metrics import MetricsMiddleware, instrument_engine, metrics_endpoint
+
+engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+instrument_engine(engine)
+
+app = FastAPI()
+app.add_middleware(MetricsMiddleware)
+app.add_api_route("/metrics", metrics_endpoint, include_in_schema=False)
+
+
+@app.get("/items/{item_id}")
+async def read_item(item_id: int):
+    async with engine.connect() as conn:
+        await conn.execute(text("SELECT 1"))
+        await conn.execute(text("SELECT 2"))
+    return {"id": item_id}
+
+
+client = TestClient(app)
+
+
+def test_request_latency_is_labelled_by_route_template():
+    client.get("/items/1")
+    client.get("/items/2")
+
+    count = REGISTRY.get_sample_value(
+        "http_request_duration_seconds_count",
+        {"method": "GET", "route": "/items/{item_id}", "status_code": "200"},
+    )
+    assert count == 2
+
+
+def test_statements_are_counted_per_request():
+    before = REGISTRY.get_sample_value(
+        "db_statements_per_request_sum", {"route": "/items/{item_id}"}
+    ) or 0
+    client.get("/items/3")
+    after = REGISTRY.get_sample_value(
+        "db_statements_per_request_sum", {"route": "/items/{item_id}"}
+    )
+    assert after - before == 2
+
+
+def test_metrics_endpoint_exposes_text_format():
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert "http_request_duration_seconds_bucket" in response.text
+    assert "db_statement_duration_seconds" in response.text
+
+
+def test_engines_are_instrumented_once():
+    instrument_engine(engine)
+    other = create_async_engine("sqlite+aiosqlite:///./metrics_pool.db")
+    instrument_engine(other)
+    instrument_engine(other)
+    response = client.get("/metrics")
+    assert response.text.count('db_pool_size{engine="sqlite+aiosqlite:///./metrics_pool.db"}') == 1
+    client.get("/items/4")
+    after = REGISTRY.get_sample_value("db_statements_per_request_sum", {"route": "/items/{item_id}"})
+    client.get("/items/5")
+    # Re-instrumenting didn't add a second set of statement listeners
+    assert REGISTRY.get_sample_value("db_statements_per_request_sum", {"route": "/items/{item_id}"}) - after == 2
+
+
+@pytest.mark.asyncio
+async def test_failed_statements_leave_no_timing_state():
+    async with engine.connect() as conn:
+        for _ in range(3):
+            with pytest.raises(OperationalError):
+                await conn.execute(text("SELECT * FROM missing_table"))
+        await conn.execute(text("SELECT 1"))
+        assert not conn.sync_connection.info.get("metrics_query_start")
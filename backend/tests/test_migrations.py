@@ -0,0 +1,49 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+BACKEND = Path(__file__).resolve().parent.parent
+
+# Runs in a fresh interpreter, outside the backend directory (its alembic/
+# package would shadow the library), so app.database picks up DATABASE_URL
+_MIGRATE_AND_SERVE = """
+import sys
+from alembic import command
+from alembic.config import Config
+
+backend = sys.argv[1]
+config = Config(f"{backend}/alembic.ini")
+config.set_main_option("script_location", f"{backend}/alembic")
+command.upgrade(config, "head")
+
+sys.path.insert(0, backend)
+from fastapi.testclient import TestClient
+from app.main import app
+
+with TestClient(app) as client:
+    category = client.post("/api/categories/", json={"name": "Migrated"}).json()
+    response = client.post("/api/prompts/", json={
+        "title": "Migrated prompt", "content": "Served from the migrated schema",
+        "category_id": category["id"], "tag_names": ["alembic"],
+    })
+    assert response.status_code == 201, response.text
+    [prompt] = client.get("/api/prompts/", params={"search": "migrated"}).json()
+    assert prompt["tags"][0]["name"] == "alembic"
+"""
+
+
+def test_app_runs_on_a_schema_built_by_alembic(tmp_path):
+    # The DB_CREATE_ALL=false deployment path: migrations alone build the schema
+    env = {
+        **os.environ,
+        "DATABASE_URL": f"sqlite+aiosqlite:///{tmp_path / 'migrated.db'}",
+        "DB_CREATE_ALL": "false",
+        "RELATED_VECTORS_PATH": str(tmp_path / "prompt_vectors"),
+        "AI_CACHE_PATH": str(tmp_path / "ai_cache.db"),
+    }
+    result = subprocess.run(
+        [sys.executable, "-c", _MIGRATE_AND_SERVE, str(BACKEND)],
+        cwd=tmp_path, env=env, capture_output=True, text=True, timeout=120,
+    )
+    assert result.returncode == 0, result.stderr[-3000:]
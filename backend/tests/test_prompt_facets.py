@@ -0,0 +1,55 @@
+import os
+import sys
+import uuid
+
+# Add the parent directory to the path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def _create(client, category_id, marker, tags):
+    response = client.post("/api/prompts/", json={
+        "title": f"Facet {marker}",
+        "content": f"Facet content {marker} {uuid.uuid4().hex}",
+        "category_id": category_id,
+        "tag_names": tags,
+    })
+    assert response.status_code == 201
+
+
+def test_facet_counts_for_search(client, query_budget):
+    marker = uuid.uuid4().hex[:10]
+    writing = client.post("/api/categories/", json={"name": f"Writing {marker}"}).json()
+    coding = client.post("/api/categories/", json={"name": f"Coding {marker}"}).json()
+    _create(client, writing["id"], marker, [f"blog-{marker}", f"seo-{marker}"])
+    _create(client, writing["id"], marker, [f"blog-{marker}"])
+    _create(client, coding["id"], marker, [f"python-{marker}"])
+
+    # Items plus three grouped count queries; prompts are not loaded for the counts
+    with query_budget(7):
+        response = client.get("/api/prompts/", params={"search": marker, "facets": "true"})
+    assert response.status_code == 200
+    body = response.json()
+    assert len(body["items"]) == 3
+    facets = body["facets"]
+    assert facets["total"] == 3
+    assert [(c["name"], c["count"]) for c in facets["categories"]] == [
+        (f"Writing {marker}", 2), (f"Coding {marker}", 1)
+    ]
+    assert [(t["name"], t["count"]) for t in facets["tags"]] == [
+        (f"blog-{marker}", 2), (f"python-{marker}", 1), (f"seo-{marker}", 1)
+    ]
+
+    # A facet ignores its own filter, so other categories stay visible
+    response = client.get("/api/prompts/", params={
+        "search": marker, "category_id": coding["id"], "facets": "true", "facet_tag_limit": 1
+    })
+    facets = response.json()["facets"]
+    assert facets["total"] == 1
+    assert len(facets["categories"]) == 2
+    assert [t["name"] for t in facets["tags"]] == [f"python-{marker}"]
+
+
+def test_plain_list_without_facets(client):
+    response = client.get("/api/prompts/", params={"limit": 1})
+    assert response.status_code == 200
+    assert isinstance(response.json(), list)
@@ -0,0 +1,71 @@
+import os
+import sys
+import uuid
+
+# Add the parent directory to the path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.query_tracker import QueryTracker, instrument_queries, normalize_statement
+from app.database import engine
+
+
+def test_normalize_statement_collapses_literals_and_in_lists():
+    a = normalize_statement("SELECT * FROM tags WHERE tags.id IN (?, ?, ?) AND name = 'x'")
+    b = normalize_statement("SELECT *  FROM tags\n WHERE tags.id IN (?) AND name = 'other'")
+    assert a == b == "SELECT * FROM tags WHERE tags.id IN (?) AND name = ?"
+
+
+def test_repeated_shapes_are_reported():
+    tracker = QueryTracker()
+    for prompt_id in range(5):
+        tracker.record(f"SELECT * FROM prompt_likes WHERE prompt_id = {prompt_id}")
+    tracker.record("SELECT * FROM prompts")
+    assert tracker.repeated_shapes(threshold=3) == [
+        ("SELECT * FROM prompt_likes WHERE prompt_id = ?", 5)
+    ]
+
+
+def _create_prompt(client):
+    category = client.post("/api/categories/", json={"name": f"Budget {uuid.uuid4().hex[:8]}"}).json()
+    return client.post("/api/prompts/", json={
+        "title": "Budget prompt",
+        "content": f"Budget content {uuid.uuid4().hex}",
+        "category_id": category["id"],
+        "tag_names": ["budget", "queries"],
+    }).json()
+
+
+def test_list_prompts_query_budget(client, query_budget):
+    _create_prompt(client)
+    # The prompt_view read model, then the user's likes on the page
+    with query_budget(2):
+        response = client.get("/api/prompts/", headers={"x-user-id": "budget-user"})
+    assert response.status_code == 200
+
+
+def test_app_engine_is_instrumented_once(client, query_budget):
+    # The app under test runs on the test database, not the developer's
+    assert engine.url.database == "./test.db"
+    instrument_queries(engine)
+    _create_prompt(client)
+    with query_budget(2) as tracker:
+        client.get("/api/prompts/", headers={"x-user-id": "budget-user"})
+    assert tracker.count == 2
+
+
+def test_read_prompt_query_budget(client, query_budget):
+    prompt = _create_prompt(client)
+    with query_budget(2):
+        response = client.get(f"/api/prompts/{prompt['id']}", headers={"x-user-id": "budget-user"})
+    assert response.status_code == 200
+
+
+def test_update_prompt_query_budget(client, query_budget):
+    prompt = _create_prompt(client)
+    # The endpoint re-reads the prompt several times; tighten this as it is optimized.
+    # Includes the three statements that rewrite the prompt's search index entries,
+    # the change log insert, the prompt_view update and the two that append a
+    # revision; the re-read is one query.
+    with query_budget(15):
+        response = client.put(f"/api/prompts/{prompt['id']}", json={"title": "Budget prompt v2"})
+    assert response.status_code == 200
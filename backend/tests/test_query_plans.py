@@ -0,0 +1,25 @@
+import os
+import sys
+
+# Add the parent directory to the path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scripts.check_db_schema import connect_to_model_schema, explain_hot_queries
+
+
+def test_hot_queries_use_indexes():
+    conn = connect_to_model_schema()
+    try:
+        assert explain_hot_queries(conn) == []
+    finally:
+        conn.close()
+
+
+def test_dropped_index_is_reported():
+    conn = connect_to_model_schema()
+    try:
+        conn.execute("DROP INDEX ix_prompt_view_category_id_created_at")
+        failed = {name for name, _ in explain_hot_queries(conn)}
+        assert "get_prompts: by category" in failed
+    finally:
+        conn.close()
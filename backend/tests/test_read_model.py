@@ -0,0 +1,85 @@
+import os
+import sys
+import uuid
+
+# Add the parent directory to the path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def _listed(client, prompt_id, **params):
+    prompts = client.get("/api/prompts/", params={"limit": 1000, **params}).json()
+    return next(p for p in prompts if p["id"] == prompt_id)
+
+
+def test_prompt_view_follows_writes(client):
+    category = client.post("/api/categories/", json={"name": f"View {uuid.uuid4().hex[:6]}"}).json()
+    other = client.post("/api/categories/", json={"name": f"View other {uuid.uuid4().hex[:6]}"}).json()
+    tag_a, tag_b = f"view-a-{uuid.uuid4().hex[:6]}", f"view-b-{uuid.uuid4().hex[:6]}"
+    prompt = client.post("/api/prompts/", json={
+        "title": "Read model prompt",
+        "content": f"Read model content {uuid.uuid4().hex}",
+        "category_id": category["id"],
+        "tag_names": [tag_a, tag_b],
+    }).json()
+
+    listed = _listed(client, prompt["id"], category_id=category["id"])
+    assert listed["category"]["name"] == category["name"]
+    assert sorted(listed["tag_names"]) == sorted([tag_a, tag_b])
+    assert client.get(f"/api/prompts/{prompt['id']}").json()["tags"] == listed["tags"]
+
+    # Edits, including a move to another category
+    client.put(f"/api/prompts/{prompt['id']}", json={
+        "title": "Read model prompt, edited", "category_id": other["id"], "tag_names": [tag_a]
+    })
+    listed = _listed(client, prompt["id"], category_id=other["id"])
+    assert listed["title"] == "Read model prompt, edited"
+    assert listed["category"]["id"] == other["id"]
+    assert listed["tag_names"] == [tag_a]
+
+    # Category rename
+    client.put(f"/api/categories/{other['id']}", json={"name": f"Renamed {uuid.uuid4().hex[:6]}"})
+    renamed = client.get(f"/api/categories/{other['id']}").json()["name"]
+    assert client.get(f"/api/prompts/{prompt['id']}").json()["category"]["name"] == renamed
+
+    # Likes (which also bump updated_at)
+    before = client.get(f"/api/prompts/{prompt['id']}").json()["updated_at"]
+    liked = client.post(f"/api/prompts/{prompt['id']}/like", headers={"x-user-id": "view-fan"}).json()
+    listed = _listed(client, prompt["id"], tag=tag_a)
+    assert listed["like_count"] == 1
+    assert listed["updated_at"] == liked["updated_at"] > before
+    assert client.get(f"/api/prompts/{prompt['id']}").json()["updated_at"] == liked["updated_at"]
+
+    # Tag deletion
+    tag_id = listed["tags"][0]["id"]
+    client.delete(f"/api/tags/{tag_id}")
+    assert client.get(f"/api/prompts/{prompt['id']}").json()["tags"] == []
+
+    # Prompt deletion
+    client.delete(f"/api/prompts/{prompt['id']}")
+    assert client.get(f"/api/prompts/{prompt['id']}").status_code == 404
+    assert all(p["id"] != prompt["id"] for p in client.get("/api/prompts/", params={"limit": 1000}).json())
+
+
+def test_failed_update_rolls_back_new_tags(client, monkeypatch):
+    from app import crud
+
+    category = client.post("/api/categories/", json={"name": f"View tx {uuid.uuid4().hex[:6]}"}).json()
+    kept, new = f"view-kept-{uuid.uuid4().hex[:6]}", f"view-new-{uuid.uuid4().hex[:6]}"
+    prompt = client.post("/api/prompts/", json={
+        "title": "Transactional prompt", "content": f"Transactional content {uuid.uuid4().hex}",
+        "category_id": category["id"], "tag_names": [kept],
+    }).json()
+
+    # Fail after the new tag and the cleared prompt_tags have been flushed
+    async def fail(*args, **kwargs):
+        raise RuntimeError("revision store unavailable")
+    monkeypatch.setattr(crud, "record_revision", fail)
+    response = client.put(f"/api/prompts/{prompt['id']}", json={"title": "Edited", "tag_names": [new]})
+    assert response.status_code == 500
+    monkeypatch.undo()
+
+    # Nothing of the failed update was committed: not the tag, nor the tag changes
+    assert all(tag["name"] != new for tag in client.get("/api/tags/", params={"limit": 1000}).json())
+    detail = client.get(f"/api/prompts/{prompt['id']}").json()
+    assert (detail["title"], detail["tag_names"]) == ("Transactional prompt", [kept])
+    assert _listed(client, prompt["id"])["tag_names"] == [kept]
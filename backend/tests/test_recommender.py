@@ -0,0 +1,74 @@
+import asyncio
+import os
+import sys
+import uuid
+
+# Add the parent directory to the path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.core.recommender import PromptRecommender, recommender
+
+
+async def train_on_test_db():
+    engine = create_async_engine("sqlite+aiosqlite:///./test.db")
+    try:
+        await recommender.train(async_sessionmaker(bind=engine))
+    finally:
+        await engine.dispose()
+
+
+def test_recommends_prompts_liked_by_similar_users():
+    model = PromptRecommender()
+    model.load([
+        ("ana", 1), ("ana", 2),
+        ("bo", 1), ("bo", 2), ("bo", 3),
+        ("cy", 3), ("cy", 4),
+        ("di", 5),
+    ])
+
+    assert model.recommend([1]) == [(2, 1.0), (3, 0.5)]
+    # Scores from several liked prompts add up; liked prompts are excluded
+    assert [p for p, _ in model.recommend([1, 3])] == [2, 4]
+    assert model.recommend([1, 3], limit=1)[0][0] == 2
+
+
+def test_falls_back_to_most_liked_prompts():
+    model = PromptRecommender()
+    model.load([("ana", 1), ("bo", 1), ("bo", 2), ("cy", 3), ("cy", 1)])
+
+    assert model.recommend([]) == [(1, 0.0), (2, 0.0), (3, 0.0)]
+    assert model.recommend([99], limit=2) == [(1, 0.0), (2, 0.0)]
+    assert PromptRecommender().recommend([1]) == []
+
+
+def test_recommended_endpoint(client):
+    category = client.post("/api/categories/", json={"name": f"Recommend {uuid.uuid4().hex[:6]}"}).json()
+    ids = []
+    for i in range(3):
+        response = client.post("/api/prompts/", json={
+            "title": f"Recommendation prompt {i}",
+            "content": f"Recommendation content {uuid.uuid4().hex}",
+            "category_id": category["id"],
+        })
+        assert response.status_code == 201
+        ids.append(response.json()["id"])
+
+    others = [f"fan-{uuid.uuid4().hex[:8]}" for _ in range(3)]
+    for user in others:
+        for prompt_id in ids[:2]:
+            client.post(f"/api/prompts/{prompt_id}/like", headers={"x-user-id": user})
+    me = f"me-{uuid.uuid4().hex[:8]}"
+    client.post(f"/api/prompts/{ids[0]}/like", headers={"x-user-id": me})
+
+    asyncio.run(train_on_test_db())
+
+    response = client.get("/api/prompts/recommended", headers={"x-user-id": me})
+    assert response.status_code == 200
+    recommended = response.json()
+    assert recommended[0]["id"] == ids[1]
+    assert recommended[0]["score"] > 0
+    assert ids[0] not in [p["id"] for p in recommended]
+
+    assert client.get("/api/prompts/recommended").status_code == 401
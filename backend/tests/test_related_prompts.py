@@ -0,0 +1,176 @@
+import os
+import sys
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+# Add the parent directory to the path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import models
+from app.core.prompt_vectors import PromptVectors
+
+DOCUMENTS = [
+    (1, "Write unit tests for a Python function using pytest fixtures"),
+    (2, "Generate pytest unit tests with fixtures for this Python module"),
+    (3, "Draft a friendly marketing email for our spring sale"),
+    (4, "Write a marketing email announcing the spring product sale"),
+    (5, "Explain how photosynthesis works to a ten year old"),
+]
+
+
+def test_related_by_content(tmp_path):
+    vectors = PromptVectors(path=str(tmp_path / "vectors"), dim=256)
+    vectors.rebuild(DOCUMENTS)
+
+    assert vectors.related(1, limit=1)[0][0] == 2
+    assert vectors.related(3, limit=1)[0][0] == 4
+    assert all(prompt_id != 5 for prompt_id, _ in vectors.related(1, limit=2))
+    assert vectors.related(99) == []
+
+
+def test_incremental_updates_and_reload(tmp_path):
+    path = str(tmp_path / "vectors")
+    vectors = PromptVectors(path=path, dim=256)
+    vectors.rebuild(DOCUMENTS)
+
+    vectors.upsert(6, "Explain photosynthesis and plant biology simply")
+    assert vectors.related(5, limit=1)[0][0] == 6
+    vectors.remove(6)
+    assert all(prompt_id != 6 for prompt_id, _ in vectors.related(5))
+    # The freed row is reused
+    vectors.upsert(7, "Photosynthesis explained for kids")
+    assert vectors.related(5, limit=1)[0][0] == 7
+    vectors.flush()
+
+    reloaded = PromptVectors(path=path, dim=256)
+    assert reloaded.load()
+    assert reloaded.related(5, limit=1) == vectors.related(5, limit=1)
+    assert not PromptVectors(path=path, dim=128).load()
+
+
+def test_writes_are_ignored_until_the_index_is_loaded(tmp_path):
+    # RELATED_PROMPTS_ENABLED=false: sync never runs, so nothing is written
+    vectors = PromptVectors(path=str(tmp_path / "vectors"), dim=64)
+    vectors.upsert(1, "Write unit tests for a Python function")
+    vectors.remove(1)
+    assert vectors.related(1) == []
+    vectors.close()
+    assert os.listdir(tmp_path) == []
+
+
+def test_growth_beyond_initial_capacity(tmp_path):
+    vectors = PromptVectors(path=str(tmp_path / "vectors"), dim=64)
+    vectors.rebuild([])
+    for i in range(3000):
+        vectors.upsert(i, f"prompt number {i} about topic{i % 50}")
+    assert len(vectors.related(10, limit=10)) == 10
+    assert os.path.getsize(str(tmp_path / "vectors.vectors")) >= 3000 * 64 * 4
+
+
+def test_partitioned_index(tmp_path):
+    path = str(tmp_path / "vectors")
+    topics = ["python testing fixtures", "marketing email campaign", "sql index query plan", "poetry haiku rhyme"]
+    documents = [(i, f"{topics[i % 4]} variant{i}") for i in range(400)]
+    vectors = PromptVectors(path=path, dim=128, partition_min_prompts=100, probes=4)
+    vectors.rebuild(documents)
+    assert vectors._centroids is not None
+
+    for prompt_id, _ in vectors.related(0, limit=5):
+        assert prompt_id % 4 == 0
+    # Writes go to the nearest partition and survive a reload
+    vectors.upsert(1000, "python testing fixtures extra")
+    vectors.remove(4)
+    assert 4 not in [prompt_id for prompt_id, _ in vectors.related(0, limit=400)]
+    vectors.flush()
+    reloaded = PromptVectors(path=path, dim=128, partition_min_prompts=100, probes=4)
+    assert reloaded.load()
+    assert 1000 in [prompt_id for prompt_id, _ in reloaded.related(0, limit=400)]
+
+
+async def _database(path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    async with engine.begin() as conn:
+        await conn.run_sync(models.Base.metadata.create_all)
+    factory = async_sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+    async with factory() as session:
+        session.add(models.Category(id=1, name="Related"))
+        for prompt_id, text in DOCUMENTS:
+            session.add(models.Prompt(
+                id=prompt_id, title="", content=text, category_id=1, updated_at=datetime(2024, 1, prompt_id)
+            ))
+        await session.commit()
+    return engine, factory
+
+
+@pytest.mark.asyncio
+async def test_sync_reconciles_changed_prompts_and_other_databases(tmp_path):
+    path = str(tmp_path / "vectors")
+    engine, factory = await _database(tmp_path / "a.db")
+    vectors = PromptVectors(path=path, dim=256)
+    await vectors.sync(factory)
+    assert vectors.related(5, limit=1)[0][0] != 1
+    vectors.close()
+
+    # Edited while the app was down: the row is re-embedded on the next start
+    async with factory() as session:
+        await session.execute(
+            update(models.Prompt).where(models.Prompt.id == 1)
+            .values(content="Explain photosynthesis to a child", updated_at=datetime(2024, 2, 1))
+        )
+        await session.commit()
+    reloaded = PromptVectors(path=path, dim=256)
+    await reloaded.sync(factory)
+    assert reloaded.related(5, limit=1)[0][0] == 1
+    reloaded.close()
+    await engine.dispose()
+
+    # Built against another database: rebuilt, not reused
+    other_engine, other_factory = await _database(tmp_path / "b.db")
+    other = PromptVectors(path=path, dim=256)
+    await other.sync(other_factory)
+    assert other.related(5, limit=1)[0][0] != 1
+    other.close()
+    await other_engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_one_writer_per_index_file(tmp_path):
+    path = str(tmp_path / "vectors")
+    engine, factory = await _database(tmp_path / "a.db")
+    first, second = PromptVectors(path=path, dim=256), PromptVectors(path=path, dim=256)
+    await first.sync(factory)
+    # The second process-level writer gets a private index instead of sharing the files
+    await second.sync(factory)
+    assert second.path != path and second.related(1, limit=1)[0][0] == 2
+    second.upsert(6, "Unrelated text", datetime.utcnow() + timedelta(days=1))
+    assert 6 not in first._rows
+    second.close()
+    assert second.path == path
+    first.close()
+    await engine.dispose()
+
+
+def test_related_endpoint(client):
+    marker = uuid.uuid4().hex[:8]
+    category = client.post("/api/categories/", json={"name": f"Related {marker}"}).json()
+    ids = []
+    for content in (
+        "Translate this customer support reply into Spanish and French",
+        "Translate the support reply to Spanish, keeping a polite tone",
+        "Write a SQL query to find duplicate rows in a table",
+    ):
+        response = client.post("/api/prompts/", json={
+            "title": f"{content[:20]} {marker}", "content": content, "category_id": category["id"]
+        })
+        ids.append(response.json()["id"])
+
+    response = client.get(f"/api/prompts/{ids[0]}/related", params={"limit": 3})
+    assert response.status_code == 200
+    related = response.json()
+    assert related[0]["id"] == ids[1]
+    assert related[0]["score"] > 0.2
+    assert client.get("/api/prompts/999999/related").status_code == 404
@@ -0,0 +1,73 @@
+import os
+import sys
+import uuid
+
+import pytest
+
+# Add the parent directory to the path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core import revisions
+from app.core.revisions import apply_delta, make_delta
+
+
+@pytest.mark.parametrize("old,new", [
+    ("", "first line\n"),
+    ("a\nb\nc\n", "a\nB\nc\nd"),
+    ("keep\r\nthis\r\n", "keep\r\nthat\r\nand more\r\n"),
+    ("no trailing newline", "no trailing newline\n"),
+    ("x\ny\nz\n", ""),
+    # Long lines are diffed word by word
+    (" ".join(["explain each step"] * 30), " ".join(["explain each  step"] * 29) + " then stop"),
+    ("intro\n" + "word " * 40 + "\noutro\n", "intro\n" + "word " * 20 + "\nsplit " + "word " * 20 + "\n"),
+])
+def test_delta_round_trip(old, new):
+    assert apply_delta(old, make_delta(old, new)) == new
+
+
+def test_delta_of_small_edit_is_small():
+    old = "".join(f"line {i} of a long prompt\n" for i in range(500))
+    new = old.replace("line 250 of", "line 250, edited, of")
+    delta = make_delta(old, new)
+    assert delta == [250, -1, "line 250, edited, of a long prompt\n", 249]
+
+
+def test_delta_of_single_paragraph_edit_is_small():
+    old = " ".join(f"Step {i}: state your assumptions before answering." for i in range(300))
+    new = old.replace("Step 150: state your", "Step 150: list your")
+    delta = make_delta(old, new)
+    assert delta == [[1052, -1, "list ", 1047]]
+    assert apply_delta(old, delta) == new
+
+
+def test_revision_history(client, monkeypatch):
+    monkeypatch.setattr(revisions, "PROMPT_REVISION_SNAPSHOT_INTERVAL", 3)
+    category = client.post("/api/categories/", json={"name": f"Revisions {uuid.uuid4().hex[:6]}"}).json()
+    base = "".join(f"Step {i}: think it through\n" for i in range(40))
+    prompt = client.post("/api/prompts/", json={
+        "title": "Revised prompt", "content": base, "category_id": category["id"],
+    }).json()
+
+    versions = [("Revised prompt", base)]
+    for i in range(7):
+        title = f"Revised prompt v{i + 2}" if i % 2 else versions[-1][0]
+        content = versions[-1][1].replace(f"Step {i}:", f"Step {i} (edited {uuid.uuid4().hex[:4]}):")
+        client.put(f"/api/prompts/{prompt['id']}", json={"title": title, "content": content})
+        versions.append((title, content))
+    # Tag-only edits don't create revisions
+    client.put(f"/api/prompts/{prompt['id']}", json={"tag_names": ["revisions"]})
+
+    history = client.get(f"/api/prompts/{prompt['id']}/revisions").json()
+    assert [r["number"] for r in history] == list(range(8, 0, -1))
+    kinds = {r["number"]: r["kind"] for r in history}
+    assert [n for n, kind in kinds.items() if kind == "snapshot"] == [7, 4, 1]
+
+    for number, (title, content) in enumerate(versions, start=1):
+        revision = client.get(f"/api/prompts/{prompt['id']}/revisions/{number}").json()
+        assert (revision["title"], revision["content"]) == (title, content)
+
+    assert client.get(f"/api/prompts/{prompt['id']}/revisions/9").status_code == 404
+    assert client.get("/api/prompts/999999/revisions").status_code == 404
+
+    client.delete(f"/api/prompts/{prompt['id']}")
+    assert client.get(f"/api/prompts/{prompt['id']}/revisions/1").status_code == 404
@@ -0,0 +1,47 @@
+import os
+import sys
+import uuid
+
+# Add the parent directory to the path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.search_index import fts_query
+
+
+def test_fts_query_quotes_user_input():
+    assert fts_query('quarterly "report" OR NOT') == '"quarterly"* OR "report"* OR "or"* OR "not"*'
+    assert fts_query("***") is None
+
+
+def test_search_results_include_snippets(client, query_budget):
+    marker = uuid.uuid4().hex[:8]
+    category = client.post("/api/categories/", json={"name": f"Snippets {marker}"}).json()
+    filler = " ".join(f"word{i}" for i in range(200))
+    response = client.post("/api/prompts/", json={
+        "title": f"Report writer {marker}",
+        "content": f"{filler} summarize the <quarterly> numbers for {marker} {filler}",
+        "category_id": category["id"],
+    })
+    assert response.status_code == 201
+
+    # One extra statement fetches every snippet on the page
+    with query_budget(5) as tracker:
+        response = client.get("/api/prompts/", params={
+            "search": f"quarterly {marker}", "include_content": "false"
+        })
+    assert response.status_code == 200
+    # ...and the listing doesn't read content at all
+    [listing] = [shape for shape in tracker.shapes if "FROM prompt_view" in shape]
+    assert "prompt_view.content," not in listing.split(" FROM prompt_view", 1)[0]
+    [prompt] = response.json()
+    assert prompt["content"] is None
+    assert prompt["title_highlight"] == f"Report writer <mark>{marker}</mark>"
+    snippet = prompt["snippet"]
+    assert "&lt;<mark>quarterly</mark>&gt;" in snippet
+    assert snippet.startswith("…") and snippet.endswith("…")
+    assert len(snippet) < 400
+
+    # Not a search: no highlights, full content
+    [prompt] = client.get("/api/prompts/", params={"category_id": category["id"]}).json()
+    assert prompt["snippet"] is None
+    assert filler in prompt["content"]
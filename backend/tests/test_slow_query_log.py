@@ -0,0 +1,73 @@
+import asyncio
+import os
+import sys
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+# Add the parent directory to the path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import crud, models
+from app.core.slow_query_log import SlowQueryLog, redact_parameters
+
+
+def test_redact_parameters_hides_values():
+    assert redact_parameters(("secret", 42, None)) == ["<str len=6>", "<int>", None]
+
+
+@pytest.mark.asyncio
+async def test_slow_queries_are_aggregated_with_caller_and_plan(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'slow.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(models.Base.metadata.create_all)
+
+    log = SlowQueryLog(threshold_ms=0)
+    log.instrument(engine)
+    await log.start()
+    try:
+        session_factory = async_sessionmaker(bind=engine, class_=AsyncSession)
+        async with session_factory() as session:
+            await crud.get_prompts(session, category_id=1)
+        # Plans are captured by the background worker
+        for _ in range(50):
+            report = log.report()
+            if all(entry["plan"] is not None for entry in report if entry["statement"].startswith("SELECT")):
+                break
+            await asyncio.sleep(0.01)
+    finally:
+        await log.stop()
+        await engine.dispose()
+
+    listing = next(entry for entry in report if "FROM prompt_view" in entry["statement"])
+    assert listing["callers"] == ["get_prompts"]
+    assert listing["p99_ms"] >= listing["p50_ms"] > 0
+    assert any("ix_prompt_view_category_id_created_at" in line for line in listing["plan"])
+
+
+def test_shape_stats_are_bounded():
+    log = SlowQueryLog(threshold_ms=1000, max_shapes=2)
+    log.record("SELECT * FROM a", (), 0.001)
+    log.record("SELECT * FROM b", (), 0.001)
+    log.record("SELECT * FROM a", (), 0.001)
+    log.record("SELECT * FROM c", (), 0.001)
+    # The least recently run shape went first
+    assert list(log.stats) == ["SELECT * FROM a", "SELECT * FROM c"]
+
+
+@pytest.mark.asyncio
+async def test_failed_statements_leave_no_timing_state():
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    log = SlowQueryLog(threshold_ms=1000)
+    log.instrument(engine)
+    try:
+        async with engine.connect() as conn:
+            for _ in range(3):
+                with pytest.raises(OperationalError):
+                    await conn.execute(text("SELECT * FROM missing_table"))
+            await conn.execute(text("SELECT 1"))
+            assert not conn.sync_connection.info.get("slow_query_start")
+    finally:
+        await engine.dispose()
@@ -0,0 +1,48 @@
+import os
+import re
+import subprocess
+import sys
+
+# Add the parent directory to the path
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(BACKEND_DIR)
+
+# Budget for `import app.main`, as measured by -X importtime (which adds some overhead)
+STARTUP_IMPORT_BUDGET_MS = float(os.getenv("STARTUP_IMPORT_BUDGET_MS", "1500"))
+# Heavy modules that must only load on first use
+LAZY_MODULES = ("google.generativeai", "thefuzz")
+
+_IMPORT_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$")
+
+
+def import_profile():
+    """{module: cumulative microseconds} for a fresh `import app.main`"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app.main"],
+        cwd=BACKEND_DIR,
+        capture_output=True,
+        text=True,
+        timeout=60,
+    )
+    assert result.returncode == 0, result.stderr
+    profile = {}
+    for line in result.stderr.splitlines():
+        match = _IMPORT_LINE.match(line)
+        if match:
+            profile[match.group(4)] = int(match.group(2))
+    return profile
+
+
+def test_startup_import_budget():
+    profile = import_profile()
+
+    for module in LAZY_MODULES:
+        loaded = [name for name in profile if name == module or name.startswith(module + ".")]
+        assert not loaded, f"{module} is imported at startup"
+
+    total_ms = profile["app.main"] / 1000
+    slowest = sorted(profile.items(), key=lambda item: -item[1])[:10]
+    assert total_ms <= STARTUP_IMPORT_BUDGET_MS, (
+        f"import app.main took {total_ms:.0f}ms (budget {STARTUP_IMPORT_BUDGET_MS:.0f}ms); slowest: "
+        + ", ".join(f"{name} {us / 1000:.0f}ms" for name, us in slowest)
+    )
@@ -0,0 +1,85 @@
+import json
+import os
+import sys
+
+import httpx
+import pytest
+
+# Add the parent directory to the path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.api import ai
+from app.core.suggestion_cache import (
+    CACHE_HIT_DISK,
+    CACHE_HIT_MEMORY,
+    CACHE_MISS,
+    SuggestionCache,
+    cache_key,
+)
+from app.main import app
+
+SUGGESTION = {"improved_prompt": "Improved", "suggestions": ["Be specific"], "tags": ["writing"]}
+
+
+def test_cache_key_ignores_case_and_whitespace():
+    assert cache_key("Write  a poem\n", "m") == cache_key("write a POEM", "m")
+    assert cache_key("write a poem", "m") != cache_key("write a poem", "other-model")
+
+
+@pytest.mark.asyncio
+async def test_memory_then_disk_tiers(tmp_path):
+    path = str(tmp_path / "cache.db")
+    cache = SuggestionCache(path=path, ttl=60, memory_size=10)
+    assert await cache.get("k") == (None, CACHE_MISS)
+    await cache.set("k", SUGGESTION)
+    assert await cache.get("k") == (SUGGESTION, CACHE_HIT_MEMORY)
+    cache.close()
+
+    # A fresh instance (e.g. after a restart) finds the entry on disk
+    restarted = SuggestionCache(path=path, ttl=60, memory_size=10)
+    assert await restarted.get("k") == (SUGGESTION, CACHE_HIT_DISK)
+    assert await restarted.get("k") == (SUGGESTION, CACHE_HIT_MEMORY)
+    restarted.close()
+
+
+@pytest.mark.asyncio
+async def test_expired_entries_are_misses(tmp_path):
+    cache = SuggestionCache(path=str(tmp_path / "cache.db"), ttl=-1)
+    await cache.set("k", SUGGESTION)
+    assert await cache.get("k") == (None, CACHE_MISS)
+    cache.close()
+
+
+@pytest.mark.asyncio
+async def test_size_limits_evict_least_recently_used(tmp_path):
+    cache = SuggestionCache(path=str(tmp_path / "cache.db"), ttl=60, memory_size=2, max_entries=2)
+    for key in ("a", "b", "c"):
+        await cache.set(key, SUGGESTION)
+    cache.evict()
+    cache._memory.clear()
+    assert (await cache.get("a"))[1] == CACHE_MISS
+    assert (await cache.get("c"))[1] == CACHE_HIT_DISK
+    cache.close()
+
+
+@pytest.mark.asyncio
+async def test_repeated_suggestions_are_served_from_cache(tmp_path, monkeypatch):
+    calls = []
+
+    async def provider(prompt_text):
+        calls.append(prompt_text)
+        return json.dumps(SUGGESTION)
+
+    monkeypatch.setattr(ai, "generate_text", provider)
+    monkeypatch.setattr(ai, "AI_CACHE_ENABLED", True)
+    monkeypatch.setattr(ai, "suggestion_cache", SuggestionCache(path=str(tmp_path / "cache.db")))
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        first = await client.post("/api/ai/suggestions", json={"prompt": "Write a poem"})
+        second = await client.post("/api/ai/suggestions", json={"prompt": "write a poem "})
+
+    assert first.headers["X-Cache"] == CACHE_MISS
+    assert second.headers["X-Cache"] == CACHE_HIT_MEMORY
+    assert second.json() == first.json() == SUGGESTION
+    assert len(calls) == 1
@@ -0,0 +1,155 @@
+import asyncio
+import os
+import sys
+import uuid
+from datetime import datetime, timedelta
+
+# Add the parent directory to the path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import func, select, update
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app import crud, models
+from app.core.change_log import DELETE, compact_change_log
+
+
+def run_on_test_db(work):
+    async def run():
+        engine = create_async_engine("sqlite+aiosqlite:///./test.db")
+        try:
+            return await work(async_sessionmaker(bind=engine))
+        finally:
+            await engine.dispose()
+    return asyncio.run(run())
+
+
+def sync_all(client, since=0):
+    """Follow has_more to the end; returns the last page and the final cursor"""
+    while True:
+        page = client.get("/api/sync/", params={"since": since, "limit": 1000}).json()
+        since = page["cursor"]
+        if not page["has_more"]:
+            return page, since
+
+
+def test_sync_returns_changes_since_cursor(client):
+    category = client.post("/api/categories/", json={"name": f"Sync {uuid.uuid4().hex[:6]}"}).json()
+    tag_name = f"sync-{uuid.uuid4().hex[:6]}"
+    kept, removed = (
+        client.post("/api/prompts/", json={
+            "title": f"Sync prompt {i}",
+            "content": f"Sync content {uuid.uuid4().hex}",
+            "category_id": category["id"],
+            "tag_names": [tag_name],
+        }).json()
+        for i in range(2)
+    )
+    page, cursor = sync_all(client)
+    assert page["reset"] is False
+
+    client.put(f"/api/prompts/{kept['id']}", json={"title": "Sync prompt, edited"})
+    client.post(f"/api/prompts/{kept['id']}/like", headers={"x-user-id": "sync-user"})
+    client.delete(f"/api/prompts/{removed['id']}")
+
+    page = client.get("/api/sync/", params={"since": cursor}).json()
+    assert page["cursor"] > cursor and page["has_more"] is False
+    assert [(p["id"], p["title"], p["like_count"]) for p in page["prompts"]] == [
+        (kept["id"], "Sync prompt, edited", 1)
+    ]
+    assert page["deleted"]["prompts"] == [removed["id"]]
+    assert page["categories"] == [] and page["tags"] == []
+
+    # Nothing new: same cursor, empty page
+    again = client.get("/api/sync/", params={"since": page["cursor"]}).json()
+    assert again["cursor"] == page["cursor"]
+    assert again["prompts"] == [] and again["deleted"]["prompts"] == []
+
+    # Deleting a tag is a tombstone for it and an update for the prompts that carried it
+    tag_id = kept["tags"][0]["id"]
+    client.delete(f"/api/tags/{tag_id}")
+    page = client.get("/api/sync/", params={"since": again["cursor"]}).json()
+    assert page["deleted"]["tags"] == [tag_id]
+    assert [(p["id"], p["tag_names"]) for p in page["prompts"]] == [(kept["id"], [])]
+
+
+def test_first_sync_pages_through_everything(client):
+    client.post("/api/categories/", json={"name": f"Sync paging {uuid.uuid4().hex[:6]}"})
+    seen, since = set(), 0
+    while True:
+        page = client.get("/api/sync/", params={"since": since, "limit": 2}).json()
+        seen.update(c["id"] for c in page["categories"])
+        since = page["cursor"]
+        if not page["has_more"]:
+            break
+    assert seen == {c["id"] for c in client.get("/api/categories/", params={"limit": 1000}).json()}
+
+
+def test_compaction_keeps_latest_entries_and_resets_stale_cursors(client):
+    category = client.post("/api/categories/", json={"name": f"Compact {uuid.uuid4().hex[:6]}"}).json()
+    prompt = client.post("/api/prompts/", json={
+        "title": "Compacted prompt",
+        "content": f"Compacted content {uuid.uuid4().hex}",
+        "category_id": category["id"],
+    }).json()
+    _, stale_cursor = sync_all(client)
+    for i in range(3):
+        client.put(f"/api/prompts/{prompt['id']}", json={"title": f"Compacted prompt v{i}"})
+    client.delete(f"/api/prompts/{prompt['id']}")
+    _, cursor = sync_all(client)
+
+    async def compact(session_factory):
+        async with session_factory() as session:
+            await session.execute(
+                update(models.ChangeLog)
+                .where(models.ChangeLog.action == DELETE)
+                .values(created_at=func.datetime("now", "-60 days"))
+            )
+            await session.commit()
+        removed = await compact_change_log(session_factory, retention_days=30)
+        async with session_factory() as session:
+            entries = (await session.execute(
+                select(func.count()).select_from(models.ChangeLog).where(
+                    models.ChangeLog.entity == "prompt", models.ChangeLog.entity_id == prompt["id"]
+                )
+            )).scalar()
+        return removed, entries
+
+    removed, entries = run_on_test_db(compact)
+    assert removed >= 4
+    assert entries == 0  # superseded updates and the old tombstone are gone
+
+    page = client.get("/api/sync/", params={"since": stale_cursor}).json()
+    assert page["reset"] is True
+    assert client.get("/api/sync/", params={"since": cursor}).json()["reset"] is False
+
+    # A client that syncs from scratch ends up at or past the horizon
+    _, fresh_cursor = sync_all(client)
+    assert client.get("/api/sync/", params={"since": fresh_cursor}).json()["reset"] is False
+
+
+def test_sync_stops_before_unsettled_changes(client, monkeypatch):
+    _, cursor = sync_all(client)
+    first, second = (
+        client.post("/api/categories/", json={"name": f"Settle {i} {uuid.uuid4().hex[:6]}"}).json()
+        for i in range(2)
+    )
+
+    async def backdate_second(session_factory):
+        async with session_factory() as session:
+            await session.execute(
+                update(models.ChangeLog)
+                .where(models.ChangeLog.entity == "category", models.ChangeLog.entity_id == second["id"])
+                .values(created_at=func.datetime("now", "-1 hours"))
+            )
+            await session.commit()
+
+    run_on_test_db(backdate_second)
+    # As if ids committed out of order: the later entry has settled, the earlier one hasn't
+    monkeypatch.setattr(crud, "settle_cutoff", lambda db: datetime.utcnow() - timedelta(minutes=1))
+    page = client.get("/api/sync/", params={"since": cursor}).json()
+    assert page["categories"] == [] and page["cursor"] == cursor
+
+    monkeypatch.setattr(crud, "settle_cutoff", lambda db: None)
+    page = client.get("/api/sync/", params={"since": cursor}).json()
+    assert [c["id"] for c in page["categories"]] == [first["id"], second["id"]]
@@ -0,0 +1,74 @@
+import math
+import os
+import sys
+import uuid
+
+# Add the parent directory to the path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.tag_graph import TagCooccurrence
+
+
+def test_related_scores_from_pair_counts():
+    graph = TagCooccurrence()
+    # 10 prompts: python on 4, with pytest on 3 of them and sql on 1; sql on 6
+    graph.load([(1, 2, 3), (1, 3, 1)], [(1, 4), (2, 3), (3, 6)], 10)
+
+    jaccard = graph.related(1)
+    assert [(t["id"], t["count"]) for t in jaccard] == [(2, 3), (3, 1)]
+    assert jaccard[0]["score"] == 0.75
+    assert jaccard[1]["score"] == round(1 / 9, 4)
+
+    pmi = graph.related(1, metric="pmi")
+    assert pmi[0]["score"] == round(math.log(3 * 10 / (4 * 3)), 4)
+    assert graph.related(1, min_count=2) == [{"id": 2, "count": 3, "score": 0.75}]
+    assert graph.related(1, limit=1)[0]["id"] == 2
+    assert graph.related(99) == []
+
+
+def test_incremental_updates_match_a_rebuild():
+    graph = TagCooccurrence()
+    graph.add_prompt([1, 2])
+    graph.add_prompt([1, 2, 3])
+    graph.add_prompt([3])
+    graph.remove_prompt([1, 2, 3])
+    graph.add_prompt([1, 3])
+
+    rebuilt = TagCooccurrence()
+    rebuilt.load([(1, 2, 1), (1, 3, 1)], [(1, 2), (2, 1), (3, 2)], 3)
+    for tag_id in (1, 2, 3):
+        assert graph.related(tag_id) == rebuilt.related(tag_id)
+
+    graph.remove_tag(3)
+    assert [t["id"] for t in graph.related(1)] == [2]
+
+
+def test_related_endpoint_tracks_tag_changes(client):
+    prefix = f"co{uuid.uuid4().hex[:6]}"
+    category = client.post("/api/categories/", json={"name": f"Co-occurrence {prefix}"}).json()
+    a, b, c = (f"{prefix}-{name}" for name in ("a", "b", "c"))
+    ids = []
+    for tags in ([a, b], [a, b], [a, c]):
+        response = client.post("/api/prompts/", json={
+            "title": "Co-occurrence prompt",
+            "content": f"Co-occurrence content {uuid.uuid4().hex}",
+            "category_id": category["id"],
+            "tag_names": tags,
+        })
+        assert response.status_code == 201
+        ids.append(response.json()["id"])
+    tag_a = next(t["id"] for t in response.json()["tags"] if t["name"] == a)
+
+    related = client.get(f"/api/tags/{tag_a}/related").json()
+    assert [(t["name"], t["count"]) for t in related] == [(b, 2), (c, 1)]
+
+    client.put(f"/api/prompts/{ids[0]}", json={"tag_names": [a, c]})
+    related = client.get(f"/api/tags/{tag_a}/related", params={"metric": "pmi"}).json()
+    assert sorted((t["name"], t["count"]) for t in related) == [(b, 1), (c, 2)]
+
+    client.delete(f"/api/prompts/{ids[2]}")
+    related = client.get(f"/api/tags/{tag_a}/related", params={"min_count": 2}).json()
+    assert related == []
+
+    assert client.get("/api/tags/999999/related").status_code == 404
+    assert client.get(f"/api/tags/{tag_a}/related", params={"metric": "cosine"}).status_code == 422
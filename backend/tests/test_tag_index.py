@@ -0,0 +1,58 @@
+import os
+import sys
+import uuid
+
+# Add the parent directory to the path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.tag_index import TagPrefixIndex
+
+
+def test_prefix_matches_ranked_by_usage():
+    index = TagPrefixIndex()
+    index.load([(1, "Python", 5), (2, "pytest", 9), (3, "PyTorch", 5), (4, "SQL", 20)])
+
+    assert [t["name"] for t in index.suggest("py")] == ["pytest", "Python", "PyTorch"]
+    assert [t["name"] for t in index.suggest("PY", limit=1)] == ["pytest"]
+    assert index.suggest("rust") == []
+    assert index.suggest("")[0] == {"id": 4, "name": "SQL", "usage_count": 20}
+
+
+def test_updates_invalidate_cached_results():
+    index = TagPrefixIndex()
+    index.load([(1, "python", 1)])
+    assert [t["name"] for t in index.suggest("py")] == ["python"]
+
+    index.add(2, "pytorch", 3)
+    assert [t["name"] for t in index.suggest("py")] == ["pytorch", "python"]
+
+    index.add(2, "pytorch", -3)
+    index.add(1, "python", 1)
+    assert [t["usage_count"] for t in index.suggest("py")] == [2, 0]
+
+    index.remove(1)
+    assert [t["name"] for t in index.suggest("py")] == ["pytorch"]
+
+
+def test_suggest_endpoint_tracks_writes(client):
+    prefix = f"ac{uuid.uuid4().hex[:6]}"
+    category = client.post("/api/categories/", json={"name": f"Autocomplete {prefix}"}).json()
+    for tags in ([f"{prefix}-alpha", f"{prefix}-beta"], [f"{prefix}-beta"]):
+        response = client.post("/api/prompts/", json={
+            "title": "Autocomplete prompt",
+            "content": f"Autocomplete content {uuid.uuid4().hex}",
+            "category_id": category["id"],
+            "tag_names": tags,
+        })
+        assert response.status_code == 201
+
+    response = client.get("/api/tags/suggest", params={"prefix": prefix.upper()})
+    assert response.status_code == 200
+    suggestions = response.json()
+    assert [(t["name"], t["usage_count"]) for t in suggestions] == [
+        (f"{prefix}-beta", 2), (f"{prefix}-alpha", 1)
+    ]
+
+    client.delete(f"/api/tags/{suggestions[0]['id']}")
+    response = client.get("/api/tags/suggest", params={"prefix": prefix})
+    assert [t["name"] for t in response.json()] == [f"{prefix}-alpha"]
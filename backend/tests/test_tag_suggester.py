@@ -0,0 +1,78 @@
+import os
+import sys
+import time
+
+import pytest
+
+# Add the parent directory to the path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.tag_suggester import TagSuggester
+
+CORPUS = [
+    ("Write a Python function that parses CSV files", ["python", "coding"]),
+    ("Refactor this Python class for readability", ["python", "coding"]),
+    ("Explain this SQL query and suggest indexes", ["sql", "coding"]),
+    ("Draft a marketing email announcing our product launch", ["marketing", "email"]),
+    ("Write social media posts for a product launch campaign", ["marketing", "social"]),
+    ("Summarize this research paper in plain language", ["summarization"]),
+]
+
+
+@pytest.fixture
+def suggester():
+    suggester = TagSuggester()
+    suggester.load(CORPUS)
+    return suggester
+
+
+def test_ranks_tags_by_text_similarity(suggester):
+    names = [name for name, _ in suggester.suggest("Write a python script to parse CSV files")]
+    assert names[0] == "python"
+    assert "coding" in names[:2]
+    assert "summarization" not in names
+
+
+def test_cooccurrence_boosts_related_tags(suggester):
+    # "campaign" only appears with social, but marketing co-occurs with it
+    names = [name for name, _ in suggester.suggest("campaign ideas")]
+    assert names[:2] == ["social", "marketing"]
+    # Existing tags are excluded and pull in their companions
+    names = [name for name, _ in suggester.suggest("something new", existing=["sql"])]
+    assert "sql" not in names
+    assert names[0] == "coding"
+
+
+def test_incremental_update(suggester):
+    assert suggester.suggest("kubernetes deployment manifests") == []
+    suggester.add_prompt("Generate Kubernetes deployment manifests", ["devops"])
+    # Queued until the background refresh folds it in
+    assert suggester.suggest("kubernetes deployment manifests") == []
+    assert suggester.fold_pending() == 1
+    assert suggester.suggest("kubernetes deployment manifests")[0][0] == "devops"
+    assert suggester.fold_pending() == 0
+
+
+def test_add_prompt_does_not_wait_for_a_build():
+    suggester = TagSuggester()
+    suggester.load(CORPUS)
+    # A build in progress holds the lock; adding a prompt must not wait for it
+    with suggester._lock:
+        start = time.perf_counter()
+        suggester.add_prompt("Terraform modules for the staging network", ["devops"])
+        assert time.perf_counter() - start < 0.01
+    assert suggester.fold_pending() == 1
+
+
+def test_suggestions_are_fast():
+    suggester = TagSuggester()
+    words = [f"word{i}" for i in range(2000)]
+    suggester.load(
+        (" ".join(words[(i * 7) % 1990:(i * 7) % 1990 + 10]), [f"tag{i % 300}", f"tag{(i * 3) % 300}"])
+        for i in range(5000)
+    )
+    suggester.suggest("warm up")
+    start = time.perf_counter()
+    for i in range(100):
+        suggester.suggest(" ".join(words[i:i + 30]))
+    assert (time.perf_counter() - start) / 100 < 0.01
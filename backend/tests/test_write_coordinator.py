@@ -0,0 +1,96 @@
+import asyncio
+import os
+import sys
+
+import pytest
+import pytest_asyncio
+from fastapi import HTTPException
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+# Add the parent directory to the path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import crud, models, schemas
+from app.core.write_coordinator import WriteCoordinator
+
+
+@pytest_asyncio.fixture
+async def session_factory(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'writes.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(models.Base.metadata.create_all)
+    factory = async_sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+    async with factory() as session:
+        session.add(models.Category(name="Writes"))
+        await session.commit()
+    yield factory
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_concurrent_writes_share_commits(session_factory):
+    coordinator = WriteCoordinator(session_factory, window_ms=20, max_batch=100, enabled=True)
+    await coordinator.start()
+
+    commits = 0
+    original_commit = AsyncSession.commit
+
+    async def counting_commit(self):
+        nonlocal commits
+        commits += 1
+        await original_commit(self)
+
+    AsyncSession.commit = counting_commit
+    try:
+        results = await asyncio.gather(*[
+            coordinator.submit(lambda s, i=i: crud.stage_prompt(
+                s, schemas.PromptCreate(title=f"P{i}", content=f"content {i}", category_id=1)
+            ))
+            for i in range(20)
+        ])
+    finally:
+        AsyncSession.commit = original_commit
+        await coordinator.stop()
+
+    assert sorted(prompt["title"] for prompt, _ in results) == sorted(f"P{i}" for i in range(20))
+    assert commits < 20
+    async with session_factory() as session:
+        assert (await session.execute(select(func.count(models.Prompt.id)))).scalar() == 20
+
+
+@pytest.mark.asyncio
+async def test_failing_unit_does_not_affect_batch(session_factory):
+    coordinator = WriteCoordinator(session_factory, window_ms=20, enabled=True)
+    await coordinator.start()
+    try:
+        good = coordinator.submit(lambda s: crud.stage_prompt(
+            s, schemas.PromptCreate(title="Good", content="ok", category_id=1)
+        ))
+        bad = coordinator.submit(lambda s: crud.stage_prompt(
+            s, schemas.PromptCreate(title="Bad", content="missing category", category_id=999)
+        ))
+        results = await asyncio.gather(good, bad, return_exceptions=True)
+    finally:
+        await coordinator.stop()
+
+    assert results[0][0]["title"] == "Good"
+    assert isinstance(results[1], HTTPException) and results[1].status_code == 404
+    async with session_factory() as session:
+        titles = (await session.execute(select(models.Prompt.title))).scalars().all()
+    assert titles == ["Good"]
+
+
+@pytest.mark.asyncio
+async def test_run_commits_directly_when_disabled(session_factory):
+    coordinator = WriteCoordinator(session_factory, enabled=False)
+    await coordinator.start()
+    assert not coordinator.running
+
+    async with session_factory() as session:
+        result, _ = await coordinator.run(session, lambda s: crud.stage_prompt(
+            s, schemas.PromptCreate(title="Direct", content="direct", category_id=1)
+        ))
+    assert result["id"] is not None
+    async with session_factory() as session:
+        assert (await session.execute(select(func.count(models.Prompt.id)))).scalar() == 1